@@ -1,67 +1,192 @@
 
-import yaml
-import google.generativeai as genai
+import json
+import os
+import sys
+import uuid
 import markdown
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 
+from markdown_stream import IncrementalMarkdownRenderer
+
+# 저장소 루트의 공용 모듈(common)을 불러오기 위해 경로를 추가합니다.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.compression import init_compression
+from common.conversation_store import ConversationStore, to_gemini_history
+from common.fast_json import init_fast_json
+from common.llm_client import LLMConfigError, read_config
+from common.model_router import create_router
+from common.profiling import init_profiling
+from common.semantic_cache import create_semantic_cache
+
 app = Flask(__name__)
 # 개발 중 모든 출처에서 오는 요청을 허용합니다.
 CORS(app) 
 
 # --- 모델 설정 ---
+config = {}
 try:
     # config.yaml 파일에서 API 키를 로드합니다.
-    with open('config.yaml', 'r') as file:
-        config = yaml.safe_load(file)
-    api_key = config.get('api_key')
-
-    if not api_key or api_key == 'YOUR_API_KEY':
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-        print("! backend/config.yaml 파일에 API 키를 설정해야 합니다.")
-        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-        # 실제 운영 환경에서는 여기서 애플리케이션을 종료하거나,
-        # 키가 없으면 특정 기능을 비활성화하는 로직이 필요합니다.
-        # 지금은 경고만 출력하고 진행합니다。
-        genai.configure(api_key="DUMMY_KEY_FOR_INITIALIZATION") # 임시 키로 초기화
-    else:
-        genai.configure(api_key=api_key)
-
-    # 사용할 모델을 설정합니다。
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
-    # 채팅 세션을 시작합니다. 이 세션은 서버가 실행되는 동안 유지됩니다.
-    chat = model.start_chat(history=[])
+    config = read_config('config.yaml')
+    # 요청마다 대화 길이와 지연 시간에 따라 모델 등급을 고르는 라우터 (등급마다 공용 클라이언트 사용)
+    model = create_router(config, default_model='gemini-1.5-flash-latest')
 
 except FileNotFoundError:
     print("backend/config.yaml 파일을 찾을 수 없습니다.")
-    chat = None
+    model = None
+except LLMConfigError:
+    print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+    print("! backend/config.yaml 파일에 API 키를 설정해야 합니다.")
+    print("! (API 키 없이 실행하려면 llm.backend를 fake로 설정하세요.)")
+    print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+    model = None
 except Exception as e:
     print(f"모델 초기화 중 오류 발생: {e}")
-    chat = None
+    model = None
+
+# --- 프로파일링 (관리자 전용, 실행 중에 켜고 끌 수 있음) ---
+profiler = init_profiling(app, config.get('profiling', {}))
+
+# --- 응답 압축 (gzip/brotli, SSE는 이벤트마다 flush) ---
+compressor = init_compression(app, config.get('compression', {}))
+
+# --- JSON 직렬화 (orjson, 없으면 표준 json) ---
+init_fast_json(app)
+
+# --- 대화 기록 저장소 ---
+# 대화는 SQLite 파일에 저장되므로 서버를 재시작해도 유지되고,
+# 같은 파일을 쓰는 어느 워커든 어느 세션이든 이어서 처리할 수 있습니다.
+store = ConversationStore(config.get('history_db', 'conversations.db'))
+# 세션 재개 시 모델 컨텍스트로 불러올 최근 메시지 수
+HISTORY_WINDOW = config.get('history_window', 20)
+
+# --- 의미 기반 답변 캐시 ---
+# 이전 대화 맥락이 없는 첫 질문만 캐시를 사용합니다. (맥락이 있으면 같은 질문도 답이 달라질 수 있음)
+answer_cache = create_semantic_cache(config.get('semantic_cache', {}))
+CACHE_NAMESPACE = 'chat'
+
+def load_session_history(session_id: str):
+    """저장소에서 최근 대화만 불러오기"""
+    messages = store.load_recent(session_id, limit=HISTORY_WINDOW)
+    # 히스토리는 사용자 메시지부터 시작해야 합니다.
+    while messages and messages[0]['role'] != 'user':
+        messages.pop(0)
+    return messages
+
+def start_session_chat(messages):
+    """불러온 대화로 세션의 채팅을 재구성"""
+    return model.start_chat(history=to_gemini_history(messages))
 
 # --- API 엔드포인트 ---
 @app.route('/api/chat', methods=['POST'])
 def chat_endpoint():
-    if not chat:
+    if not model:
         return jsonify({"error": "모델이 제대로 초기화되지 않았습니다. API 키와 설정을 확인하세요."}), 500
 
     data = request.get_json()
     user_input = data.get('message')
+    session_id = data.get('session_id') or uuid.uuid4().hex
 
     if not user_input:
         return jsonify({"error": "메시지가 없습니다."}), 400
 
     try:
+        history = load_session_history(session_id)
+        cached = answer_cache.get(CACHE_NAMESPACE, user_input) if not history else None
+        if cached is not None:
+            store.append_many(session_id, [('user', user_input), ('model', cached['text'])])
+            return jsonify({"reply": cached['html'], "session_id": session_id, "cached": True})
+
         # 모델에 메시지를 보냅니다.
+        chat = start_session_chat(history)
         response = chat.send_message(user_input)
+        # 질문과 응답을 한 번에 저장합니다.
+        store.append_many(session_id, [('user', user_input), ('model', response.text)])
         # 모델의 응답을 Markdown에서 HTML로 변환합니다.
         html_response = markdown.markdown(response.text)
+        if not history:
+            answer_cache.put(CACHE_NAMESPACE, user_input, {'text': response.text, 'html': html_response})
         # HTML 응답을 JSON 형태로 반환합니다.
-        return jsonify({"reply": html_response})
+        return jsonify({"reply": html_response, "session_id": session_id})
     except Exception as e:
         print(f"메시지 전송 중 오류 발생: {e}")
         return jsonify({"error": "메시지 처리 중 서버에서 오류가 발생했습니다."}), 500
 
+def sse_event(payload: dict) -> str:
+    """Server-Sent Events 형식의 이벤트 문자열 생성"""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream_endpoint():
+    """모델 응답을 청크 단위로 전달하는 스트리밍 엔드포인트 (SSE)
+
+    이벤트 종류:
+    - block: 확정된 블록의 HTML (다시 전송되지 않음)
+    - tail: 아직 작성 중인 마지막 블록의 HTML (매번 교체)
+    - done / error: 스트림 종료 (done에는 session_id 포함)
+    """
+    if not model:
+        return jsonify({"error": "모델이 제대로 초기화되지 않았습니다. API 키와 설정을 확인하세요."}), 500
+
+    data = request.get_json()
+    user_input = data.get('message')
+    session_id = data.get('session_id') or uuid.uuid4().hex
+
+    if not user_input:
+        return jsonify({"error": "메시지가 없습니다."}), 400
+
+    def generate():
+        renderer = IncrementalMarkdownRenderer()
+        reply_parts = []
+        try:
+            history = load_session_history(session_id)
+            cached = answer_cache.get(CACHE_NAMESPACE, user_input) if not history else None
+            if cached is not None:
+                store.append_many(session_id, [('user', user_input), ('model', cached['text'])])
+                yield sse_event({"type": "block", "html": cached['html']})
+                yield sse_event({"type": "done", "session_id": session_id, "cached": True})
+                return
+
+            # stream=True로 요청하면 모델이 생성하는 대로 청크를 받을 수 있습니다.
+            chat = start_session_chat(history)
+            response = chat.send_message(user_input, stream=True)
+            for chunk in response:
+                reply_parts.append(chunk.text)
+                blocks, tail = renderer.feed(chunk.text)
+                for block_html in blocks:
+                    yield sse_event({"type": "block", "html": block_html})
+                yield sse_event({"type": "tail", "html": tail})
+
+            for block_html in renderer.finish():
+                yield sse_event({"type": "block", "html": block_html})
+            reply_text = ''.join(reply_parts)
+            store.append_many(session_id, [('user', user_input), ('model', reply_text)])
+            if not history:
+                answer_cache.put(CACHE_NAMESPACE, user_input, {'text': reply_text, 'html': renderer.get_html()})
+            yield sse_event({"type": "done", "session_id": session_id})
+        except Exception as e:
+            print(f"스트리밍 중 오류 발생: {e}")
+            yield sse_event({"type": "error", "error": "메시지 처리 중 서버에서 오류가 발생했습니다."})
+
+    headers = {
+        'Cache-Control': 'no-cache',
+        # 프록시(nginx 등)가 응답을 모아서 보내지 않도록 합니다.
+        'X-Accel-Buffering': 'no',
+    }
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers=headers)
+
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats_endpoint():
+    """의미 기반 캐시의 적중률/조회 지연 시간 (임계값 튜닝용)"""
+    return jsonify(answer_cache.stats())
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats_endpoint():
+    """모델 등급별 호출 수, 대체 처리 수, 지연 시간, 토큰 수, 예상 비용"""
+    if not model:
+        return jsonify({"error": "모델이 제대로 초기화되지 않았습니다."}), 500
+    return jsonify(model.metrics())
+
 if __name__ == '__main__':
     # host='0.0.0.0'으로 설정하여 외부에서도 접속 가능하게 합니다.
     app.run(host='0.0.0.0', port=5000, debug=True)
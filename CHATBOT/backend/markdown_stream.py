@@ -0,0 +1,195 @@
+import re
+from typing import List, Tuple
+
+import markdown
+
+# 펜스 코드 블록 시작/끝 (``` 또는 ~~~)
+FENCE_PATTERN = re.compile(r'^\s{0,3}(`{3,}|~{3,})')
+# 리스트 항목 시작 (-, *, +, 1.)
+LIST_ITEM_PATTERN = re.compile(r'^\s{0,3}([-*+]|\d+[.)])\s')
+# 작성 중인 블록이 이 줄 수를 넘으면 안전한 경계에서 중간 확정합니다.
+MAX_TAIL_LINES = 20
+# 줄바꿈 없이 이어지는 긴 문단은 이 글자 수를 넘으면 문장(없으면 공백) 경계에서 중간 확정합니다.
+MAX_TAIL_CHARS = 2000
+# 문단이 아닌 블록의 시작 (들여쓰기, 인용, 제목, 표, 리스트, 코드 블록)
+BLOCK_START_PATTERN = re.compile(r'^(\s|\s{0,3}([>#|]|[-*+]\s|\d+[.)]\s|`{3}|~{3}))')
+# 문장 끝 (마침표/물음표/느낌표 뒤 닫는 따옴표·괄호와 공백)
+SENTENCE_END_PATTERN = re.compile(r'[.!?。…][)"\'”’]*\s+')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def _inline_balanced(text: str) -> bool:
+    """코드 스팬, 강조, 링크가 열린 채로 끝나지 않는지 (나눠도 같은 모양으로 렌더링되는지)"""
+    return (text.count('`') % 2 == 0 and text.count('**') % 2 == 0
+            and text.replace('**', '').count('*') % 2 == 0 and text.count('[') == text.count(']'))
+
+
+def _split_point(head: str, line: str) -> int:
+    """line을 나눌 위치 (head + line[:위치]가 인라인 표시를 닫은 상태인 마지막 문장/공백 경계, 없으면 0)"""
+    for pattern in (SENTENCE_END_PATTERN, WHITESPACE_PATTERN):
+        for match in reversed(list(pattern.finditer(line))):
+            if _inline_balanced(head + line[:match.end()]):
+                return match.end()
+    return 0
+
+
+class IncrementalMarkdownRenderer:
+    """스트리밍 응답을 블록 단위로 점진적으로 HTML로 변환
+
+    빈 줄로 끝난 블록은 한 번만 렌더링하고 다시는 렌더링하지 않습니다.
+    아직 끝나지 않은 마지막 블록(tail)만 청크가 도착할 때마다 다시 렌더링하므로
+    전체 렌더링 비용은 응답 길이에 대해 선형으로 증가합니다.
+
+    긴 리스트, 코드 블록, 문단처럼 끝나지 않고 계속 길어지는 블록은 MAX_TAIL_LINES를 넘으면
+    중간에 확정합니다. (리스트는 다음 항목 시작 전, 코드 블록은 펜스를 닫고 다시 열어서 나눔)
+    줄바꿈 없이 길어지는 문단은 MAX_TAIL_CHARS를 넘으면 문장 경계에서 나눠 별도 문단으로 확정합니다.
+    """
+
+    def __init__(self, extensions: List[str] = None):
+        self.extensions = extensions or []
+        self._buffer = ''          # 아직 줄바꿈이 오지 않은 마지막 줄
+        self._block_lines = []     # 현재 작성 중인 블록의 줄들
+        self._in_fence = False
+        self._pending_blank = False
+        self._block_is_list = False
+        self._list_items = 0       # 현재 리스트에서 이미 확정된 최상위 항목 수 (번호 이어가기용)
+        self._fence_opener = ''    # 열려 있는 코드 블록의 시작 줄
+        self.committed_html = []
+
+    def render(self, text: str) -> str:
+        """Markdown 조각을 HTML로 변환"""
+        return markdown.markdown(text, extensions=self.extensions)
+
+    def feed(self, chunk: str) -> Tuple[List[str], str]:
+        """새 청크를 추가하고 (새로 확정된 블록 HTML 목록, tail HTML)을 반환"""
+        new_blocks = []
+        self._buffer += chunk
+
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            new_blocks.extend(self._consume_line(line))
+
+        if len(self._buffer) + sum(len(line) for line in self._block_lines) > MAX_TAIL_CHARS:
+            new_blocks.extend(self._split_long_paragraph())
+
+        return new_blocks, self.render_tail()
+
+    def finish(self) -> List[str]:
+        """스트림 종료 시 남은 블록을 확정"""
+        if self._buffer:
+            self._block_lines.append(self._buffer)
+            self._buffer = ''
+        return self._commit_block()
+
+    def render_tail(self) -> str:
+        """아직 확정되지 않은 마지막 블록만 렌더링"""
+        tail_lines = self._block_lines + ([self._buffer] if self._buffer else [])
+        if not any(line.strip() for line in tail_lines):
+            return ''
+        return self.render('\n'.join(tail_lines))
+
+    def _consume_line(self, line: str) -> List[str]:
+        """완성된 한 줄을 처리하고, 확정된 블록들의 HTML을 반환"""
+        committed = []
+
+        if self._in_fence:
+            self._block_lines.append(line)
+            if FENCE_PATTERN.match(line):
+                self._in_fence = False
+            elif len(self._block_lines) >= MAX_TAIL_LINES:
+                committed.extend(self._checkpoint_fence())
+            return committed
+
+        if not line.strip():
+            if self._block_lines:
+                self._pending_blank = True
+                self._block_lines.append(line)
+            return committed
+
+        # 빈 줄 다음에 새 블록이 시작되면 이전 블록을 확정합니다.
+        # 들여쓰기된 줄이나 리스트 안의 다음 항목은 같은 블록으로 취급합니다.
+        is_list_item = bool(LIST_ITEM_PATTERN.match(line))
+        if self._pending_blank:
+            continues_block = line.startswith((' ', '\t')) or (self._block_is_list and is_list_item)
+            if not continues_block:
+                committed.extend(self._commit_block())
+            self._pending_blank = False
+
+        # 긴 리스트는 새 최상위 항목이 시작되기 전에 지금까지의 항목을 확정합니다.
+        top_level_item = is_list_item and not line.startswith((' ', '\t'))
+        if self._block_is_list and top_level_item and len(self._block_lines) >= MAX_TAIL_LINES:
+            committed.extend(self._commit_block(continue_list=True))
+
+        if not self._block_lines:
+            self._block_is_list = is_list_item
+
+        self._block_lines.append(line)
+        if FENCE_PATTERN.match(line):
+            self._in_fence = True
+            self._fence_opener = line
+        elif (not self._block_is_list and len(self._block_lines) >= MAX_TAIL_LINES
+              and not self._block_lines[0].lstrip().startswith('|')):
+            # 긴 문단은 줄 경계에서 나눕니다. (표는 머리글이 필요하므로 나누지 않음)
+            committed.extend(self._commit_block())
+
+        return committed
+
+    def _split_long_paragraph(self) -> List[str]:
+        """줄바꿈 없이 길어지는 마지막 문단을 문장(없으면 공백) 경계까지 확정"""
+        if self._in_fence or BLOCK_START_PATTERN.match(self._buffer):
+            return []
+        committed = []
+        if self._pending_blank:
+            # 빈 줄 뒤의 들여쓰지 않은 줄은 새 문단이므로 이전 블록을 먼저 확정합니다.
+            committed.extend(self._commit_block())
+        if self._block_lines and (self._block_is_list or BLOCK_START_PATTERN.match(self._block_lines[0])):
+            return committed
+
+        head = ''.join(line + '\n' for line in self._block_lines)
+        cut = _split_point(head, self._buffer)
+        if cut:
+            self._block_lines.append(self._buffer[:cut].rstrip())
+            self._buffer = self._buffer[cut:]
+        elif not _inline_balanced(head):
+            return committed
+        committed.extend(self._commit_block())
+        return committed
+
+    def _checkpoint_fence(self) -> List[str]:
+        """긴 코드 블록을 펜스를 닫아 확정하고, 같은 시작 줄로 다시 열기"""
+        opener = self._fence_opener
+        indent, marker = re.match(r'^(\s*)(`+|~+)', opener).groups()
+        self._block_lines.append(indent + marker)
+        committed = self._commit_block()
+        self._block_lines = [opener]
+        return committed
+
+    def _commit_block(self, continue_list: bool = False) -> List[str]:
+        """현재 블록을 렌더링하여 확정 목록에 추가
+
+        continue_list이면 리스트의 앞부분만 확정한 것이므로 리스트 상태를 유지하고,
+        번호 리스트는 다음 부분이 이어지는 번호에서 시작하도록 start 속성을 붙입니다.
+        """
+        lines = self._block_lines
+        is_list, start = self._block_is_list, self._list_items + 1
+        self._block_lines = []
+        self._pending_blank = False
+        if continue_list:
+            self._list_items += sum(1 for line in lines
+                                    if LIST_ITEM_PATTERN.match(line) and not line.startswith((' ', '\t')))
+        else:
+            self._block_is_list = False
+            self._list_items = 0
+        if not any(line.strip() for line in lines):
+            return []
+
+        html = self.render('\n'.join(lines))
+        if is_list and start > 1 and html.startswith('<ol>'):
+            html = f'<ol start="{start}">' + html[len('<ol>'):]
+        self.committed_html.append(html)
+        return [html]
+
+    def get_html(self) -> str:
+        """지금까지 확정된 블록과 tail을 합친 전체 HTML"""
+        tail = self.render_tail()
+        return '\n'.join(self.committed_html + ([tail] if tail else []))
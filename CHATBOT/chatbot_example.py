@@ -1,36 +1,61 @@
-import google.generativeai as genai
-import yaml
+import argparse
+import os
+import sys
 
-# config.yaml 파일에서 API 키를 로드합니다.
-with open('config.yaml', 'r') as file:
-    config = yaml.safe_load(file)
+# 저장소 루트의 공용 모듈(common)을 불러오기 위해 경로를 추가합니다.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.batch_runner import BatchRunner, add_batch_arguments, read_jsonl
+from common.llm_client import LLMConfigError, get_client, read_config
 
-api_key = config.get('api_key')
 
-if not api_key:
-    print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-    print("! config.yaml 파일에 API 키가 없습니다.")
-    print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-    exit()
+def load_model():
+    # config.yaml 파일에서 API 키를 로드합니다.
+    config = read_config('config.yaml')
 
-genai.configure(api_key=api_key)
+    try:
+        # 사용할 모델을 설정합니다. (재시도, 타임아웃이 적용된 공용 클라이언트)
+        return get_client(config, default_model='gemini-2.5-flash-lite')
+    except LLMConfigError:
+        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+        print("! config.yaml 파일에 API 키가 없습니다.")
+        print("!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+        exit()
 
 
-# 사용할 모델을 설정합니다.
-model = genai.GenerativeModel('gemini-2.5-flash-lite')
+def run_interactive(model):
+    # 채팅 세션을 시작합니다.
+    chat = model.start_chat(history=[])
 
-# 채팅 세션을 시작합니다.
-chat = model.start_chat(history=[])
+    print("Gemini 챗봇에 오신 것을 환영합니다! 'quit'를 입력하면 종료됩니다.")
 
-print("Gemini 챗봇에 오신 것을 환영합니다! 'quit'를 입력하면 종료됩니다.")
+    while True:
+        user_input = input("You: ")
+        if user_input.lower() == 'quit':
+            break
 
-while True:
-    user_input = input("You: ")
-    if user_input.lower() == 'quit':
-        break
+        # 모델에 메시지를 보냅니다.
+        response = chat.send_message(user_input)
 
-    # 모델에 메시지를 보냅니다.
-    response = chat.send_message(user_input)
+        # 모델의 응답을 출력합니다.
+        print(f"Gemini: {response.text}")
 
-    # 모델의 응답을 출력합니다.
-    print(f"Gemini: {response.text}")
+
+def run_batch(model, args):
+    # 배치 모드에서는 각 프롬프트를 독립된 요청으로 처리합니다.
+    runner = BatchRunner(
+        lambda record: model.generate_content(record['prompt']).text,
+        workers=args.workers,
+        rate_limit=args.rate_limit
+    )
+    runner.run(read_jsonl(args.batch), output_path=args.output)
+
+
+if __name__ == '__main__':
+    parser = add_batch_arguments(argparse.ArgumentParser(description="Gemini 챗봇"))
+    args = parser.parse_args()
+
+    model = load_model()
+    if args.batch:
+        run_batch(model, args)
+    else:
+        run_interactive(model)
@@ -2,7 +2,17 @@ const chatBox = document.getElementById('chat-box') as HTMLDivElement;
 const chatForm = document.getElementById('chat-form') as HTMLFormElement;
 const userInput = document.getElementById('user-input') as HTMLInputElement;
 
-const API_URL = 'http://127.0.0.1:5000/api/chat';
+const STREAM_API_URL = 'http://127.0.0.1:5000/api/chat/stream';
+
+// 서버에 저장된 대화를 이어가기 위한 세션 ID
+const SESSION_KEY = 'chat-session-id';
+
+interface StreamEvent {
+    type: 'block' | 'tail' | 'done' | 'error';
+    html?: string;
+    error?: string;
+    session_id?: string;
+}
 
 chatForm.addEventListener('submit', async (e) => {
     e.preventDefault();
@@ -13,25 +23,19 @@ chatForm.addEventListener('submit', async (e) => {
     userInput.value = '';
 
     try {
-        const response = await fetch(API_URL, {
+        const response = await fetch(STREAM_API_URL, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
-            body: JSON.stringify({ message }),
+            body: JSON.stringify({ message, session_id: localStorage.getItem(SESSION_KEY) }),
         });
 
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
-        
-        if (data.error) {
-            appendMessage(`오류: ${data.error}`, 'bot');
-        } else {
-            appendMessage(data.reply, 'bot');
-        }
+        await readStream(response.body, createStreamingMessage());
 
     } catch (error) {
         console.error('Fetch 오류:', error);
@@ -39,6 +43,50 @@ chatForm.addEventListener('submit', async (e) => {
     }
 });
 
+// 확정된 블록은 한 번만 추가하고, 작성 중인 마지막 블록(tail)만 교체합니다.
+function createStreamingMessage() {
+    const messageElement = document.createElement('div');
+    messageElement.classList.add('message', 'bot-message');
+    const committed = document.createElement('div');
+    const tail = document.createElement('div');
+    messageElement.appendChild(committed);
+    messageElement.appendChild(tail);
+    chatBox.appendChild(messageElement);
+    return { committed, tail };
+}
+
+async function readStream(body: ReadableStream<Uint8Array>, target: { committed: HTMLDivElement, tail: HTMLDivElement }) {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop() || '';
+
+        for (const raw of events) {
+            if (!raw.startsWith('data: ')) continue;
+            const event: StreamEvent = JSON.parse(raw.slice(6));
+
+            if (event.type === 'block') {
+                target.committed.insertAdjacentHTML('beforeend', event.html || '');
+                target.tail.innerHTML = '';
+            } else if (event.type === 'tail') {
+                target.tail.innerHTML = event.html || '';
+            } else if (event.type === 'done' && event.session_id) {
+                localStorage.setItem(SESSION_KEY, event.session_id);
+            } else if (event.type === 'error') {
+                target.tail.textContent = `오류: ${event.error}`;
+            }
+            chatBox.scrollTop = chatBox.scrollHeight;
+        }
+    }
+}
+
 function appendMessage(text: string, sender: 'user' | 'bot') {
     const messageElement = document.createElement('div');
     messageElement.classList.add('message', `${sender}-message`);
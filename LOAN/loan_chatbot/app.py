@@ -1,37 +1,52 @@
 from flask import Flask, render_template, request, jsonify
+import hmac
 import json
 import os
-import yaml
-import google.generativeai as genai
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import re
+import sys
+
+# 저장소 루트의 공용 모듈(common)을 불러오기 위해 경로를 추가합니다.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from common.compression import init_compression
+from common.fast_json import init_fast_json, project_response
+from common.job_queue import IdempotencyConflict, JobQueue, WorkerPool
+from common.llm_client import LLMConfigError, read_config
+from common.model_router import RouteFeatures, create_router
+from common.profiling import init_profiling
+from common.static_serving import StaticFileServer, init_static_serving
+from eligibility import EligibilityRules, loan_type_of
+from rate_quotes import RateQuoter
+from response_views import RESPONSE_VIEWS
 
 app = Flask(__name__)
+# 정적 파일은 콘텐츠 해시 URL + ETag로 제공합니다.
+static_server = init_static_serving(app, StaticFileServer())
 
 # 설정 파일 로드
 def load_config():
     config_path = os.path.join(os.path.dirname(__file__), 'config.yaml')
     try:
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return yaml.safe_load(f)
+        return read_config(config_path)
     except Exception as e:
         print(f"설정 파일 로드 오류: {e}")
         return {}
 
 config = load_config()
+# 관리자 전용 프로파일링 (실행 중에 켜고 끌 수 있음)
+profiler = init_profiling(app, config.get('profiling', {}))
+# 분석 결과(마크다운, 추천 상품 목록) 같은 큰 JSON 응답 압축
+compressor = init_compression(app, config.get('compression', {}))
+# orjson 직렬화 (없으면 표준 json), view=summary 필드는 response_views.py
+init_fast_json(app)
 
-# Gemini AI 설정
+# Gemini AI 설정 (심사마다 복잡도와 지연 시간에 따라 모델 등급을 고르는 라우터)
 try:
-    api_key = config.get('gemini', {}).get('api_key', '')
-    model_name = config.get('gemini', {}).get('model', 'gemini-pro')
-    
-    if api_key and api_key != "your-api-key-here":
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel(model_name)
-        print(f"Gemini AI 모델 '{model_name}' 설정 완료")
-    else:
-        model = None
-        print("데모 모드로 실행 중 (API 키 없음)")
+    model = create_router(config, default_model='gemini-pro')
+    print(f"Gemini AI 모델 설정 완료: {', '.join(tier.client.model_name for tier in model.tiers)}")
+except LLMConfigError:
+    model = None
+    print("데모 모드로 실행 중 (API 키 없음)")
 except Exception as e:
     print(f"Gemini AI 설정 오류: {e}")
     model = None
@@ -40,6 +55,14 @@ class LoanRAGSystem:
     def __init__(self):
         self.data_path = os.path.join(os.path.dirname(__file__), 'data')
         self.knowledge_base = self.load_knowledge_base()
+        # 규정은 불러올 때 한 번만 실행 가능한 규칙으로 컴파일합니다.
+        self.eligibility_rules = EligibilityRules.from_regulations(
+            self.knowledge_base.get('loan_regulations', {}).get('regulations', [])
+        )
+        print(f"📏 자격 심사 규칙 {len(self.eligibility_rules.rules)}개 컴파일 완료")
+        # 신용점수 구간 × 상품 × 기간별 금리표도 미리 계산합니다.
+        self.rate_quoter = RateQuoter.from_knowledge_base(self.knowledge_base)
+        print(f"💹 금리 견적표 {len(self.rate_quoter.table)}개 항목 계산 완료")
     
     def load_knowledge_base(self) -> Dict[str, Any]:
         """모든 JSON 파일을 로드하여 지식베이스 구축"""
@@ -146,17 +169,16 @@ class LoanRAGSystem:
         return keywords
     
     def search_regulations(self, keywords: List[str], user_info: Dict) -> List[Dict]:
-        """규정 검색"""
+        """규정 검색 (신청자에게 실제로 적용되는 규정을 여유가 적은 순으로)"""
         regulations = self.knowledge_base.get('loan_regulations', {}).get('regulations', [])
-        relevant = []
+        by_id = {reg.get('id'): reg for reg in regulations}
+        result = self.eligibility_rules.evaluate(user_info)
         
-        for reg in regulations:
-            # DTI, LTV, DSR 관련 규정 우선 선택
-            if any(keyword in reg.get('content', '') for keyword in ['DTI', 'LTV', 'DSR']):
-                relevant.append(reg)
-            # 연령, 소득 관련 규정
-            elif any(keyword in reg.get('content', '') for keyword in ['연령', '소득', '신용점수']):
-                relevant.append(reg)
+        relevant = []
+        for check in result.checks:
+            reg = by_id.get(check['id'])
+            if reg is not None:
+                relevant.append({**reg, 'status': '충족' if check['passed'] else '미충족'})
         
         return relevant[:5]  # 상위 5개만 반환
     
@@ -300,6 +322,7 @@ class LoanRAGSystem:
         - 연소득: {user_info.get('annual_income', 0):,}원
         - 신용점수: {user_info.get('credit_score', 0)}점
         - 희망 대출금액: {user_info.get('desired_amount', 0):,}원
+        - 견적 금리: 연 {user_info.get('interest_rate', 5.0)}%
         - 계산된 DTI: {dti}%
 
         ## 관련 규정 정보
@@ -338,7 +361,14 @@ class LoanRAGSystem:
         try:
             # 실제 API 키가 있는 경우에만 AI 호출
             if model is not None:
-                response = model.generate_content(prompt)
+                # 규칙 기반 점수가 50%에 가까울수록(판단이 애매할수록) 더 좋은 모델을 사용합니다.
+                rule_score = self.extract_approval_percentage("", user_info, dti)
+                features = RouteFeatures(
+                    prompt_chars=len(prompt),
+                    borderline=1 - abs(rule_score - 50) / 50,
+                    user_tier=user_info.get('user_tier')
+                )
+                response = model.generate_content(prompt, features=features)
                 ai_analysis = response.text
             else:
                 # 백업 모드 - 기본 응답 생성
@@ -351,7 +381,8 @@ class LoanRAGSystem:
                 'approval_percentage': approval_percentage,
                 'dti': dti,
                 'ai_explanation': ai_analysis,
-                'recommended_products': relevant_content.get('products', [])[:3]
+                'recommended_products': relevant_content.get('products', [])[:3],
+                'model_tier': model.last_route if model is not None else None
             }
         
         except Exception as e:
@@ -517,6 +548,45 @@ class LoanRAGSystem:
             'recommended_products': relevant_content.get('products', [])[:3]
         }
 
+    def generate_rejection_response(self, user_info: Dict, dti: float, eligibility: Dict) -> Dict:
+        """규정상 승인이 불가능한 경우 모델 호출 없이 거절 사유 생성"""
+        lines = []
+        for failure in eligibility['failures']:
+            op = '이하' if failure['op'] == '<=' else '이상'
+            value = failure.get('value_text') or f"{failure['value']:,g}"
+            lines.append(f"- ❌ **{failure['title']}**: {failure['metric']} {value} "
+                         f"(기준 {failure['threshold']:,g} {op})")
+        for warning in eligibility['warnings']:
+            lines.append(f"- ⚠️ {warning['title']}")
+        failures = "\n".join(lines)
+        binding = eligibility['binding_constraint']
+        
+        explanation = f"""
+## 대출 심사 결과 분석
+**승인 가능성: 0%**
+
+현재 조건으로는 대출 규정을 충족하지 못해 승인이 어렵습니다.
+
+## 충족하지 못한 규정
+{failures}
+
+## DTI(총부채원리금상환비율) 분석
+**계산된 DTI: {dti}%**
+
+## 다음 단계
+1. 가장 큰 걸림돌인 **{binding['title']}** 조건부터 확인해 보세요.
+2. 대출 금액이나 기간을 조정하면 조건을 충족할 수 있는지 다시 심사해 보세요.
+3. 자세한 상담은 영업점에 문의하시기 바랍니다.
+"""
+        
+        return {
+            'approval_percentage': 0,
+            'dti': dti,
+            'ai_explanation': explanation,
+            'recommended_products': [],
+            'eligibility': eligibility
+        }
+
 # RAG 시스템 초기화
 rag_system = LoanRAGSystem()
 
@@ -525,6 +595,94 @@ def index():
     """메인 페이지"""
     return render_template('index.html')
 
+OPTIONAL_USER_FIELDS = {'region': str, 'loan_term_months': int, 'employment_months': int, 'collateral_value': int}
+
+# 사용자 등급은 비싼 모델 등급으로 이어지므로 요청 본문이 아니라 서버 설정의 클라이언트 토큰으로만 정합니다.
+# (router.client_tiers: {토큰: 등급}, X-Client-Token 헤더로 전달)
+CLIENT_TIERS = config.get('router', {}).get('client_tiers') or {}
+
+def request_user_tier() -> Optional[str]:
+    """현재 요청의 X-Client-Token에 해당하는 사용자 등급 (없으면 None)"""
+    token = request.headers.get('X-Client-Token', '')
+    if not token:
+        return None
+    for known_token, tier in CLIENT_TIERS.items():
+        if hmac.compare_digest(token, str(known_token)):
+            return tier
+    return None
+
+def parse_user_info(data: Dict) -> Dict:
+    """요청 본문에서 사용자 정보 추출"""
+    return {
+        'age': int(data.get('age', 0)),
+        'annual_income': int(data.get('annual_income', 0)),
+        'credit_score': int(data.get('credit_score', 0)),
+        'desired_amount': int(data.get('desired_amount', 0)),
+        'monthly_debt': int(data.get('monthly_debt', 0)),
+        'loan_purpose': data.get('loan_purpose', '생활자금'),
+        # 선택 항목 (있으면 지역별 규정, LTV, 재직기간, 대출기간 규정까지 심사)
+        **{key: convert(data[key]) for key, convert in OPTIONAL_USER_FIELDS.items()
+           if data.get(key) not in (None, '')}
+    }
+
+def run_loan_check(user_info: Dict) -> Dict:
+    """금리 견적, DTI 계산, 규정 심사, 관련 콘텐츠 검색, AI 분석까지 대출 심사 전체 수행"""
+    # 신청자가 받을 수 있는 최저 견적 금리로 DTI/DSR 계산
+    interest_rate, _ = rag_system.rate_quoter.applicant_rate(user_info, loan_type_of(user_info))
+    user_info = {**user_info, 'interest_rate': interest_rate}
+    
+    # DTI 계산
+    dti = rag_system.calculate_dti(
+        annual_income=user_info['annual_income'],
+        monthly_debt=user_info['monthly_debt'],
+        loan_amount=user_info['desired_amount'],
+        loan_term_months=int(user_info.get('loan_term_months', 60)),
+        interest_rate=interest_rate
+    )
+    
+    # 규정상 승인이 불가능하면 모델을 호출하지 않고 바로 거절합니다.
+    eligibility = rag_system.eligibility_rules.evaluate(user_info).to_dict()
+    if not eligibility['eligible']:
+        result = rag_system.generate_rejection_response(user_info, dti, eligibility)
+        result['interest_rate'] = interest_rate
+        return result
+    
+    # 관련 콘텐츠 검색
+    user_input = f"나이 {user_info['age']}세, 연소득 {user_info['annual_income']:,}원, 신용점수 {user_info['credit_score']}점으로 {user_info['desired_amount']:,}원 대출을 받고 싶습니다."
+    relevant_content = rag_system.search_relevant_content(user_input, user_info)
+    
+    # AI 분석 생성
+    result = rag_system.generate_ai_response(user_info, relevant_content, dti)
+    result['eligibility'] = eligibility
+    result['interest_rate'] = interest_rate
+    # 추천 상품마다 개인별 견적 금리 추가
+    result['recommended_products'] = [
+        {**product, 'quote': rag_system.rate_quoter.quote(product['id'], user_info)}
+        for product in result.get('recommended_products', [])
+    ]
+    return result
+
+# 비동기 심사 작업 큐 (SQLite 파일 하나로 동작하므로 별도 브로커가 필요 없습니다)
+jobs_config = config.get('jobs', {})
+job_queue = JobQueue(
+    os.path.join(os.path.dirname(__file__), jobs_config.get('db_path', 'loan_jobs.db')),
+    lease_seconds=jobs_config.get('lease_seconds', 300)
+)
+LOAN_CHECK_JOB = 'loan-check'
+# 롱 폴링 한 번에 기다리는 최대 시간 (초)
+MAX_WAIT_SECONDS = jobs_config.get('max_wait_seconds', 30)
+worker_pool = WorkerPool(
+    job_queue,
+    {LOAN_CHECK_JOB: run_loan_check},
+    workers=jobs_config.get('workers', 4)
+)
+
+@app.before_request
+def start_job_workers():
+    # 워커는 실제로 요청을 처리하는 프로세스에서만 시작합니다.
+    # (import 시점에 시작하면 debug 리로더의 감시 프로세스도 워커를 띄워 작업 임대를 두고 경쟁함)
+    worker_pool.start()
+
 @app.route('/api/loan-check', methods=['POST'])
 def loan_check():
     """대출 심사 API"""
@@ -532,32 +690,13 @@ def loan_check():
         data = request.get_json()
         
         # 사용자 정보 추출
-        user_info = {
-            'age': int(data.get('age', 0)),
-            'annual_income': int(data.get('annual_income', 0)),
-            'credit_score': int(data.get('credit_score', 0)),
-            'desired_amount': int(data.get('desired_amount', 0)),
-            'monthly_debt': int(data.get('monthly_debt', 0)),
-            'loan_purpose': data.get('loan_purpose', '생활자금')
-        }
-        
-        # DTI 계산
-        dti = rag_system.calculate_dti(
-            annual_income=user_info['annual_income'],
-            monthly_debt=user_info['monthly_debt'],
-            loan_amount=user_info['desired_amount']
-        )
-        
-        # 관련 콘텐츠 검색
-        user_input = f"나이 {user_info['age']}세, 연소득 {user_info['annual_income']:,}원, 신용점수 {user_info['credit_score']}점으로 {user_info['desired_amount']:,}원 대출을 받고 싶습니다."
-        relevant_content = rag_system.search_relevant_content(user_input, user_info)
-        
-        # AI 분석 생성
-        result = rag_system.generate_ai_response(user_info, relevant_content, dti)
+        user_info = parse_user_info(data)
+        user_info['user_tier'] = request_user_tier()
+        result = run_loan_check(user_info)
         
         return jsonify({
             'success': True,
-            'data': result
+            'data': project_response(result, RESPONSE_VIEWS)
         })
         
     except Exception as e:
@@ -566,5 +705,70 @@ def loan_check():
             'error': str(e)
         }), 500
 
+def job_response(job: Dict) -> Dict:
+    """작업 상태 응답 (끝난 작업이면 결과 또는 오류 포함)"""
+    response = {
+        'success': job['status'] != 'failed',
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/api/loan-check/jobs/{job['id']}"
+    }
+    if 'result' in job:
+        response['data'] = project_response(job['result'], RESPONSE_VIEWS)
+    if 'error' in job:
+        response['error'] = job['error']
+    return response
+
+@app.route('/api/loan-check/jobs', methods=['POST'])
+def submit_loan_check_job():
+    """대출 심사 작업 등록 (작업 ID를 바로 반환)
+
+    Idempotency-Key 헤더(또는 본문의 idempotency_key)가 같은 요청은 다시 실행하지 않고
+    기존 작업을 돌려주므로, 타임아웃 뒤 재시도해도 심사가 중복 실행되지 않습니다.
+    """
+    try:
+        data = request.get_json()
+        user_info = parse_user_info(data)
+        user_info['user_tier'] = request_user_tier()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'입력값 오류: {str(e)}'
+        }), 400
+
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+    try:
+        job, created = job_queue.submit(LOAN_CHECK_JOB, user_info, idempotency_key=idempotency_key)
+    except IdempotencyConflict as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+
+    return jsonify(job_response(job)), 202 if created else 200
+
+@app.route('/api/loan-check/jobs/<job_id>', methods=['GET'])
+def get_loan_check_job(job_id):
+    """작업 상태 조회 (wait=초를 주면 끝날 때까지 최대 그 시간만큼 기다리는 롱 폴링)"""
+    try:
+        wait = min(float(request.args.get('wait', 0)), MAX_WAIT_SECONDS)
+    except ValueError:
+        wait = 0
+
+    job = job_queue.wait(job_id, wait) if wait > 0 else job_queue.get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': '작업을 찾을 수 없습니다.'
+        }), 404
+    return jsonify(job_response(job))
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    """모델 등급별 호출 수, 대체 처리 수, 지연 시간, 토큰 수, 예상 비용"""
+    if model is None:
+        return jsonify({'success': False, 'error': '데모 모드에서는 모델을 사용하지 않습니다.'}), 404
+    return jsonify({'success': True, 'data': model.metrics()})
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""loan_regulations.json을 실행 가능한 규칙으로 컴파일한 자격 심사 엔진
+
+규정의 type/threshold/category를 불러올 때 한 번만 해석해 (지표, 비교 방향, 기준값, 적용 조건)
+규칙으로 만들고, 유형별/지역 구분별로 묶어 둡니다. 신청자 한 명은 순수 파이썬으로,
+여러 명은 NumPy 배열로 한 번에 평가합니다.
+
+규칙 등급:
+- reject: 충족하지 못하면 승인 불가 (LLM 호출 전에 바로 거절)
+- warning: 조건부 (예: 보증인 필요)
+- benefit: 충족하면 우대 (예: 우대금리)
+"""
+
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+REJECT = 'reject'
+WARNING = 'warning'
+BENEFIT = 'benefit'
+
+# 지역 구분 (category)이 붙은 규정은 신청자의 region이 같을 때만 적용됩니다.
+REGION_CATEGORIES = ('투기지역', '조정대상지역')
+HIGH_INCOME_THRESHOLD = 100000000
+SECURED_PURPOSES = ('주택구입', '전세자금')
+
+DEFAULT_TERM_MONTHS = 60
+DEFAULT_INTEREST_RATE = 5.0
+
+METRIC_LABELS = {
+    'dti': 'DTI', 'dsr': 'DSR', 'ltv': 'LTV', 'age': '연령', 'age_at_maturity': '만기 시 연령',
+    'annual_income': '연소득', 'credit_score': '신용점수', 'employment_months': '재직기간',
+    'desired_amount': '대출금액', 'loan_term_months': '대출기간',
+}
+
+
+class Rule(NamedTuple):
+    """컴파일된 규칙 하나: metric op threshold (applies 조건을 만족할 때만)"""
+    id: str
+    type: str
+    category: str
+    title: str
+    metric: str
+    op: str                                  # '<=' 또는 '>='
+    threshold: float
+    severity: str
+    applies: Optional[Tuple[str, Any]]       # (신청자 필드, 값) 또는 None(항상 적용)
+
+
+def _compile_regulation(reg: Dict[str, Any]) -> Optional[Rule]:
+    """규정 하나를 규칙으로 변환 (평가할 수 없는 안내성 규정은 None)"""
+    reg_type, category, title = reg.get('type'), reg.get('category', ''), reg.get('title', '')
+    threshold = float(reg.get('threshold') or 0)
+
+    def rule(metric, op, severity=REJECT, applies=None):
+        return Rule(reg['id'], reg_type, category, title, metric, op, threshold, severity, applies)
+
+    region = ('region', category) if category in REGION_CATEGORIES else None
+    if reg_type == 'DTI':
+        return rule('dti', '<=', applies=region)
+    if reg_type == 'DSR':
+        if category == '고소득자':
+            # 고소득자는 기본 DSR 대신 완화된 기준을 적용합니다. (evaluate에서 기본 규정을 대체)
+            return rule('dsr', '<=', applies=('high_income', True))
+        return rule('dsr', '<=', applies=region)
+    if reg_type == 'LTV':
+        return rule('ltv', '<=', applies=region)
+    if reg_type == '연령제한':
+        return rule('age_at_maturity', '<=') if '최대' in title else rule('age', '>=')
+    if reg_type == '소득증명':
+        return rule('annual_income', '>=')
+    if reg_type == '신용점수':
+        return rule('credit_score', '>=', BENEFIT if '우대' in title else REJECT)
+    if reg_type == '재직기간':
+        return rule('employment_months', '>=', BENEFIT if '우대' in title else REJECT)
+    if reg_type == '대출한도':
+        # 최소/최대 금액 모두 신용대출 규정입니다.
+        return rule('desired_amount', '<=' if '최대' in title else '>=', applies=('loan_type', '신용대출'))
+    if reg_type == '대출기간':
+        if '최소' in title:
+            return rule('loan_term_months', '>=')
+        return rule('loan_term_months', '<=', applies=('loan_type', '담보대출' if '담보' in title else '신용대출'))
+    if reg_type == '보증인':
+        # "700점 미만 시 보증인 필요" -> 700점 이상이면 보증인 없이 가능
+        return rule('credit_score', '>=', WARNING)
+    return None
+
+
+def monthly_payment(amount, term_months, interest_rate):
+    """원리금균등상환 월 상환금 (스칼라 또는 NumPy 배열)"""
+    monthly_rate = interest_rate / 100 / 12
+    if np is not None and isinstance(monthly_rate, np.ndarray):
+        growth = (1 + monthly_rate) ** term_months
+        with np.errstate(divide='ignore', invalid='ignore'):
+            payment = np.where(monthly_rate > 0, amount * monthly_rate * growth / (growth - 1),
+                               amount / term_months)
+        return np.where(amount > 0, payment, 0.0)
+    if amount <= 0:
+        return 0.0
+    if monthly_rate <= 0:
+        return amount / term_months
+    growth = (1 + monthly_rate) ** term_months
+    return amount * monthly_rate * growth / (growth - 1)
+
+
+def applicant_metrics(applicant: Dict[str, Any]) -> Dict[str, Any]:
+    """신청자 정보에서 규칙이 사용하는 지표 계산 (정보가 없는 지표는 NaN -> 해당 규칙 미적용)"""
+    income = float(applicant.get('annual_income', 0))
+    term = float(applicant.get('loan_term_months') or DEFAULT_TERM_MONTHS)
+    amount = float(applicant.get('desired_amount', 0))
+
+    dti = applicant.get('dti')
+    if dti is None:
+        rate = float(applicant.get('interest_rate') or DEFAULT_INTEREST_RATE)
+        payment = monthly_payment(amount, term, rate)
+        dti = (float(applicant.get('monthly_debt', 0)) + payment) / (income / 12) * 100 if income > 0 else math.inf
+
+    collateral = float(applicant.get('collateral_value') or 0)
+    return {
+        'dti': float(dti),
+        # 기존 부채 상환액이 모두 monthly_debt에 포함되어 있으므로 DSR도 같은 비율로 봅니다.
+        'dsr': float(dti),
+        'ltv': amount / collateral * 100 if collateral > 0 else math.nan,
+        'age': float(applicant.get('age', 0)),
+        'age_at_maturity': float(applicant.get('age', 0)) + term / 12,
+        'annual_income': income,
+        'credit_score': float(applicant.get('credit_score', 0)),
+        'employment_months': float(applicant['employment_months'])
+                             if applicant.get('employment_months') is not None else math.nan,
+        'desired_amount': amount,
+        'loan_term_months': term,
+    }
+
+
+def loan_type_of(applicant: Dict[str, Any]) -> str:
+    """대출 목적으로 판단한 대출 유형 (주택구입/전세자금은 담보대출)"""
+    return applicant.get('loan_type') \
+        or ('담보대출' if applicant.get('loan_purpose') in SECURED_PURPOSES else '신용대출')
+
+
+def applicant_context(applicant: Dict[str, Any]) -> Dict[str, Any]:
+    """규칙 적용 조건(applies)에 쓰는 신청자 속성"""
+    return {
+        'region': applicant.get('region', '기본규정'),
+        'high_income': float(applicant.get('annual_income', 0)) >= HIGH_INCOME_THRESHOLD,
+        'loan_type': loan_type_of(applicant),
+    }
+
+
+def _margin(rule: Rule, value: float) -> float:
+    """기준 대비 여유 비율 (음수면 위반, 0에 가까울수록 빡빡한 조건)"""
+    scale = abs(rule.threshold) or 1.0
+    return (rule.threshold - value) / scale if rule.op == '<=' else (value - rule.threshold) / scale
+
+
+class EligibilityResult(NamedTuple):
+    eligible: bool
+    binding: Optional[Dict[str, Any]]        # 결과를 결정한 규칙 (거절이면 가장 크게 위반한 규칙)
+    checks: List[Dict[str, Any]]             # 적용된 모든 규칙의 평가 결과 (여유가 적은 순)
+
+    @property
+    def failures(self) -> List[Dict[str, Any]]:
+        return [check for check in self.checks if check['severity'] == REJECT and not check['passed']]
+
+    @property
+    def warnings(self) -> List[Dict[str, Any]]:
+        return [check for check in self.checks if check['severity'] == WARNING and not check['passed']]
+
+    @property
+    def benefits(self) -> List[Dict[str, Any]]:
+        return [check for check in self.checks if check['severity'] == BENEFIT and check['passed']]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'eligible': self.eligible,
+            'binding_constraint': self.binding,
+            'failures': self.failures,
+            'warnings': self.warnings,
+            'benefits': self.benefits,
+        }
+
+
+class EligibilityRules:
+    """컴파일된 규정 집합"""
+
+    def __init__(self, rules: Sequence[Rule]):
+        self.rules = tuple(rules)
+        # 유형별 -> 지역/구분별 규칙
+        self.by_type: Dict[str, Dict[str, List[Rule]]] = {}
+        for rule in self.rules:
+            self.by_type.setdefault(rule.type, {}).setdefault(rule.category, []).append(rule)
+
+    @classmethod
+    def from_regulations(cls, regulations: List[Dict[str, Any]]) -> 'EligibilityRules':
+        compiled = (_compile_regulation(reg) for reg in regulations)
+        return cls([rule for rule in compiled if rule is not None])
+
+    def _superseded(self, rule: Rule, context: Dict[str, Any]) -> bool:
+        """고소득자처럼 완화 규정이 적용되면 같은 유형의 기본 규정은 쓰지 않음"""
+        return rule.type == 'DSR' and rule.applies is None and context['high_income'] and \
+            any(r.applies == ('high_income', True) for r in self.by_type.get('DSR', {}).get('고소득자', []))
+
+    def applicable_rules(self, context: Dict[str, Any]) -> List[Rule]:
+        return [
+            rule for rule in self.rules
+            if (rule.applies is None or context.get(rule.applies[0]) == rule.applies[1])
+            and not self._superseded(rule, context)
+        ]
+
+    def _check(self, rule: Rule, value: float) -> Dict[str, Any]:
+        passed = value <= rule.threshold if rule.op == '<=' else value >= rule.threshold
+        margin = _margin(rule, value)
+        check = {
+            'id': rule.id,
+            'type': rule.type,
+            'category': rule.category,
+            'title': rule.title,
+            'metric': METRIC_LABELS.get(rule.metric, rule.metric),
+            'value': round(value, 2) if math.isfinite(value) else None,
+            'op': rule.op,
+            'threshold': rule.threshold,
+            'severity': rule.severity,
+            'passed': passed,
+            'margin': round(margin, 4) if math.isfinite(margin) else None,
+        }
+        if not math.isfinite(value):
+            # JSON에는 무한대가 없어(null로 바뀜) 계산할 수 없었다는 것을 따로 표시합니다.
+            check['unbounded'] = True
+            check['value_text'] = '무한대 (연소득 0원)' if rule.metric in ('dti', 'dsr') else '무한대'
+        return check
+
+    def evaluate(self, applicant: Dict[str, Any]) -> EligibilityResult:
+        """신청자 한 명 평가"""
+        metrics = applicant_metrics(applicant)
+        context = applicant_context(applicant)
+
+        scored = []
+        for rule in self.applicable_rules(context):
+            value = metrics[rule.metric]
+            if math.isnan(value):
+                continue
+            scored.append((_margin(rule, value), self._check(rule, value)))
+        # 응답의 margin은 반올림(무한대는 None)되므로 정렬은 원래 값으로 합니다.
+        scored.sort(key=lambda item: item[0])
+        checks = [check for _, check in scored]
+
+        hard = [check for check in checks if check['severity'] == REJECT]
+        eligible = all(check['passed'] for check in hard)
+        # 거절이면 가장 크게 위반한 규칙, 통과면 여유가 가장 적은 규칙이 결과를 결정합니다.
+        binding = hard[0] if hard else None
+        return EligibilityResult(eligible, binding, checks)
+
+    def evaluate_batch(self, applicants: Dict[str, Any]) -> Dict[str, Any]:
+        """여러 신청자를 NumPy 배열로 한 번에 평가
+
+        applicants는 {필드: 배열} 형식입니다. (age, annual_income, credit_score, desired_amount,
+        monthly_debt는 필수, loan_term_months, interest_rate, collateral_value, employment_months,
+        region, loan_type은 선택)
+        반환값: eligible(bool 배열), binding_rule(규칙 ID 배열), binding_margin(float 배열)
+        """
+        if np is None:
+            raise RuntimeError("배치 평가에는 NumPy가 필요합니다. (pip install numpy)")
+
+        n = len(applicants['age'])
+        column = lambda name, default: np.asarray(applicants[name], dtype=float) \
+            if applicants.get(name) is not None else np.full(n, default, dtype=float)
+
+        income = column('annual_income', 0)
+        term = column('loan_term_months', DEFAULT_TERM_MONTHS)
+        amount = column('desired_amount', 0)
+        rate = column('interest_rate', DEFAULT_INTEREST_RATE)
+        collateral = column('collateral_value', 0)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dti = np.where(income > 0,
+                           (column('monthly_debt', 0) + monthly_payment(amount, term, rate)) / (income / 12) * 100,
+                           np.inf)
+            ltv = np.where(collateral > 0, amount / collateral * 100, np.nan)
+        metrics = {
+            'dti': dti, 'dsr': dti, 'ltv': ltv,
+            'age': column('age', 0),
+            'age_at_maturity': column('age', 0) + term / 12,
+            'annual_income': income,
+            'credit_score': column('credit_score', 0),
+            'employment_months': column('employment_months', np.nan),
+            'desired_amount': amount,
+            'loan_term_months': term,
+        }
+
+        regions = np.asarray(applicants['region']) if applicants.get('region') is not None \
+            else np.full(n, '기본규정')
+        if applicants.get('loan_type') is not None:
+            loan_types = np.asarray(applicants['loan_type'])
+        elif applicants.get('loan_purpose') is not None:
+            loan_types = np.where(np.isin(applicants['loan_purpose'], SECURED_PURPOSES), '담보대출', '신용대출')
+        else:
+            loan_types = np.full(n, '신용대출')
+        context = {'region': regions, 'high_income': income >= HIGH_INCOME_THRESHOLD, 'loan_type': loan_types}
+
+        hard_rules = [rule for rule in self.rules if rule.severity == REJECT]
+        has_high_income_dsr = any(rule.applies == ('high_income', True)
+                                  for rule in self.by_type.get('DSR', {}).get('고소득자', []))
+        margins = np.full((len(hard_rules), n), np.inf)
+        applied = np.zeros((len(hard_rules), n), dtype=bool)
+        for i, rule in enumerate(hard_rules):
+            mask = np.ones(n, dtype=bool)
+            if rule.applies is not None:
+                mask &= context[rule.applies[0]] == rule.applies[1]
+            if rule.type == 'DSR' and rule.applies is None and has_high_income_dsr:
+                mask &= ~context['high_income']
+            values = metrics[rule.metric]
+            mask &= ~np.isnan(values)
+
+            scale = abs(rule.threshold) or 1.0
+            with np.errstate(invalid='ignore'):
+                margin = (rule.threshold - values) / scale if rule.op == '<=' else (values - rule.threshold) / scale
+            margins[i] = np.where(mask, margin, np.inf)
+            applied[i] = mask
+
+        if not hard_rules:
+            return {'eligible': np.ones(n, dtype=bool), 'binding_rule': np.full(n, ''),
+                    'binding_margin': np.full(n, np.inf)}
+
+        # 적용되지 않은 규칙은 +inf이므로 argmin이 적용된 규칙 중 여유가 가장 적은(-inf 포함) 규칙을 고릅니다.
+        # 최솟값이 +inf인 경우에만 evaluate처럼 첫 번째 적용 규칙을 결정 규칙으로 봅니다.
+        columns = np.arange(n)
+        binding_index = margins.argmin(axis=0)
+        binding_margin = margins[binding_index, columns]
+        any_applied = applied.any(axis=0)
+        binding_index = np.where(np.isposinf(binding_margin) & any_applied, applied.argmax(axis=0), binding_index)
+        rule_ids = np.array([rule.id for rule in hard_rules])
+        return {
+            'eligible': binding_margin >= 0,
+            'binding_rule': np.where(any_applied, rule_ids[binding_index], ''),
+            'binding_margin': binding_margin,
+        }
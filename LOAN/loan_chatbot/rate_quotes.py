@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""개인별 금리 견적표
+
+interest_rates.json, loan_products.json, credit_scoring.json을 불러올 때 한 번만
+(신용점수 구간 × 상품 × 기간 구간 × 청년 여부 × 우대 여부) 금리표를 계산해 두고,
+요청마다 표를 한 번 조회해 견적을 냅니다.
+
+금리 산정:
+1. 상품 금리 범위(interest_rate_min ~ max) 안에서 신용등급 점수(100점=최저, 30점=최고)에 비례
+2. 고정금리 기간 가산 (FIXED_RATE_001의 3년/5년/10년/전기간)
+3. 신용대출 우대금리 (PRIME_RATE_001 조건 충족 시 우대금리 범위 상한 적용)
+4. 청년우대 할인 (YOUNG_RATE_001, 만 19~34세)
+5. 상품 최저금리 아래로는 내려가지 않음
+"""
+
+import bisect
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_RATE = 5.0
+DEFAULT_TERM_MONTHS = 60
+MAX_CREDIT_SCORE = 1000
+
+
+def _lower_bound(score_range: str) -> int:
+    """'850-899', '100000000+' 형식 구간의 하한"""
+    return int(re.match(r'\d+', score_range).group())
+
+
+def _condition_number(conditions: List[str], pattern: str, default: float) -> float:
+    """조건 문구에서 숫자 추출 (예: '신용점수 800점 이상' -> 800)"""
+    for condition in conditions:
+        match = re.search(pattern, condition)
+        if match:
+            return float(match.group(1))
+    return default
+
+
+def _period_months(period: str) -> float:
+    """'3년' -> 36, '전기간' -> 무한대"""
+    match = re.match(r'(\d+)년', period)
+    return int(match.group(1)) * 12 if match else float('inf')
+
+
+class RateQuoter:
+    """미리 계산한 금리표로 견적을 내는 조회기 (from_knowledge_base로 생성)"""
+
+    def __init__(self, products: List[Dict[str, Any]], interest_rates: List[Dict[str, Any]],
+                 scoring_criteria: List[Dict[str, Any]]):
+        rates = {rate.get('id'): rate for rate in interest_rates}
+        self.products = {product['id']: product for product in products}
+
+        # 신용등급 구간: (하한, 등급, 등급 점수)
+        credit_rules = next((criteria.get('scoring_rules', []) for criteria in scoring_criteria
+                             if criteria.get('category') == '신용점수'), [])
+        bands = sorted(((_lower_bound(rule['range']), rule['grade'], rule['score']) for rule in credit_rules),
+                       reverse=True) or [(0, '-', 50)]
+        best_score, worst_score = bands[0][2], bands[-1][2]
+
+        # 우대/청년 조건
+        prime = rates.get('PRIME_RATE_001', {})
+        prime_conditions = prime.get('conditions', [])
+        self.prime_min_credit = _condition_number(prime_conditions, r'신용점수\s*(\d+)점', 800)
+        self.prime_min_income = _condition_number(prime_conditions, r'연소득\s*(\d+)천만원', 5) * 10000000
+        self.prime_max_rate = prime.get('rate_range', {}).get('max')
+
+        young = rates.get('YOUNG_RATE_001', {})
+        young_conditions = young.get('conditions', [])
+        self.young_min_age = _condition_number(young_conditions, r'만\s*(\d+)세 이상', 19)
+        self.young_max_age = young.get('age_limit', 34)
+        self.young_min_credit = _condition_number(young_conditions, r'신용점수\s*(\d+)점', 600)
+        self.young_min_employment = _condition_number(young_conditions, r'재직기간\s*(\d+)개월', 6)
+        self.young_max_amount = young.get('max_amount', float('inf'))
+        self.young_discount = young.get('discount_rate', 0.0)
+
+        # 직군 전용 상품 (신청자 직업을 모르므로 최저 견적 후보에서 제외)
+        target_jobs = rates.get('EMPLOYEE_RATE_001', {}).get('target_jobs', [])
+        self.job_restricted = {
+            product['id'] for product in products
+            if any(job in product.get('name', '') for job in target_jobs)
+        }
+        # 소득 구간 경계 (상품 최소 소득)
+        self.income_floors = sorted({0} | {product.get('min_income', 0) for product in products})
+
+        # 기간 구간: (상한 개월, 가산금리, 이름)
+        periods = rates.get('FIXED_RATE_001', {}).get('fixed_periods', [])
+        self.term_buckets = sorted((_period_months(p['period']), p.get('rate_add', 0.0), p['period'])
+                                   for p in periods) or [(float('inf'), 0.0, '전기간')]
+
+        # 점수 구간 경계: 신용등급 하한 + 상품 최소 신용점수 + 우대/청년 기준점수
+        # 같은 구간 안에서는 신용점수에 따라 달라지는 것이 없으므로 표를 구간 단위로 만들 수 있습니다.
+        edges = {band[0] for band in bands} | {self.prime_min_credit, self.young_min_credit} | \
+                {product.get('min_credit_score', 0) for product in products}
+        self.segment_floors = sorted(int(edge) for edge in edges | {0})
+        # 점수 -> 구간 번호 (0~1000점 배열 조회로 O(1))
+        self._segment_of_score = []
+        segment = 0
+        for score in range(MAX_CREDIT_SCORE + 1):
+            while segment + 1 < len(self.segment_floors) and score >= self.segment_floors[segment + 1]:
+                segment += 1
+            self._segment_of_score.append(segment)
+
+        max_term = max([product.get('max_term', 0) for product in products] + [DEFAULT_TERM_MONTHS])
+        self._bucket_of_term = [
+            next(i for i, bucket in enumerate(self.term_buckets) if months <= bucket[0])
+            for months in range(max_term + 1)
+        ]
+
+        # 금리표: (점수 구간, 상품 ID, 기간 구간, 청년, 우대) -> (금리, 적용 내역)
+        self.table: Dict[Tuple, Tuple[float, Tuple[str, ...]]] = {}
+        # 대출 유형별 최저 견적: (점수 구간, 소득 구간, 유형, 기간 구간, 청년, 우대) -> (금리, 상품 ID)
+        self.best: Dict[Tuple, Tuple[float, str]] = {}
+        for segment, floor in enumerate(self.segment_floors):
+            grade, grade_score = next(((g, s) for low, g, s in bands if floor >= low), bands[-1][1:])
+            position = (best_score - grade_score) / ((best_score - worst_score) or 1)
+            for product in products:
+                low, high = product.get('interest_rate_min', DEFAULT_RATE), product.get('interest_rate_max', DEFAULT_RATE)
+                base = low + (high - low) * position
+                for bucket, (_, term_add, period) in enumerate(self.term_buckets):
+                    for young_flag in (False, True):
+                        for prime_flag in (False, True):
+                            rate, notes = base + term_add, [f"신용 {grade}", f"고정 {period} +{term_add}%p"]
+                            if prime_flag and product.get('type') == '신용대출' and self.prime_max_rate is not None \
+                                    and rate > self.prime_max_rate:
+                                rate = self.prime_max_rate
+                                notes.append(f"신용대출 우대금리 상한 {self.prime_max_rate}%")
+                            if young_flag and self.young_discount:
+                                rate -= self.young_discount
+                                notes.append(f"청년우대 -{self.young_discount}%p")
+                            rate = round(max(rate, low), 2)
+                            key = (segment, product['id'], bucket, young_flag, prime_flag)
+                            self.table[key] = (rate, tuple(notes))
+
+                            # 상품 최소 신용점수/소득을 충족하는 상품 중 최저금리
+                            if floor < product.get('min_credit_score', 0) or product['id'] in self.job_restricted:
+                                continue
+                            for income_segment, income_floor in enumerate(self.income_floors):
+                                if income_floor < product.get('min_income', 0):
+                                    continue
+                                best_key = (segment, income_segment, product.get('type'), bucket,
+                                            young_flag, prime_flag)
+                                if best_key not in self.best or rate < self.best[best_key][0]:
+                                    self.best[best_key] = (rate, product['id'])
+
+    @classmethod
+    def from_knowledge_base(cls, knowledge_base: Dict[str, Any]) -> 'RateQuoter':
+        return cls(
+            knowledge_base.get('loan_products', {}).get('products', []),
+            knowledge_base.get('interest_rates', {}).get('interest_rates', []),
+            knowledge_base.get('credit_scoring', {}).get('scoring_criteria', []),
+        )
+
+    # --- 조회 ---
+
+    def _segment(self, credit_score: int) -> int:
+        return self._segment_of_score[min(max(int(credit_score), 0), MAX_CREDIT_SCORE)]
+
+    def _bucket(self, term_months: int) -> int:
+        return self._bucket_of_term[min(max(int(term_months), 0), len(self._bucket_of_term) - 1)]
+
+    def is_young(self, user_info: Dict[str, Any]) -> bool:
+        employment = user_info.get('employment_months')
+        return (
+            self.young_min_age <= user_info.get('age', 0) <= self.young_max_age
+            and user_info.get('credit_score', 0) >= self.young_min_credit
+            and user_info.get('desired_amount', 0) <= self.young_max_amount
+            and (employment is None or employment >= self.young_min_employment)
+        )
+
+    def is_prime(self, user_info: Dict[str, Any]) -> bool:
+        return user_info.get('credit_score', 0) >= self.prime_min_credit and \
+            user_info.get('annual_income', 0) >= self.prime_min_income
+
+    def quote(self, product_id: str, user_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """상품 하나의 개인별 견적 (상품 최대 기간을 넘으면 최대 기간 기준)"""
+        product = self.products.get(product_id)
+        if product is None:
+            return None
+        term = min(int(user_info.get('loan_term_months') or DEFAULT_TERM_MONTHS),
+                   product.get('max_term', DEFAULT_TERM_MONTHS))
+        rate, notes = self.table[(self._segment(user_info.get('credit_score', 0)), product_id, self._bucket(term),
+                                  self.is_young(user_info), self.is_prime(user_info))]
+        return {'product_id': product_id, 'apr': rate, 'term_months': term, 'adjustments': list(notes)}
+
+    def applicant_rate(self, user_info: Dict[str, Any], loan_type: str) -> Tuple[float, Optional[str]]:
+        """신청자가 받을 수 있는 해당 유형 상품의 최저 견적 금리 (금리, 상품 ID)"""
+        term = int(user_info.get('loan_term_months') or DEFAULT_TERM_MONTHS)
+        income_segment = bisect.bisect_right(self.income_floors, user_info.get('annual_income', 0)) - 1
+        key = (self._segment(user_info.get('credit_score', 0)), income_segment, loan_type, self._bucket(term),
+               self.is_young(user_info), self.is_prime(user_info))
+        return self.best.get(key, (DEFAULT_RATE, None))
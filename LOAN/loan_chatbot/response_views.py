@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/api/loan-check 응답의 요약 보기 (app.py와 common/bench_json.py가 함께 사용)"""
+
+from common.fast_json import compile_views
+
+# view=summary: 화면에 쓰는 필드만 담은 심사 결과 (fields=로 직접 고를 수도 있음)
+RESPONSE_VIEWS = compile_views({
+    'summary': [
+        'approval_percentage', 'dti', 'interest_rate', 'ai_explanation', 'model_tier',
+        'eligibility.eligible', 'eligibility.binding_constraint.id', 'eligibility.binding_constraint.title',
+        *(f'recommended_products.{field}' for field in (
+            'id', 'name', 'description', 'interest_rate_min', 'interest_rate_max', 'min_amount', 'max_amount',
+            'features', 'match_score', 'match_reason', 'all_reasons', 'quote.apr', 'quote.term_months',
+        )),
+    ],
+})
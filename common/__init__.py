@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""세 애플리케이션(CHATBOT, LOAN, tarot)이 함께 사용하는 공용 모듈"""
+
+from .batch_runner import BatchRunner, RateLimiter, read_jsonl
+from .conversation_store import ConversationStore, to_gemini_history
+from .llm_client import LLMClient, get_client, read_config
+from .semantic_cache import SemanticCache, create_semantic_cache
+
+__all__ = [
+    'BatchRunner',
+    'RateLimiter',
+    'read_jsonl',
+    'ConversationStore',
+    'to_gemini_history',
+    'LLMClient',
+    'get_client',
+    'read_config',
+    'SemanticCache',
+    'create_semantic_cache',
+]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""여러 워커로 프롬프트 목록을 동시에 처리하는 배치 실행기
+
+출력 JSONL 파일이 체크포인트입니다. 다시 실행하면 응답이 기록된 id는 건너뛰고, 오류만 기록된 id는
+다시 시도한 결과를 같은 파일 끝에 이어 씁니다. 실행이 끝나면 파일을 id마다 마지막 기록 하나만 남기고
+입력 순서대로 다시 씁니다. (중단된 실행은 이어 쓴 상태로 남고, 다음 실행이 끝날 때 정리됩니다)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+
+class RateLimiter:
+    """초당 요청 수를 제한하는 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰을 하나 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """JSONL 파일(또는 '-'이면 stdin)에서 요청을 읽기
+
+    각 줄은 {"id": ..., "prompt": ...} 형식의 JSON이며, JSON이 아닌 줄은 프롬프트 문자열로 취급합니다.
+    id가 없으면 줄 번호를 id로 사용합니다.
+    """
+    file = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        for line_no, line in enumerate(file):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = line
+            if not isinstance(record, dict):
+                record = {'prompt': str(record)}
+            record.setdefault('id', line_no)
+            yield record
+    finally:
+        if file is not sys.stdin:
+            file.close()
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """이전 실행의 출력 파일(체크포인트)에서 완료된 id 목록을 읽기
+
+    응답이 기록된 줄만 완료로 봅니다. 오류만 기록된 id는 다음 실행에서 다시 시도합니다.
+    """
+    completed = set()
+    if output_path == '-' or not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # 중단되면서 잘린 마지막 줄은 무시합니다.
+                continue
+            if isinstance(result, dict) and 'id' in result and 'response' in result:
+                completed.add(str(result['id']))
+    return completed
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, 'rb') as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b'\n'
+
+
+def compact_output(output_path: str, order: List[str]):
+    """출력 파일을 id마다 마지막 기록만 남기고 order(입력 순서) 순으로 다시 쓰기
+
+    order에 없는 id(이전 실행의 다른 입력)는 파일에 처음 나온 순서대로 뒤에 붙이고,
+    잘린 줄은 버립니다. 임시 파일에 쓴 뒤 교체하므로 도중에 중단돼도 기존 파일은 그대로입니다.
+    """
+    # 큰 파일도 메모리에 올리지 않도록 id별 마지막 줄의 위치만 기억합니다.
+    offsets = {}
+    with open(output_path, 'rb') as file:
+        while True:
+            offset = file.tell()
+            line = file.readline()
+            if not line:
+                break
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(result, dict) and 'id' in result:
+                key = str(result['id'])
+                offsets.pop(key, None)
+                offsets[key] = offset
+
+        ordered = [key for key in dict.fromkeys(order) if key in offsets]
+        seen = set(ordered)
+        ordered.extend(key for key in offsets if key not in seen)
+
+        directory = os.path.dirname(os.path.abspath(output_path))
+        fd, temp_path = tempfile.mkstemp(prefix='.batch-', suffix='.jsonl', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as temp:
+                for key in ordered:
+                    file.seek(offsets[key])
+                    line = file.readline()
+                    temp.write(line if line.endswith(b'\n') else line + b'\n')
+            os.replace(temp_path, output_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+class BatchRunner:
+    """프롬프트 목록을 여러 워커로 동시에 처리하는 배치 실행기
+
+    - workers개의 스레드가 handler(record)를 동시에 호출합니다.
+    - rate_limit(초당 요청 수)을 지정하면 모든 워커가 하나의 제한을 공유합니다.
+    - 결과는 완료 순서와 상관없이 입력 순서대로 출력 파일에 기록됩니다.
+    - 출력 파일이 곧 체크포인트입니다. 다시 실행하면 성공한 id는 건너뛰고 실패한 id는 다시 시도하며,
+      끝나면 id마다 마지막 기록만 입력 순서대로 남깁니다. (compact_output)
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Any], workers: int = 4,
+                 rate_limit: Optional[float] = None):
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.rate_limiter = RateLimiter(rate_limit, burst=self.workers) if rate_limit else None
+
+    def _call(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """요청 하나 처리 (예외는 결과에 기록)"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        start = time.perf_counter()
+        try:
+            result = {'id': record['id'], 'prompt': record.get('prompt'), 'response': self.handler(record)}
+        except Exception as e:
+            result = {'id': record['id'], 'prompt': record.get('prompt'), 'error': str(e)}
+        result['latency_ms'] = round((time.perf_counter() - start) * 1000, 1)
+        return result
+
+    def run(self, records: Iterable[Dict[str, Any]], output_path: str = '-',
+            progress: bool = True) -> Dict[str, int]:
+        """배치 실행 후 처리 통계를 반환"""
+        completed = load_completed_ids(output_path)
+        resumed = output_path != '-' and os.path.exists(output_path) and os.path.getsize(output_path) > 0
+        # 실행이 끝난 뒤 출력 파일을 입력 순서로 정리하기 위해 모든 id의 순서를 기억합니다.
+        order = []
+
+        def pending_records():
+            for record in records:
+                order.append(str(record['id']))
+                if order[-1] not in completed:
+                    yield record
+
+        pending = pending_records()
+
+        output = sys.stdout if output_path == '-' else open(output_path, 'a', encoding='utf-8')
+        if resumed and not _ends_with_newline(output_path):
+            # 중단되면서 잘린 마지막 줄 뒤에 이어 쓰면 새 기록까지 깨지므로 줄을 바꾸고 씁니다.
+            output.write('\n')
+        stats = {'skipped': len(completed), 'succeeded': 0, 'failed': 0}
+
+        # 입력 순서를 유지하기 위해 먼저 끝난 결과는 순번이 올 때까지 보관합니다.
+        finished = {}
+        next_index = 0
+        in_flight = {}
+        finished_all = False
+
+        def write_ready():
+            nonlocal next_index
+            while next_index in finished:
+                result = finished.pop(next_index)
+                output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                output.flush()
+                stats['failed' if 'error' in result else 'succeeded'] += 1
+                next_index += 1
+
+                if progress and output is not sys.stdout:
+                    done = stats['succeeded'] + stats['failed']
+                    print(f"\r⏳ 처리 {done}건 (실패 {stats['failed']})", end='', file=sys.stderr)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                try:
+                    index = 0
+                    # 메모리를 아끼기 위해 워커 수의 몇 배만큼만 미리 제출합니다.
+                    max_in_flight = self.workers * 4
+                    for record in pending:
+                        while len(in_flight) >= max_in_flight:
+                            self._collect(in_flight, finished)
+                            write_ready()
+                        in_flight[executor.submit(self._call, record)] = index
+                        index += 1
+
+                    while in_flight:
+                        self._collect(in_flight, finished)
+                        write_ready()
+                    finished_all = True
+                except KeyboardInterrupt:
+                    # 아직 시작하지 않은 작업은 취소하고, 다음 실행에서 이어서 처리합니다.
+                    for future in in_flight:
+                        future.cancel()
+                    raise
+        finally:
+            write_ready()
+            if output is not sys.stdout:
+                output.close()
+                if finished_all and resumed:
+                    compact_output(output_path, order)
+            if progress:
+                print(f"\n✅ 완료: 성공 {stats['succeeded']}, 실패 {stats['failed']}, "
+                      f"건너뜀 {stats['skipped']}", file=sys.stderr)
+
+        return stats
+
+    @staticmethod
+    def _collect(in_flight: Dict, finished: Dict):
+        """완료된 작업의 결과를 순번별로 모으기"""
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for future in done:
+            finished[in_flight.pop(future)] = future.result()
+
+
+def add_batch_arguments(parser):
+    """배치 모드용 명령행 인자 추가"""
+    parser.add_argument('--batch', metavar='INPUT', help="JSONL 프롬프트 파일로 배치 실행 ('-'이면 stdin)")
+    parser.add_argument('--output', default='-', help="결과 JSONL 파일 (체크포인트로도 사용, 기본: stdout)")
+    parser.add_argument('--workers', type=int, default=4, help="동시 실행 워커 수")
+    parser.add_argument('--rate-limit', type=float, default=None, help="초당 최대 요청 수")
+    return parser
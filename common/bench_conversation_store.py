@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""ConversationStore 벤치마크
+
+사용법:
+    python -m common.bench_conversation_store --messages 2000000 --sessions 50000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from common.conversation_store import ConversationStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 저장소 벤치마크")
+    parser.add_argument('--messages', type=int, default=1_000_000, help="저장할 전체 메시지 수")
+    parser.add_argument('--sessions', type=int, default=20_000, help="세션 수")
+    parser.add_argument('--batch-size', type=int, default=1000, help="쓰기 배치 크기")
+    parser.add_argument('--window', type=int, default=20, help="세션 재개 시 조회할 메시지 수")
+    parser.add_argument('--lookups', type=int, default=2000, help="조회 측정 횟수")
+    parser.add_argument('--db', default=None, help="DB 파일 경로 (기본: 임시 파일)")
+    args = parser.parse_args()
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), 'bench_conversations.db')
+    store = ConversationStore(db_path, batch_size=args.batch_size, flush_interval=3600)
+    rng = random.Random(42)
+    content = "오늘 하루 운세는 어떤가요? " * 4
+
+    # 쓰기 처리량
+    start = time.perf_counter()
+    base_ts = time.time()
+    for i in range(args.messages):
+        session_id = f"session-{rng.randrange(args.sessions)}"
+        role = 'user' if i % 2 == 0 else 'model'
+        store.append(session_id, role, content, created_at=base_ts + i * 1e-3)
+    store.flush()
+    write_elapsed = time.perf_counter() - start
+    print(f"📥 쓰기: {args.messages:,}개 / {write_elapsed:.1f}초 "
+          f"({args.messages / write_elapsed:,.0f} msg/s)")
+
+    # 세션 재개 (최근 window 개만 조회) 지연 시간
+    latencies = []
+    for _ in range(args.lookups):
+        session_id = f"session-{rng.randrange(args.sessions)}"
+        start = time.perf_counter()
+        store.load_recent(session_id, limit=args.window)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"📤 최근 {args.window}개 조회: 평균 {statistics.mean(latencies):.3f}ms, "
+          f"p50 {latencies[len(latencies) // 2]:.3f}ms, p99 {p99:.3f}ms")
+
+    print(f"💾 DB 크기: {os.path.getsize(db_path) / 1024 / 1024:.1f}MB ({db_path})")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
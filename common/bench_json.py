@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""API 응답 직렬화 벤치마크
+
+Flask 기본 jsonify와 같은 설정(표준 json, ensure_ascii, sort_keys)으로 만든 전체 응답과
+fast_json(orjson, 없으면 표준 json)의 전체/요약(view=summary, 앱의 response_views.py) 응답을 비교해
+응답 크기와 직렬화 시간을 출력합니다.
+
+사용법:
+    python -m common.bench_json --iterations 20000
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import time
+
+from common.fast_json import ENCODER, dumps, project
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+
+def load_views(path: str):
+    """앱이 실제로 쓰는 요약 보기 정의 (response_views.py) 불러오기"""
+    name = os.path.relpath(path, ROOT).replace(os.sep, '_').replace('.py', '')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.RESPONSE_VIEWS
+
+
+TAROT_SUMMARY = load_views(os.path.join(ROOT, 'tarot', 'response_views.py'))['summary']
+LOAN_SUMMARY = load_views(os.path.join(ROOT, 'LOAN', 'loan_chatbot', 'response_views.py'))['summary']
+
+
+def tarot_payload():
+    """3장 리딩 응답 (tarot/tarot_cards.json의 카드 정보 사용)"""
+    with open(os.path.join(ROOT, 'tarot', 'tarot_cards.json'), 'r', encoding='utf-8') as file:
+        cards = json.load(file)['major_arcana'][:3]
+    for card in cards:
+        name = os.path.basename(card['local_image'])
+        card.update({
+            'image_src': f"/card_image/{name}?w=400",
+            'image_srcset': ', '.join(f"/card_image/{name}?w={width} {width}w" for width in (200, 400, 800)),
+            'is_reversed': False,
+        })
+    return {
+        'success': True,
+        'cards': cards,
+        'reading': "**각 카드 해석**\n\n" + "카드가 전하는 메시지를 차분히 살펴보세요. " * 60,
+        'question': "이번 달 직장운은 어떤가요?",
+        'mode': 'full',
+    }
+
+
+def loan_payload():
+    """대출 심사 응답 (LOAN/loan_chatbot/data의 상품 정보 사용)"""
+    with open(os.path.join(ROOT, 'LOAN', 'loan_chatbot', 'data', 'loan_products.json'), 'r', encoding='utf-8') as file:
+        products = json.load(file)['products'][:3]
+    check = {'id': 'DTI_001', 'type': 'DTI', 'category': '기본규정', 'title': 'DTI 한도', 'metric': 'DTI',
+             'value': 25.6, 'op': '<=', 'threshold': 40.0, 'severity': 'reject', 'passed': True, 'margin': 0.36}
+    return {
+        'success': True,
+        'data': {
+            'approval_percentage': 85,
+            'dti': 25.6,
+            'interest_rate': 5.91,
+            'ai_explanation': "## 대출 심사 결과 분석\n**승인 가능성: 85%**\n\n" + "상환 능력이 안정적입니다. " * 80,
+            'eligibility': {'eligible': True, 'binding_constraint': check, 'failures': [], 'warnings': [],
+                            'benefits': [dict(check, id='CREDIT_002')]},
+            'recommended_products': [
+                {**product, 'match_score': 80, 'match_reason': '기본 자격 조건 충족', 'all_reasons': [],
+                 'quote': {'product_id': product['id'], 'apr': 6.2, 'term_months': 60,
+                           'adjustments': ['신용 5등급', '고정 5년 +0.2%p']}}
+                for product in products
+            ],
+        },
+    }
+
+
+def flask_default(value) -> bytes:
+    """Flask DefaultJSONProvider의 기본 설정과 같은 직렬화"""
+    return json.dumps(value, ensure_ascii=True, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def measure(label, function, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = function()
+    elapsed_us = (time.perf_counter() - start) / iterations * 1e6
+    print(f"  {label:<28} {len(body):>7,} bytes  {elapsed_us:>8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API 응답 직렬화 벤치마크")
+    parser.add_argument('--iterations', type=int, default=20000, help="측정 반복 횟수")
+    args = parser.parse_args()
+
+    print(f"fast_json 인코더: {ENCODER}")
+    for name, payload, summary, envelope in (
+        ('tarot /api/tarot', tarot_payload(), TAROT_SUMMARY, False),
+        ('LOAN /api/loan-check', loan_payload(), LOAN_SUMMARY, True),
+    ):
+        def summarize(payload=payload, summary=summary, envelope=envelope):
+            if envelope:
+                return {**payload, 'data': project(payload['data'], summary)}
+            return {'success': payload['success'], **project(payload, summary)}
+
+        print(name)
+        measure("Flask 기본 jsonify (전체)", lambda: flask_default(payload), args.iterations)
+        measure(f"{ENCODER} (전체)", lambda: dumps(payload), args.iterations)
+        measure(f"{ENCODER} + view=summary", lambda: dumps(summarize()), args.iterations)
+
+
+if __name__ == '__main__':
+    main()
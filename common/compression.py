@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""응답 압축 (gzip / brotli)
+
+- 동적 응답(JSON, HTML 등)은 Accept-Encoding에 따라 크기가 min_size 이상일 때만 압축합니다.
+- SSE 같은 스트리밍 응답은 이벤트마다 flush하는 스트림 압축을 사용해 실시간성을 유지합니다.
+- 정적 파일은 빌드 단계에서 미리 .br/.gz 파일을 만들어 두고 StaticFileServer가 그대로 보냅니다.
+  (요청마다 압축하는 CPU 비용이 없습니다)
+
+    python -m common.compression tarot/static LOAN/loan_chatbot/static CHATBOT/frontend
+
+brotli는 선택 의존성입니다. 설치되어 있지 않으면 gzip만 사용합니다. (pip install Brotli)
+"""
+
+import gzip
+import os
+import sys
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 선호 순서 (압축률이 좋은 포맷 우선)
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+PRECOMPRESSED_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+COMPRESSIBLE_MIMETYPES = {
+    'application/json', 'application/javascript', 'text/javascript', 'text/html', 'text/css',
+    'text/plain', 'text/markdown', 'text/event-stream', 'image/svg+xml', 'application/xml',
+}
+PRECOMPRESS_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt')
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding 헤더를 {인코딩: q값}으로 변환"""
+    encodings = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+def choose_encoding(header: Optional[str], available: Iterable[str] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """클라이언트가 받을 수 있는 인코딩 중 선호 순서가 가장 앞선 것 (없으면 None)"""
+    accepted = parse_accept_encoding(header)
+    best, best_q = None, 0.0
+    for encoding in available:
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 5) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class StreamCompressor:
+    """청크마다 flush해서 받은 만큼 바로 풀 수 있는 스트림 압축기"""
+
+    def __init__(self, encoding: str, gzip_level: int = 6, brotli_quality: int = 5):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: gzip 헤더를 붙인 deflate 스트림
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def _compress_stream(iterable, compressor: StreamCompressor) -> Iterator[bytes]:
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compressor.compress(chunk)
+        yield compressor.finish()
+    finally:
+        # 원래 응답의 close(스트림 컨텍스트 정리 등)가 호출되도록 합니다.
+        close = getattr(iterable, 'close', None)
+        if close is not None:
+            close()
+
+
+class ResponseCompressor:
+    """Flask after_request 훅으로 동작하는 동적 응답 압축기 (init_compression으로 등록)"""
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5,
+                 stream: bool = True):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stream = stream
+        self.stats = {'compressed': 0, 'streams': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def _skip(self, response) -> bool:
+        return (
+            response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            # 파일 응답(Range 지원)은 미리 압축한 파일로 처리하므로 여기서 다시 압축하지 않습니다.
+            or response.direct_passthrough or 'Accept-Ranges' in response.headers
+        )
+
+    def after_request(self, response):
+        from flask import request
+
+        if self._skip(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            if not self.stream:
+                return response
+            compressor = StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+            response.response = _compress_stream(response.response, compressor)
+            response.headers.pop('Content-Length', None)
+            self.stats['streams'] += 1
+        else:
+            data = response.get_data()
+            if len(data) < self.min_size:
+                return response
+            compressed = compress(data, encoding, self.gzip_level, self.brotli_quality)
+            response.set_data(compressed)
+            self.stats['compressed'] += 1
+            self.stats['bytes_in'] += len(data)
+            self.stats['bytes_out'] += len(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag:
+            # 인코딩마다 표현이 다르므로 ETag도 구분합니다.
+            response.set_etag(f"{etag}-{encoding}", weak)
+        return response
+
+
+def init_compression(app, config: Optional[Dict[str, Any]] = None) -> Optional[ResponseCompressor]:
+    """Flask 앱에 동적 응답 압축 등록
+
+    config는 앱 설정의 compression 섹션입니다. (enabled, min_size, gzip_level, brotli_quality, stream)
+    """
+    config = config or {}
+    if not config.get('enabled', True):
+        return None
+    compressor = ResponseCompressor(
+        min_size=int(config.get('min_size', 1024)),
+        gzip_level=int(config.get('gzip_level', 6)),
+        brotli_quality=int(config.get('brotli_quality', 5)),
+        stream=bool(config.get('stream', True)),
+    )
+    app.after_request(compressor.after_request)
+    return compressor
+
+
+# --- 정적 파일 사전 압축 ---
+
+def precompressed_path(path: str, encoding: str) -> str:
+    return path + PRECOMPRESSED_SUFFIXES[encoding]
+
+
+def find_precompressed(path: str, accept_encoding: Optional[str]) -> Tuple[Optional[str], str]:
+    """원본보다 최신인 사전 압축 파일 중 클라이언트가 받을 수 있는 것 (인코딩, 경로)"""
+    available = []
+    for encoding in PRECOMPRESSED_SUFFIXES:
+        candidate = precompressed_path(path, encoding)
+        try:
+            if os.path.getmtime(candidate) >= os.path.getmtime(path):
+                available.append(encoding)
+        except OSError:
+            continue
+    encoding = choose_encoding(accept_encoding, available) if available else None
+    return (encoding, precompressed_path(path, encoding)) if encoding else (None, path)
+
+
+def precompress_directory(directory: str) -> Dict[str, int]:
+    """디렉터리 안의 텍스트 정적 파일마다 최고 압축률로 .gz(.br) 파일 생성"""
+    totals = {'files': 0, 'original': 0, 'gzip': 0, 'br': 0}
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            if not filename.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(root, filename)
+            with open(path, 'rb') as file:
+                data = file.read()
+
+            totals['files'] += 1
+            totals['original'] += len(data)
+            for encoding in SUPPORTED_ENCODINGS:
+                # 빌드 단계에서 한 번만 하므로 가장 느리지만 작은 설정을 사용합니다.
+                encoded = compress(data, encoding, gzip_level=9, brotli_quality=11)
+                tmp_path = precompressed_path(path, encoding) + '.tmp'
+                with open(tmp_path, 'wb') as file:
+                    file.write(encoded)
+                os.replace(tmp_path, precompressed_path(path, encoding))
+                totals[encoding] += len(encoded)
+    return totals
+
+
+if __name__ == '__main__':
+    directories = sys.argv[1:] or ['.']
+    for directory in directories:
+        totals = precompress_directory(directory)
+        summary = f"gzip {totals['gzip'] / 1024:.1f}KB"
+        if brotli is not None:
+            summary += f", br {totals['br'] / 1024:.1f}KB"
+        print(f"📦 {directory}: {totals['files']}개 파일 {totals['original'] / 1024:.1f}KB -> {summary}")
+    if brotli is None:
+        print("ℹ️ brotli가 설치되어 있지 않아 .gz 파일만 만들었습니다. (pip install Brotli)")
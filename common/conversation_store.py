@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import atexit
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session_time
+    ON messages (session_id, created_at, id);
+"""
+
+
+class ConversationStore:
+    """SQLite(WAL 모드) 기반 대화 기록 저장소
+
+    - 여러 프로세스(워커)가 같은 DB 파일을 공유하므로 어느 워커든 어느 세션이든 처리할 수 있습니다.
+    - 쓰기는 버퍼에 모았다가 한 트랜잭션으로 기록합니다 (batch_size 또는 flush_interval 기준).
+      다음 쓰기가 없어도 flush_interval 뒤에는 타이머가, 프로세스 종료 시에는 atexit가 남은 버퍼를 기록합니다.
+    - 읽기는 (session_id, created_at) 인덱스를 사용한 페이지 단위 조회만 제공합니다.
+    """
+
+    def __init__(self, db_path: str = "conversations.db", batch_size: int = 64,
+                 flush_interval: float = 0.5):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        atexit.register(self._flush_at_exit)
+
+    def _connection(self) -> sqlite3.Connection:
+        """스레드별 SQLite 연결 (sqlite3 연결은 스레드 간 공유하지 않습니다)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, role: str, content: str,
+               created_at: Optional[float] = None):
+        """메시지를 쓰기 버퍼에 추가 (조건을 만족하면 자동으로 기록)"""
+        row = (session_id, created_at if created_at is not None else time.time(), role, content)
+        with self._lock:
+            self._pending.append(row)
+            should_flush = (len(self._pending) >= self.batch_size or
+                            time.monotonic() - self._last_flush >= self.flush_interval)
+            if not should_flush and self._timer is None:
+                # 세션이 조용해져도 마지막 메시지가 버퍼에 남지 않도록 예약합니다.
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if should_flush:
+            self.flush()
+
+    def append_many(self, session_id: str, messages: List[Tuple[str, str]]):
+        """(role, content) 목록을 한 번에 기록
+
+        한 번의 대화 턴(사용자 질문 + 모델 응답)을 같은 트랜잭션으로 저장할 때 사용합니다.
+        """
+        now = time.time()
+        with self._lock:
+            self._pending.extend((session_id, now, role, content) for role, content in messages)
+        self.flush()
+
+    def flush(self) -> int:
+        """버퍼에 쌓인 메시지를 한 트랜잭션으로 기록하고 기록한 개수를 반환"""
+        with self._lock:
+            rows, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not rows:
+            return 0
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO messages (session_id, created_at, role, content) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            print(f"대화 기록을 저장하지 못했습니다 ({self.db_path}): {e}")
+
+    def load_page(self, session_id: str, limit: int = 20,
+                  before: Optional[Tuple[float, int]] = None) -> List[Dict]:
+        """세션의 메시지를 최신 순으로 한 페이지 조회하여 시간 순으로 반환
+
+        before에 이전 페이지의 가장 오래된 메시지 (created_at, id)를 넘기면
+        그보다 오래된 메시지를 조회합니다 (keyset 페이지네이션).
+        """
+        conn = self._connection()
+        if before is None:
+            cursor = conn.execute(
+                "SELECT id, created_at, role, content FROM messages "
+                "WHERE session_id = ? ORDER BY created_at DESC, id DESC LIMIT ?",
+                (session_id, limit)
+            )
+        else:
+            cursor = conn.execute(
+                "SELECT id, created_at, role, content FROM messages "
+                "WHERE session_id = ? AND (created_at, id) < (?, ?) "
+                "ORDER BY created_at DESC, id DESC LIMIT ?",
+                (session_id, before[0], before[1], limit)
+            )
+
+        rows = cursor.fetchall()
+        rows.reverse()
+        return [
+            {'id': row[0], 'created_at': row[1], 'role': row[2], 'content': row[3]}
+            for row in rows
+        ]
+
+    def load_recent(self, session_id: str, limit: int = 20) -> List[Dict]:
+        """모델 컨텍스트 재구성에 필요한 최근 메시지만 조회"""
+        return self.load_page(session_id, limit=limit)
+
+    def count(self, session_id: Optional[str] = None) -> int:
+        """저장된 메시지 개수"""
+        conn = self._connection()
+        if session_id is None:
+            return conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        return conn.execute(
+            "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+        ).fetchone()[0]
+
+    def close(self):
+        """남은 버퍼를 기록하고 현재 스레드의 연결을 닫습니다"""
+        self.flush()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def to_gemini_history(messages: List[Dict]) -> List[Dict]:
+    """저장된 메시지를 Gemini start_chat(history=...) 형식으로 변환"""
+    return [
+        {'role': 'model' if message['role'] == 'model' else 'user', 'parts': [message['content']]}
+        for message in messages
+    ]
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""빠른 JSON 직렬화와 응답 필드 선택(projection)
+
+- init_fast_json(app)으로 등록하면 jsonify가 orjson으로 직렬화합니다.
+  orjson이 설치되어 있지 않으면 표준 json(공백 없는 압축 형식)을 사용합니다. (pip install orjson)
+- 클라이언트가 필요한 필드만 받을 수 있습니다.
+    ?fields=approval_percentage,recommended_products.name,recommended_products.quote.apr
+    ?view=summary   (앱이 미리 정의한 요약 필드 묶음)
+  POST 요청은 본문의 "fields" / "view"로도 지정할 수 있습니다. 점(.)은 하위 필드이고,
+  목록은 각 항목에 같은 필드 선택을 적용합니다.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ENCODER = 'orjson' if orjson is not None else 'json'
+
+# 필드를 선택해도 항상 남기는 최상위 키
+ALWAYS_FIELDS = ('success', 'error')
+MAX_FIELDS = 100
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value):
+    """기본 인코더가 모르는 값 (set, NumPy 스칼라 등)"""
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"JSON으로 변환할 수 없는 값입니다: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """UTF-8 JSON 바이트 (공백 없음)"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify / app.json.dumps를 빠른 인코더로 처리하는 Flask JSON 공급자"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj).decode('utf-8')
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
+
+
+def init_fast_json(app):
+    app.json = FastJSONProvider(app)
+    return app.json
+
+
+# --- 필드 선택 ---
+
+def parse_fields(spec: Optional[Any]) -> Optional[Dict[str, Any]]:
+    """'a,b.c' (또는 목록)를 {'a': None, 'b': {'c': None}} 트리로 변환 (None은 값 전체)"""
+    if not spec:
+        return None
+    paths = spec.split(',') if isinstance(spec, str) else list(spec)
+    tree: Dict[str, Any] = {}
+    for path in paths[:MAX_FIELDS]:
+        parts = [part for part in str(path).strip().split('.') if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                # 'a'를 이미 통째로 요청했으면 'a.b'는 무시합니다.
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+    """트리에 있는 필드만 남긴 새 값 (목록은 항목마다 적용)"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: project(value[key], subtree) for key, subtree in tree.items() if key in value}
+    return value
+
+
+def compile_views(views: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, Any]]:
+    """앱이 정의한 요약 보기(이름 -> 필드 목록)를 불러올 때 한 번만 트리로 변환"""
+    return {name: parse_fields(list(fields)) for name, fields in views.items()}
+
+
+def requested_projection(views: Optional[Dict[str, Dict[str, Any]]] = None) -> Optional[Dict[str, Any]]:
+    """현재 요청의 fields / view로 필드 선택 트리 결정 (fields가 우선)"""
+    body = request.get_json(silent=True) if request.is_json else None
+    body = body if isinstance(body, dict) else {}
+    fields = request.args.get('fields') or body.get('fields')
+    if fields:
+        return parse_fields(fields)
+    view = request.args.get('view') or body.get('view')
+    return (views or {}).get(view) if view else None
+
+
+def project_response(data: Dict[str, Any], views: Optional[Dict[str, Dict[str, Any]]] = None,
+                     always: Iterable[str] = ALWAYS_FIELDS) -> Dict[str, Any]:
+    """요청한 필드만 남긴 응답 데이터 (success/error 같은 키는 항상 유지)"""
+    tree = requested_projection(views)
+    if not tree or not isinstance(data, dict):
+        return data
+    projected = project(data, tree)
+    for key in always:
+        if key in data:
+            projected.setdefault(key, data[key])
+    return projected
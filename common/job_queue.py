@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    idempotency_key TEXT,
+    payload_hash TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    lease_until REAL,
+    lease_owner TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_idempotency
+    ON jobs (kind, idempotency_key) WHERE idempotency_key IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created
+    ON jobs (status, created_at);
+"""
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+FINISHED_STATUSES = (SUCCEEDED, FAILED)
+
+
+class IdempotencyConflict(ValueError):
+    """같은 멱등성 키로 다른 내용의 요청을 보냄"""
+
+
+def _payload_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class JobQueue:
+    """SQLite(WAL 모드) 기반 작업 큐 (별도 브로커 없이 여러 프로세스가 공유 가능)
+
+    - submit은 작업 ID를 바로 돌려주고, 같은 멱등성 키로 다시 보내면 기존 작업을 돌려줍니다.
+    - 워커는 claim으로 작업을 임대(lease)합니다. 워커가 죽어 임대가 만료되면 다른 워커가 다시 가져갑니다.
+      임대마다 lease_owner 토큰을 발급하고, 완료 기록은 지금도 임대를 가진 워커만 할 수 있습니다.
+    - wait는 작업이 끝날 때까지 기다립니다(롱 폴링). 같은 프로세스의 완료는 바로 깨우고,
+      다른 프로세스의 완료는 poll_interval 간격으로 확인합니다.
+    """
+
+    def __init__(self, db_path: str = "jobs.db", lease_seconds: float = 300.0,
+                 max_attempts: int = 3, poll_interval: float = 0.25):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        self._local = threading.local()
+        self._changed = threading.Condition()
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        # lease_owner 열이 없던 이전 버전의 DB 파일
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+        if 'lease_owner' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+
+    def _connection(self) -> sqlite3.Connection:
+        """스레드별 SQLite 연결"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'attempts': row['attempts'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at'],
+        }
+        if row['result'] is not None:
+            job['result'] = json.loads(row['result'])
+        if row['error'] is not None:
+            job['error'] = row['error']
+        return job
+
+    def submit(self, kind: str, payload: Dict[str, Any],
+               idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """작업 등록 후 (작업, 새로 만들었는지) 반환"""
+        payload_hash = _payload_hash(payload)
+        conn = self._connection()
+        try:
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, idempotency_key, payload_hash, payload, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, idempotency_key, payload_hash,
+                 json.dumps(payload, ensure_ascii=False), QUEUED, time.time())
+            )
+        except sqlite3.IntegrityError:
+            # 이미 같은 키로 등록된 작업이 있으면 새로 실행하지 않고 그 작업을 돌려줍니다.
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE kind = ? AND idempotency_key = ?", (kind, idempotency_key)
+            ).fetchone()
+            if row['payload_hash'] != payload_hash:
+                raise IdempotencyConflict("같은 멱등성 키로 다른 요청이 이미 등록되어 있습니다.")
+            return self._to_dict(row), False
+
+        self._notify()
+        return self.get(job_id), True
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def claim(self) -> Optional[Tuple[str, str, Dict[str, Any], str]]:
+        """가장 오래된 대기 작업(또는 임대가 만료된 작업)을 가져와 (id, kind, payload, 임대 토큰) 반환"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM jobs "
+                "WHERE status = ? OR (status = ? AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            if row['attempts'] >= self.max_attempts:
+                # 여러 번 임대가 만료된 작업은 워커를 죽이는 작업일 수 있으므로 실패로 처리합니다.
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (FAILED, "작업 처리 중 워커가 응답하지 않았습니다.", now, row['id'])
+                )
+                conn.execute("COMMIT")
+                self._notify()
+                return self.claim()
+
+            lease_owner = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, lease_until = ?, "
+                "lease_owner = ? WHERE id = ?",
+                (RUNNING, now, now + self.lease_seconds, lease_owner, row['id'])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return row['id'], row['kind'], json.loads(row['payload']), lease_owner
+
+    def _finish(self, job_id: str, status: str, result: Optional[str], error: Optional[str],
+                lease_owner: Optional[str]) -> bool:
+        """작업 결과 기록 (lease_owner를 주면 그 임대가 아직 유효할 때만 기록하고 기록 여부 반환)
+
+        임대가 만료되어 다른 워커가 다시 가져간 작업의 결과를 늦게 끝난 워커가 덮어쓰지 않도록 합니다.
+        """
+        query = ("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_until = NULL, "
+                 "lease_owner = NULL WHERE id = ?")
+        params = [status, result, error, time.time(), job_id]
+        if lease_owner is not None:
+            query += " AND status = ? AND lease_owner = ?"
+            params += [RUNNING, lease_owner]
+        cursor = self._connection().execute(query, params)
+        self._notify()
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: str, result: Any, lease_owner: Optional[str] = None) -> bool:
+        return self._finish(job_id, SUCCEEDED, json.dumps(result, ensure_ascii=False), None, lease_owner)
+
+    def fail(self, job_id: str, error: str, lease_owner: Optional[str] = None) -> bool:
+        return self._finish(job_id, FAILED, None, error, lease_owner)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """작업이 끝나거나 timeout이 지날 때까지 기다린 뒤 현재 상태 반환"""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job['status'] in FINISHED_STATUSES or remaining <= 0:
+                return job
+            with self._changed:
+                self._changed.wait(min(remaining, self.poll_interval))
+
+    def wait_for_work(self, timeout: float):
+        """새 작업이 등록될 때까지 (최대 timeout) 대기"""
+        with self._changed:
+            self._changed.wait(timeout)
+
+    def purge(self, max_age_seconds: float) -> int:
+        """끝난 지 max_age_seconds가 지난 작업 삭제 (멱등성 키도 함께 만료)"""
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (*FINISHED_STATUSES, time.time() - max_age_seconds)
+        )
+        return cursor.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class WorkerPool:
+    """JobQueue의 작업을 처리하는 로컬 스레드 워커 풀
+
+    handlers는 {작업 종류: handler(payload) -> 결과(JSON 직렬화 가능)} 입니다.
+    모델 호출처럼 대부분 I/O를 기다리는 작업이므로 스레드로 충분합니다.
+    같은 DB 파일을 여는 다른 프로세스에서 WorkerPool을 따로 실행해도 됩니다.
+
+    start는 여러 번 불러도 한 번만 시작하므로, 앱에서는 요청 처리 시점(before_request)에 부릅니다.
+    (모듈 import 시점에 시작하면 Flask debug 리로더의 감시 프로세스도 워커를 띄움)
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Dict[str, Any]], Any]],
+                 workers: int = 4, retention_seconds: float = 24 * 3600):
+        self.queue = queue
+        self.handlers = handlers
+        self.workers = max(1, workers)
+        self.retention_seconds = retention_seconds
+
+        self._stop = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._last_purge = 0.0
+
+    def start(self) -> 'WorkerPool':
+        if self._threads:
+            return self
+        with self._start_lock:
+            if self._threads:
+                return self
+            self._stop.clear()
+            threads = [threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+                       for i in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            self._threads = threads
+        return self
+
+    def stop(self, timeout: Optional[float] = None):
+        with self._start_lock:
+            self._stop.set()
+            self.queue._notify()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = self.queue.claim()
+            except sqlite3.Error as e:
+                print(f"작업 큐 조회 오류: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._purge_if_due()
+                self.queue.wait_for_work(1.0)
+                continue
+
+            job_id, kind, payload, lease_owner = claimed
+            handler = self.handlers.get(kind)
+            try:
+                if handler is None:
+                    raise ValueError(f"처리할 수 없는 작업 종류입니다: {kind}")
+                recorded = self.queue.complete(job_id, handler(payload), lease_owner)
+            except Exception as e:
+                recorded = self.queue.fail(job_id, str(e), lease_owner)
+            if not recorded:
+                print(f"작업 {job_id}의 임대가 만료되어 결과를 기록하지 않았습니다.")
+
+    def _purge_if_due(self):
+        now = time.monotonic()
+        if now - self._last_purge >= 600:
+            self._last_purge = now
+            self.queue.purge(self.retention_seconds)
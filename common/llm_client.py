@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""세 애플리케이션이 함께 쓰는 LLM 클라이언트
+
+- 같은 설정이면 프로세스에서 클라이언트 하나를 공유합니다. (get_client)
+  연결 관리는 google-generativeai SDK에 맡기며, 이 모듈이 따로 연결 풀을 두지는 않습니다.
+  SDK의 API 키는 프로세스 전역이므로 한 프로세스에서는 Gemini API 키 하나만 쓸 수 있습니다.
+- 일시적인 오류(429, 5xx, 타임아웃, 연결 오류)는 지터를 넣은 지수 백오프로 재시도합니다.
+- 호출마다 타임아웃을, 재시도를 포함한 전체 호출에는 마감 시간(deadline)을 적용합니다.
+  (호출별 타임아웃은 request_options를 받는 SDK 0.5 이상에서만 전달되고,
+  그보다 오래된 SDK에서는 재시도 사이에 마감 시간만 확인합니다.)
+- 백엔드는 설정으로 고릅니다. (gemini: 실제 API, fake: 네트워크 없이 동작하는 로컬 모델)
+- 모든 호출의 지연 시간과 토큰 수를 같은 형식으로 집계합니다. (metrics)
+
+설정 예 (각 앱의 config.yaml):
+
+    gemini:
+      api_key: "..."
+      model: "gemini-1.5-flash"
+    llm:
+      backend: gemini          # gemini | fake (환경 변수 LLM_BACKEND로 덮어쓸 수 있음)
+      transport: grpc          # grpc | rest
+      timeout_seconds: 30
+      deadline_seconds: 60
+      max_retries: 3
+      backoff_base_seconds: 0.5
+      backoff_max_seconds: 8
+      fake_latency_ms: 0
+"""
+
+import hashlib
+import inspect
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+import yaml
+
+# 설정 템플릿에 들어 있는 자리표시 키는 키가 없는 것으로 봅니다.
+PLACEHOLDER_KEYS = {'', 'YOUR_API_KEY', 'YOUR_GEMINI_API_KEY', 'YOUR_GEMINI_API_KEY_HERE', 'your-api-key-here'}
+
+# 재시도할 예외 (google.api_core를 불러오지 않고 클래스 이름으로 판별)
+TRANSIENT_ERROR_NAMES = {
+    'TooManyRequests', 'ResourceExhausted', 'InternalServerError', 'BadGateway',
+    'ServiceUnavailable', 'GatewayTimeout', 'DeadlineExceeded', 'RetryError',
+    'ConnectionError', 'TimeoutError', 'TransientLLMError',
+}
+
+
+class LLMConfigError(ValueError):
+    """API 키가 없는 등 클라이언트를 만들 수 없는 설정"""
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """재시도를 포함한 전체 호출이 마감 시간을 넘김"""
+
+
+class TransientLLMError(Exception):
+    """로컬 백엔드가 일시적인 오류를 흉내 낼 때 사용"""
+
+
+def read_config(config_path: str, required: bool = True) -> Dict[str, Any]:
+    """YAML 설정 파일 읽기 (required=False면 파일이 없을 때 빈 설정)"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            return yaml.safe_load(file) or {}
+    except FileNotFoundError:
+        if required:
+            raise
+        return {}
+
+
+def is_transient(error: BaseException) -> bool:
+    return any(cls.__name__ in TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def _usage(response) -> Dict[str, int]:
+    """응답의 토큰 사용량 (없으면 0)"""
+    usage = getattr(response, 'usage_metadata', None)
+    if usage is None:
+        return {'prompt_tokens': 0, 'output_tokens': 0}
+    return {
+        'prompt_tokens': getattr(usage, 'prompt_token_count', 0) or 0,
+        'output_tokens': getattr(usage, 'candidates_token_count', 0) or 0,
+    }
+
+
+def _accepts_request_options(method) -> bool:
+    """SDK 메서드가 request_options 인자를 받는지 (0.5 미만은 알 수 없는 인자를 요청에 넣어 실패함)"""
+    try:
+        return 'request_options' in inspect.signature(method).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+# --- 백엔드 ---
+
+# genai.configure는 프로세스 전역 설정이라 다른 키로 다시 부르면 기존 모델도 새 키를 쓰게 됩니다.
+_genai_settings = None
+_genai_lock = threading.Lock()
+
+
+def _configure_genai(genai, api_key: str, transport: Optional[str]):
+    global _genai_settings
+    with _genai_lock:
+        if _genai_settings is None:
+            genai.configure(api_key=api_key, transport=transport)
+            _genai_settings = (api_key, transport)
+        elif _genai_settings != (api_key, transport):
+            raise LLMConfigError("한 프로세스에서는 Gemini API 키와 transport를 하나만 쓸 수 있습니다.")
+
+
+class GeminiBackend:
+    """google.generativeai 기반 백엔드"""
+
+    name = 'gemini'
+
+    def __init__(self, api_key: str, model_name: str, transport: Optional[str] = None):
+        import google.generativeai as genai
+
+        _configure_genai(genai, api_key, transport)
+        self._model = genai.GenerativeModel(model_name)
+        self._generate_timeout = _accepts_request_options(genai.GenerativeModel.generate_content)
+        self._chat_timeout = _accepts_request_options(genai.ChatSession.send_message)
+
+    @staticmethod
+    def _options(temperature: Optional[float], timeout: float, with_timeout: bool) -> Dict[str, Any]:
+        options = {}
+        if with_timeout:
+            options['request_options'] = {'timeout': timeout}
+        if temperature is not None:
+            options['generation_config'] = {'temperature': temperature}
+        return options
+
+    def generate(self, prompt, temperature: Optional[float], stream: bool, timeout: float):
+        return self._model.generate_content(
+            prompt, stream=stream, **self._options(temperature, timeout, self._generate_timeout))
+
+    def start_chat(self, history: List[Dict[str, Any]]):
+        return _GeminiChat(self._model.start_chat(history=history), self._chat_timeout)
+
+
+class _GeminiChat:
+    def __init__(self, session, with_timeout: bool):
+        self._session = session
+        self._with_timeout = with_timeout
+
+    @property
+    def history(self):
+        return self._session.history
+
+    def send(self, content, temperature: Optional[float], stream: bool, timeout: float):
+        return self._session.send_message(
+            content, stream=stream, **GeminiBackend._options(temperature, timeout, self._with_timeout))
+
+
+class _FakeUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+
+
+class _FakeResponse:
+    """genai 응답처럼 .text와 usage_metadata를 갖고, 스트리밍이면 청크로 순회"""
+
+    def __init__(self, text: str, prompt: str, chunks: Optional[List[str]] = None):
+        self.text = text
+        self.usage_metadata = _FakeUsage(len(prompt) // 4 + 1, len(text) // 4 + 1)
+        self._chunks = chunks
+
+    def __iter__(self):
+        for chunk in self._chunks or [self.text]:
+            yield _FakeChunk(chunk, self.usage_metadata)
+
+
+class _FakeChunk:
+    def __init__(self, text: str, usage_metadata):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeBackend:
+    """네트워크 없이 동작하는 로컬 모델 (개발, 부하 테스트용)
+
+    같은 프롬프트에는 항상 같은 답을 돌려주고, latency_ms만큼 지연하며,
+    failure_rate 확률로 일시적인 오류를 내서 재시도 경로도 확인할 수 있습니다.
+    """
+
+    name = 'fake'
+
+    def __init__(self, model_name: str = 'fake', latency_ms: float = 0.0, failure_rate: float = 0.0):
+        self.model_name = model_name
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+
+    def _reply(self, prompt: str) -> str:
+        digest = hashlib.blake2b(prompt.encode('utf-8'), digest_size=4).hexdigest()
+        last_line = next((line.strip() for line in reversed(prompt.strip().splitlines()) if line.strip()), '')
+        return (f"**로컬 모델 응답** ({digest})\n\n"
+                f"요청을 잘 받았습니다: {last_line[:80]}\n\n"
+                f"- 실제 모델 대신 로컬 백엔드가 만든 답변입니다.\n"
+                f"- 설정의 llm.backend를 gemini로 바꾸면 실제 모델을 사용합니다.")
+
+    def generate(self, prompt, temperature: Optional[float], stream: bool, timeout: float):
+        if self.latency_ms:
+            time.sleep(min(self.latency_ms / 1000, timeout))
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransientLLMError("로컬 백엔드의 일시적 오류")
+
+        prompt = prompt if isinstance(prompt, str) else str(prompt)
+        text = self._reply(prompt)
+        chunks = [text[i:i + 24] for i in range(0, len(text), 24)] if stream else None
+        return _FakeResponse(text, prompt, chunks)
+
+    def start_chat(self, history: List[Dict[str, Any]]):
+        return _FakeChat(self, history)
+
+
+class _FakeChat:
+    def __init__(self, backend: FakeBackend, history: List[Dict[str, Any]]):
+        self._backend = backend
+        self.history = list(history)
+
+    def send(self, content, temperature: Optional[float], stream: bool, timeout: float):
+        response = self._backend.generate(content, temperature, stream, timeout)
+        self.history.append({'role': 'user', 'parts': [content]})
+        self.history.append({'role': 'model', 'parts': [response.text]})
+        return response
+
+
+# --- 클라이언트 ---
+
+class LLMClient:
+    """재시도, 마감 시간, 지표 집계를 담당하는 공용 클라이언트
+
+    generate_content / start_chat().send_message는 genai.GenerativeModel과 같은 모양으로
+    응답(.text, 스트리밍이면 청크 순회)을 돌려주므로 기존 코드를 거의 그대로 쓸 수 있습니다.
+    """
+
+    def __init__(self, backend, model_name: str, timeout_seconds: float = 30.0,
+                 deadline_seconds: float = 60.0, max_retries: int = 3,
+                 backoff_base_seconds: float = 0.5, backoff_max_seconds: float = 8.0):
+        self.backend = backend
+        self.model_name = model_name
+        self.timeout_seconds = timeout_seconds
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=2000)
+        self._counters = {'calls': 0, 'errors': 0, 'retries': 0, 'prompt_tokens': 0, 'output_tokens': 0}
+
+    def _backoff(self, attempt: int) -> float:
+        """지터를 넣은 지수 백오프 (동시에 실패한 요청들이 같은 시각에 재시도하지 않도록)"""
+        return random.uniform(0, min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** (attempt - 1)))
+
+    def _call(self, operation, timeout: Optional[float] = None):
+        """operation(timeout)을 재시도 정책에 따라 실행하고 (응답, 시작 시각) 반환"""
+        start = time.perf_counter()
+        deadline = time.monotonic() + (timeout or self.deadline_seconds)
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._record(start, error=True)
+                raise LLMDeadlineExceeded(f"LLM 호출이 {timeout or self.deadline_seconds}초 안에 끝나지 않았습니다.")
+            try:
+                return operation(min(self.timeout_seconds, remaining)), start
+            except Exception as e:
+                attempt += 1
+                delay = self._backoff(attempt)
+                if (attempt > self.max_retries or not is_transient(e)
+                        or time.monotonic() + delay >= deadline):
+                    self._record(start, error=True)
+                    raise
+                with self._lock:
+                    self._counters['retries'] += 1
+                time.sleep(delay)
+
+    def _record(self, start: float, usage: Optional[Dict[str, int]] = None, error: bool = False):
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._counters['calls'] += 1
+            self._latencies.append(latency_ms)
+            if error:
+                self._counters['errors'] += 1
+            if usage:
+                self._counters['prompt_tokens'] += usage['prompt_tokens']
+                self._counters['output_tokens'] += usage['output_tokens']
+
+    def _finish(self, response, start: float, stream: bool):
+        if stream:
+            return _MeteredStream(self, response, start)
+        self._record(start, _usage(response))
+        return response
+
+    def generate_content(self, prompt, temperature: Optional[float] = None, stream: bool = False,
+                         timeout: Optional[float] = None):
+        """단일 요청 (timeout은 재시도를 포함한 전체 마감 시간, 기본 deadline_seconds)"""
+        response, start = self._call(
+            lambda attempt_timeout: self.backend.generate(prompt, temperature, stream, attempt_timeout),
+            timeout)
+        return self._finish(response, start, stream)
+
+    def start_chat(self, history: Optional[List[Dict[str, Any]]] = None) -> 'ChatSession':
+        return ChatSession(self, self.backend.start_chat(history or []))
+
+    def metrics(self) -> Dict[str, Any]:
+        """호출 수, 오류/재시도 수, 토큰 수, 지연 시간 분포"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            counters = dict(self._counters)
+
+        def percentile(q):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))], 1)
+
+        return {
+            'backend': self.backend.name,
+            'model': self.model_name,
+            **counters,
+            'latency_ms_avg': round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+            'latency_ms_p50': percentile(0.5),
+            'latency_ms_p99': percentile(0.99),
+        }
+
+
+class ChatSession:
+    """대화 세션 (메시지 전송에 클라이언트의 재시도/지표를 적용)"""
+
+    def __init__(self, client: LLMClient, session):
+        self._client = client
+        self._session = session
+
+    @property
+    def history(self):
+        return self._session.history
+
+    def send_message(self, content, temperature: Optional[float] = None, stream: bool = False,
+                     timeout: Optional[float] = None):
+        # 스트리밍은 응답이 시작되기 전에 난 오류만 재시도합니다. (이미 보낸 청크는 되돌릴 수 없음)
+        response, start = self._client._call(
+            lambda attempt_timeout: self._session.send(content, temperature, stream, attempt_timeout),
+            timeout)
+        return self._client._finish(response, start, stream)
+
+
+class _MeteredStream:
+    """스트리밍 응답을 그대로 넘기면서 끝났을 때 지연 시간/토큰 수를 기록"""
+
+    def __init__(self, client: LLMClient, response, start: float):
+        self._client = client
+        self._response = response
+        self._start = start
+
+    def __iter__(self) -> Iterator:
+        usage = None
+        try:
+            for chunk in self._response:
+                usage = _usage(chunk)
+                yield chunk
+        except Exception:
+            self._client._record(self._start, error=True)
+            raise
+        self._client._record(self._start, usage)
+
+
+# --- 프로세스 공용 클라이언트 ---
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def resolve_settings(config: Dict[str, Any], default_model: str) -> Dict[str, Any]:
+    """앱마다 다른 설정 형식(gemini.api_key / 최상위 api_key)을 하나로 정리"""
+    gemini = config.get('gemini') or {}
+    llm = config.get('llm') or {}
+    return {
+        'backend': os.environ.get('LLM_BACKEND') or llm.get('backend', 'gemini'),
+        'api_key': gemini.get('api_key') or config.get('api_key') or '',
+        'model': gemini.get('model') or config.get('model') or default_model,
+        'transport': llm.get('transport'),
+        'timeout_seconds': float(llm.get('timeout_seconds', 30)),
+        'deadline_seconds': float(llm.get('deadline_seconds', 60)),
+        'max_retries': int(llm.get('max_retries', 3)),
+        'backoff_base_seconds': float(llm.get('backoff_base_seconds', 0.5)),
+        'backoff_max_seconds': float(llm.get('backoff_max_seconds', 8)),
+        'fake_latency_ms': float(llm.get('fake_latency_ms', 0)),
+        'fake_failure_rate': float(llm.get('fake_failure_rate', 0)),
+    }
+
+
+def create_client(config: Dict[str, Any], default_model: str = 'gemini-1.5-flash') -> LLMClient:
+    """설정으로 새 클라이언트 생성 (보통은 get_client를 사용)"""
+    settings = resolve_settings(config, default_model)
+
+    if settings['backend'] == 'fake':
+        backend = FakeBackend(settings['model'], settings['fake_latency_ms'], settings['fake_failure_rate'])
+    elif settings['backend'] == 'gemini':
+        if settings['api_key'] in PLACEHOLDER_KEYS:
+            raise LLMConfigError("Gemini API 키가 설정되지 않았습니다.")
+        backend = GeminiBackend(settings['api_key'], settings['model'], settings['transport'])
+    else:
+        raise LLMConfigError(f"알 수 없는 LLM 백엔드입니다: {settings['backend']}")
+
+    return LLMClient(
+        backend, settings['model'],
+        timeout_seconds=settings['timeout_seconds'],
+        deadline_seconds=settings['deadline_seconds'],
+        max_retries=settings['max_retries'],
+        backoff_base_seconds=settings['backoff_base_seconds'],
+        backoff_max_seconds=settings['backoff_max_seconds'],
+    )
+
+
+def get_client(config: Dict[str, Any], default_model: str = 'gemini-1.5-flash') -> LLMClient:
+    """프로세스 공용 클라이언트 (설정이 모두 같으면 한 번만 생성)"""
+    settings = resolve_settings(config, default_model)
+    key = tuple(sorted(settings.items()))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = create_client(config, default_model)
+        return client
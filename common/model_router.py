@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""요청마다 모델 등급(tier)을 고르는 라우터
+
+- 요청의 복잡도를 값싼 로컬 특징(프롬프트 길이, 규칙 기반 점수가 경계선에 가까운 정도,
+  사용자 등급)으로 0~1 점수로 만들고, 그 점수를 감당할 수 있는 가장 싼 등급을 고릅니다.
+- 등급마다 최근 지연 시간을 기록해 목표(latency_slo_ms)를 넘기거나 오류가 나면 잠시
+  (cooldown_seconds) 그 등급을 건너뛰고 아래(더 빠르고 싼) 등급으로 내려갑니다.
+  호출이 실패하거나 마감 시간을 넘겨도 바로 아래 등급으로 다시 요청합니다.
+- 등급별 호출 수, 대체 처리 수, 지연 시간, 토큰 수, 예상 비용을 집계합니다. (metrics)
+
+LLMClient와 같은 모양(generate_content / start_chat / metrics)이므로 앱에서는 클라이언트
+대신 그대로 쓸 수 있습니다. 설정 예 (각 앱의 config.yaml):
+
+    router:
+      enabled: true
+      cooldown_seconds: 30
+      tiers:                     # 싼 등급 -> 비싼 등급 순서
+        - name: lite
+          model: gemini-2.5-flash-lite
+          max_complexity: 0.35
+          latency_slo_ms: 4000
+          cost_per_1k_input: 0.0001
+          cost_per_1k_output: 0.0004
+        - name: pro
+          model: gemini-2.5-pro
+          max_complexity: 1.0
+          latency_slo_ms: 15000
+          deadline_seconds: 30
+          cost_per_1k_input: 0.00125
+          cost_per_1k_output: 0.01
+
+router 섹션이 없으면 기존 모델 하나만 쓰는 등급 하나로 동작합니다.
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .llm_client import _usage, get_client
+
+# 사용자 등급별 복잡도 가산점 (유료/우선 고객은 더 좋은 모델로)
+USER_TIER_BOOST = {'premium': 0.3, 'vip': 0.3}
+
+
+class RouteFeatures(NamedTuple):
+    """라우팅에 쓰는 요청 특징 (모두 요청 처리 중에 이미 알고 있는 값)"""
+    prompt_chars: int = 0
+    borderline: float = 0.0     # 0(결과가 분명함) ~ 1(규칙 기반 판단이 경계선)
+    user_tier: Optional[str] = None
+
+
+class Tier:
+    """모델 등급 하나와 최근 지연 시간/집계"""
+
+    def __init__(self, name: str, client, max_complexity: float = 1.0,
+                 latency_slo_ms: Optional[float] = None, deadline_seconds: Optional[float] = None,
+                 cost_per_1k_input: float = 0.0, cost_per_1k_output: float = 0.0, window: int = 50):
+        self.name = name
+        self.client = client
+        self.max_complexity = max_complexity
+        self.latency_slo_ms = latency_slo_ms
+        self.deadline_seconds = deadline_seconds
+        self.cost_per_1k_input = cost_per_1k_input
+        self.cost_per_1k_output = cost_per_1k_output
+
+        self.recent = deque(maxlen=window)      # SLO 판단용 최근 지연 시간
+        self.latencies = deque(maxlen=2000)     # 보고용 지연 시간
+        self.skip_until = 0.0
+        self.counters = {'calls': 0, 'errors': 0, 'fallbacks': 0, 'slo_misses': 0,
+                         'prompt_tokens': 0, 'output_tokens': 0}
+        self.cost = 0.0
+
+
+class ModelRouter:
+    """복잡도와 지연 시간 목표로 모델 등급을 고르는 라우터 (create_router로 생성)"""
+
+    def __init__(self, tiers: List[Tier], prompt_chars_scale: int = 6000, slo_quantile: float = 0.9,
+                 min_samples: int = 5, cooldown_seconds: float = 30.0):
+        if not tiers:
+            raise ValueError("라우터에는 등급이 하나 이상 필요합니다.")
+        self.tiers = tiers
+        self.prompt_chars_scale = prompt_chars_scale
+        self.slo_quantile = slo_quantile
+        self.min_samples = min_samples
+        self.cooldown_seconds = cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # --- 등급 선택 ---
+
+    def complexity(self, features: RouteFeatures) -> float:
+        size = min(features.prompt_chars / self.prompt_chars_scale, 1.0)
+        score = 0.5 * size + 0.5 * min(max(features.borderline, 0.0), 1.0)
+        score += USER_TIER_BOOST.get((features.user_tier or '').lower(), 0.0)
+        return min(score, 1.0)
+
+    def preferred_index(self, features: RouteFeatures) -> int:
+        score = self.complexity(features)
+        for index, tier in enumerate(self.tiers):
+            if score <= tier.max_complexity:
+                return index
+        return len(self.tiers) - 1
+
+    def _healthy(self, tier: Tier) -> bool:
+        """최근 지연 시간이 목표 안에 있는지 (넘으면 cooldown 동안 건너뜀)"""
+        now = time.monotonic()
+        with self._lock:
+            if now < tier.skip_until:
+                return False
+            if tier.latency_slo_ms is None or len(tier.recent) < self.min_samples:
+                return True
+            latencies = sorted(tier.recent)
+            observed = latencies[min(len(latencies) - 1, int(len(latencies) * self.slo_quantile))]
+            if observed <= tier.latency_slo_ms:
+                return True
+            # cooldown이 끝나면 기록을 비우고 다시 시도해 회복 여부를 확인합니다.
+            tier.skip_until = now + self.cooldown_seconds
+            tier.recent.clear()
+            return False
+
+    def plan(self, features: RouteFeatures) -> List[Tier]:
+        """시도할 등급 순서: 선호 등급부터 아래 등급으로 (느린 등급은 뒤로)"""
+        preferred = self.preferred_index(features)
+        candidates = [self.tiers[index] for index in range(preferred, -1, -1)]
+        healthy = [tier for tier in candidates if self._healthy(tier)]
+        return healthy + [tier for tier in candidates if tier not in healthy]
+
+    @property
+    def last_route(self) -> Optional[str]:
+        """현재 스레드에서 마지막으로 응답한 등급 이름"""
+        return getattr(self._local, 'route', None)
+
+    # --- 기록 ---
+
+    def _record(self, tier: Tier, start: float, usage: Optional[Dict[str, int]] = None,
+                error: bool = False, fallback: bool = False):
+        latency_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            tier.counters['calls'] += 1
+            tier.latencies.append(latency_ms)
+            tier.recent.append(latency_ms)
+            if fallback:
+                tier.counters['fallbacks'] += 1
+            if tier.latency_slo_ms is not None and latency_ms > tier.latency_slo_ms:
+                tier.counters['slo_misses'] += 1
+            if error:
+                tier.counters['errors'] += 1
+                tier.skip_until = time.monotonic() + self.cooldown_seconds
+            if usage:
+                tier.counters['prompt_tokens'] += usage['prompt_tokens']
+                tier.counters['output_tokens'] += usage['output_tokens']
+                tier.cost += (usage['prompt_tokens'] * tier.cost_per_1k_input
+                              + usage['output_tokens'] * tier.cost_per_1k_output) / 1000
+        if not error:
+            self._local.route = tier.name
+
+    def _run(self, operation, features: Optional[RouteFeatures], stream: bool, timeout: Optional[float]):
+        """operation(tier, timeout)을 계획한 순서대로 시도 (실패하면 아래 등급으로)"""
+        features = features or RouteFeatures()
+        # 모든 등급이 실패하면 이전 요청의 등급이 남지 않도록 호출마다 초기화합니다.
+        self._local.route = None
+        preferred = self.tiers[self.preferred_index(features)]
+        last_error = None
+        for tier in self.plan(features):
+            # 선호 등급이 느리거나 실패해서 대신 처리한 경우
+            fallback = tier is not preferred
+            start = time.perf_counter()
+            try:
+                response = operation(tier, timeout or tier.deadline_seconds)
+            except Exception as e:
+                self._record(tier, start, error=True, fallback=fallback)
+                print(f"모델 등급 '{tier.name}' 호출 실패, 아래 등급으로 전환: {e}")
+                last_error = e
+                continue
+            if stream:
+                return _RoutedStream(self, tier, response, start, fallback)
+            self._record(tier, start, _usage(response), fallback=fallback)
+            return response
+        raise last_error
+
+    # --- LLMClient와 같은 인터페이스 ---
+
+    def generate_content(self, prompt, temperature: Optional[float] = None, stream: bool = False,
+                         timeout: Optional[float] = None, features: Optional[RouteFeatures] = None):
+        if features is None:
+            features = RouteFeatures(prompt_chars=len(prompt) if isinstance(prompt, str) else 0)
+        return self._run(
+            lambda tier, tier_timeout: tier.client.generate_content(
+                prompt, temperature=temperature, stream=stream, timeout=tier_timeout),
+            features, stream, timeout)
+
+    def start_chat(self, history: Optional[List[Dict[str, Any]]] = None,
+                   features: Optional[RouteFeatures] = None) -> 'RoutedChat':
+        return RoutedChat(self, history or [], features)
+
+    def metrics(self) -> Dict[str, Any]:
+        """등급별 호출 수, 대체 처리 수, 지연 시간, 토큰 수, 예상 비용"""
+        routes = []
+        now = time.monotonic()
+        with self._lock:
+            for tier in self.tiers:
+                latencies = sorted(tier.latencies)
+
+                def percentile(q):
+                    if not latencies:
+                        return 0.0
+                    return round(latencies[min(len(latencies) - 1, int(len(latencies) * q))], 1)
+
+                routes.append({
+                    'tier': tier.name,
+                    'model': tier.client.model_name,
+                    'backend': tier.client.backend.name,
+                    **tier.counters,
+                    'cost_usd': round(tier.cost, 6),
+                    'latency_slo_ms': tier.latency_slo_ms,
+                    'latency_ms_p50': percentile(0.5),
+                    'latency_ms_p99': percentile(0.99),
+                    'skipped_for_seconds': round(max(tier.skip_until - now, 0.0), 1),
+                })
+        return {'routes': routes, 'total_cost_usd': round(sum(route['cost_usd'] for route in routes), 6)}
+
+
+class RoutedChat:
+    """등급별 대화 세션 (다른 등급으로 넘어가면 같은 히스토리로 세션을 새로 만듦)"""
+
+    def __init__(self, router: ModelRouter, history: List[Dict[str, Any]],
+                 features: Optional[RouteFeatures]):
+        self._router = router
+        self._history = history
+        self._features = features
+        self._sessions = {}
+
+    def _session(self, tier: Tier):
+        session = self._sessions.get(tier.name)
+        if session is None:
+            session = self._sessions[tier.name] = tier.client.start_chat(self._history)
+        return session
+
+    def send_message(self, content, temperature: Optional[float] = None, stream: bool = False,
+                     timeout: Optional[float] = None):
+        features = self._features
+        if features is None:
+            history_chars = sum(len(str(part)) for message in self._history for part in message.get('parts', []))
+            features = RouteFeatures(prompt_chars=history_chars + len(str(content)))
+        return self._router._run(
+            lambda tier, tier_timeout: self._session(tier).send_message(
+                content, temperature=temperature, stream=stream, timeout=tier_timeout),
+            features, stream, timeout)
+
+
+class _RoutedStream:
+    """스트리밍 응답을 그대로 넘기면서 끝났을 때 등급별 지연 시간/토큰 수를 기록"""
+
+    def __init__(self, router: ModelRouter, tier: Tier, response, start: float, fallback: bool):
+        self._router = router
+        self._tier = tier
+        self._response = response
+        self._start = start
+        self._fallback = fallback
+
+    def __iter__(self):
+        usage = None
+        try:
+            for chunk in self._response:
+                usage = _usage(chunk)
+                yield chunk
+        except Exception:
+            self._router._record(self._tier, self._start, error=True, fallback=self._fallback)
+            raise
+        self._router._record(self._tier, self._start, usage, fallback=self._fallback)
+
+
+def create_router(config: Dict[str, Any], default_model: str = 'gemini-1.5-flash') -> ModelRouter:
+    """설정의 router 섹션으로 라우터 생성 (등급마다 프로세스 공용 클라이언트 사용)
+
+    router 섹션이 없거나 꺼져 있으면 기존 설정의 모델 하나로 된 등급 하나를 만듭니다.
+    API 키가 없으면 get_client처럼 LLMConfigError를 냅니다.
+    """
+    router_config = config.get('router') or {}
+    tier_configs = router_config.get('tiers') or []
+    if not router_config.get('enabled', True) or not tier_configs:
+        return ModelRouter([Tier('default', get_client(config, default_model))])
+
+    tiers = []
+    for tier_config in tier_configs:
+        # 등급의 모델만 바꾼 설정으로 클라이언트를 만듭니다. (API 키, 재시도 설정은 공유)
+        tier_model_config = {**config, 'gemini': {**(config.get('gemini') or {}), 'model': tier_config['model']}}
+        slo = tier_config.get('latency_slo_ms')
+        deadline = tier_config.get('deadline_seconds')
+        tiers.append(Tier(
+            name=tier_config.get('name', tier_config['model']),
+            client=get_client(tier_model_config, default_model),
+            max_complexity=float(tier_config.get('max_complexity', 1.0)),
+            latency_slo_ms=float(slo) if slo is not None else None,
+            deadline_seconds=float(deadline) if deadline is not None else None,
+            cost_per_1k_input=float(tier_config.get('cost_per_1k_input', 0.0)),
+            cost_per_1k_output=float(tier_config.get('cost_per_1k_output', 0.0)),
+            window=int(router_config.get('window', 50)),
+        ))
+    return ModelRouter(
+        tiers,
+        prompt_chars_scale=int(router_config.get('prompt_chars_scale', 6000)),
+        slo_quantile=float(router_config.get('slo_quantile', 0.9)),
+        min_samples=int(router_config.get('min_samples', 5)),
+        cooldown_seconds=float(router_config.get('cooldown_seconds', 30)),
+    )
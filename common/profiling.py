@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""실행 중인 워커를 재시작하지 않고 켜고 끄는 프로파일링 훅
+
+- 요청 단위 cProfile: 관리자 토큰과 함께 X-Profile: 1 헤더를 보내거나, 샘플링 비율을 켜면
+  해당 요청을 cProfile로 측정해 .prof(pstats) 파일로 저장합니다. 측정한 요청들은 하나의
+  누적 프로파일에도 합쳐집니다. (snakeviz, flameprof, tuna 등으로 확인)
+- 주기적 스택 샘플러: 모든 스레드의 호출 스택을 일정 간격으로 수집해 collapsed stack 형식
+  ("a;b;c 횟수")으로 저장합니다. (flamegraph.pl, speedscope, inferno로 불꽃 그래프 생성)
+
+관리 API (X-Admin-Token 헤더 필요, 설정된 토큰이 없으면 모두 비활성):
+    POST /admin/profiling/config          {"sample_rate": 0.05}
+    POST /admin/profiling/sampler/start   {"interval_ms": 10, "duration_seconds": 60}
+    POST /admin/profiling/sampler/stop
+    GET  /admin/profiling/profiles
+    GET  /admin/profiling/profiles/<name>
+
+설정은 요청을 받은 워커 프로세스에만 적용되며, 파일 이름에 프로세스 ID가 들어갑니다.
+"""
+
+import cProfile
+import hmac
+import itertools
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Optional
+
+from flask import abort, g, jsonify, request, send_from_directory
+
+
+class StackSampler:
+    """일정 간격으로 모든 스레드의 스택을 모으는 샘플링 프로파일러
+
+    sys._current_frames()를 읽기만 하므로 측정 대상 코드에는 추적 오버헤드가 없습니다.
+    """
+
+    def __init__(self, interval_seconds: float = 0.01):
+        self.interval_seconds = interval_seconds
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration_seconds: Optional[float] = None):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(duration_seconds,),
+                                        name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    @staticmethod
+    def _collapse(frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        names.reverse()
+        return ';'.join(names)
+
+    def _run(self, duration_seconds: Optional[float]):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration_seconds if duration_seconds else None
+        while not self._stop.wait(self.interval_seconds):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.counts[self._collapse(frame)] += 1
+            self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w', encoding='utf-8') as file:
+            for stack, count in self.counts.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Flask 앱에 붙이는 프로파일링 관리자 (init_profiling으로 생성)"""
+
+    def __init__(self, app_name: str, output_dir: str, admin_token: Optional[str] = None,
+                 sample_rate: float = 0.0, max_request_profiles: int = 50):
+        self.app_name = app_name
+        self.output_dir = os.path.abspath(output_dir)
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.max_request_profiles = max_request_profiles
+
+        # cProfile은 한 번에 하나만 켜 두어 측정 오버헤드가 여러 요청에 겹치지 않도록 합니다.
+        self._profile_lock = threading.Lock()
+        self._aggregate_lock = threading.Lock()
+        self._aggregate: Optional[pstats.Stats] = None
+        self.profiled_requests = 0
+        self._file_seq = itertools.count(1)
+
+        self.sampler: Optional[StackSampler] = None
+
+    # --- 권한 ---
+
+    def is_admin(self) -> bool:
+        token = request.headers.get('X-Admin-Token', '')
+        return bool(self.admin_token) and hmac.compare_digest(token, self.admin_token)
+
+    def _require_admin(self):
+        if not self.is_admin():
+            abort(403)
+
+    # --- 파일 ---
+
+    def _path(self, suffix: str) -> str:
+        """겹치지 않는 결과 파일 경로 (같은 밀리초에 저장해도 순번으로 구분)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        now = time.time()
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+        return os.path.join(self.output_dir,
+                            f"{self.app_name}-{os.getpid()}-{stamp}-{next(self._file_seq)}-{suffix}")
+
+    def _prune_request_profiles(self):
+        prefix = f"{self.app_name}-{os.getpid()}-"
+        files = sorted(
+            (name for name in os.listdir(self.output_dir)
+             if name.startswith(prefix) and name.endswith('.prof') and not name.endswith('requests.prof')),
+            key=lambda name: os.path.getmtime(os.path.join(self.output_dir, name))
+        )
+        for name in files[:-self.max_request_profiles]:
+            os.remove(os.path.join(self.output_dir, name))
+
+    # --- 요청 단위 cProfile ---
+
+    def _should_profile(self) -> bool:
+        if request.path.startswith('/admin/profiling'):
+            return False
+        if request.headers.get('X-Profile') == '1' and self.is_admin():
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def before_request(self):
+        if not self._should_profile() or not self._profile_lock.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 다른 프로파일러가 이미 켜져 있으면 이번 요청은 측정하지 않습니다.
+            self._profile_lock.release()
+            return
+        g._profile = profile
+        g._profile_started = time.perf_counter()
+
+    def after_request(self, response):
+        # 스트리밍 응답은 본문을 다 보낸 뒤(call_on_close)에 측정을 끝내 생성 시간까지 포함합니다.
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            finish = self._finisher(profile, g.pop('_profile_started'), request.endpoint)
+            if response.is_streamed:
+                response.call_on_close(finish)
+            else:
+                finish()
+        return response
+
+    def teardown_request(self, error=None):
+        # 예외로 after_request가 실행되지 않은 경우 측정을 정리합니다.
+        profile = g.pop('_profile', None)
+        if profile is not None:
+            self._finisher(profile, g.pop('_profile_started'), request.endpoint)()
+
+    def _finisher(self, profile: cProfile.Profile, started: float, endpoint: Optional[str]):
+        def finish():
+            try:
+                profile.disable()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                name = re.sub(r'[^A-Za-z0-9_.-]+', '_', endpoint or 'unknown')
+                profile.dump_stats(self._path(f"{name}-{elapsed_ms:.0f}ms.prof"))
+
+                with self._aggregate_lock:
+                    if self._aggregate is None:
+                        self._aggregate = pstats.Stats(profile)
+                    else:
+                        self._aggregate.add(profile)
+                    self._aggregate.dump_stats(os.path.join(
+                        self.output_dir, f"{self.app_name}-{os.getpid()}-requests.prof"))
+                    self.profiled_requests += 1
+                self._prune_request_profiles()
+            except Exception as e:
+                print(f"프로파일 저장 오류: {e}")
+            finally:
+                self._profile_lock.release()
+        return finish
+
+    # --- 관리 API ---
+
+    def update_config(self):
+        self._require_admin()
+        data = request.get_json(silent=True) or {}
+        if 'sample_rate' in data:
+            self.sample_rate = min(max(float(data['sample_rate']), 0.0), 1.0)
+        return jsonify(self.status())
+
+    def start_sampler(self):
+        self._require_admin()
+        if self.sampler is not None and self.sampler.running:
+            return jsonify({'error': '스택 샘플러가 이미 실행 중입니다.'}), 409
+
+        data = request.get_json(silent=True) or {}
+        interval_ms = min(max(float(data.get('interval_ms', 10)), 1.0), 1000.0)
+        duration = data.get('duration_seconds', 60)
+        self.sampler = StackSampler(interval_ms / 1000)
+        self.sampler.start(float(duration) if duration else None)
+        return jsonify(self.status())
+
+    def stop_sampler(self):
+        self._require_admin()
+        if self.sampler is None:
+            return jsonify({'error': '실행한 스택 샘플러가 없습니다.'}), 409
+
+        self.sampler.stop()
+        path = self._path('stacks.collapsed')
+        self.sampler.write_collapsed(path)
+        result = {'file': os.path.basename(path), 'samples': self.sampler.samples,
+                  'stacks': len(self.sampler.counts)}
+        self.sampler = None
+        return jsonify(result)
+
+    def list_profiles(self):
+        self._require_admin()
+        if not os.path.isdir(self.output_dir):
+            return jsonify({'profiles': []})
+        profiles = [
+            {'name': name, 'bytes': os.path.getsize(os.path.join(self.output_dir, name))}
+            for name in sorted(os.listdir(self.output_dir))
+        ]
+        return jsonify({'profiles': profiles})
+
+    def download_profile(self, name: str):
+        self._require_admin()
+        return send_from_directory(self.output_dir, name, as_attachment=True)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'pid': os.getpid(),
+            'sample_rate': self.sample_rate,
+            'profiled_requests': self.profiled_requests,
+            'sampler_running': self.sampler is not None and self.sampler.running,
+            'sampler_samples': self.sampler.samples if self.sampler is not None else 0,
+        }
+
+
+def init_profiling(app, config: Optional[Dict[str, Any]] = None) -> Profiler:
+    """Flask 앱에 프로파일링 훅과 관리 API 등록
+
+    config는 앱 설정의 profiling 섹션입니다.
+    (admin_token, output_dir, sample_rate, max_request_profiles, 토큰은 PROFILING_ADMIN_TOKEN 환경 변수로도 지정)
+    """
+    config = config or {}
+    profiler = Profiler(
+        app_name=config.get('app_name', app.name),
+        output_dir=config.get('output_dir', os.path.join(app.root_path, 'profiles')),
+        admin_token=os.environ.get('PROFILING_ADMIN_TOKEN') or config.get('admin_token'),
+        sample_rate=float(config.get('sample_rate', 0.0)),
+        max_request_profiles=int(config.get('max_request_profiles', 50)),
+    )
+
+    app.before_request(profiler.before_request)
+    app.after_request(profiler.after_request)
+    app.teardown_request(profiler.teardown_request)
+
+    app.add_url_rule('/admin/profiling/config', 'profiling_config',
+                     profiler.update_config, methods=['POST'])
+    app.add_url_rule('/admin/profiling/sampler/start', 'profiling_sampler_start',
+                     profiler.start_sampler, methods=['POST'])
+    app.add_url_rule('/admin/profiling/sampler/stop', 'profiling_sampler_stop',
+                     profiler.stop_sampler, methods=['POST'])
+    app.add_url_rule('/admin/profiling/profiles', 'profiling_profiles',
+                     profiler.list_profiles, methods=['GET'])
+    app.add_url_rule('/admin/profiling/profiles/<name>', 'profiling_profile',
+                     profiler.download_profile, methods=['GET'])
+    return profiler
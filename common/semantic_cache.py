@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+# 문장부호/기호 제거용 (한글, 영문, 숫자, 공백만 남김)
+NON_WORD_PATTERN = re.compile(r'[^\w\s]', re.UNICODE)
+SPACE_PATTERN = re.compile(r'\s+')
+# 어절 끝의 조사/어미 (의미 비교에 방해가 되는 부분)
+PARTICLE_PATTERN = re.compile(r'(은|는|이|가|을|를|에|에서|의|도|요)$')
+# 질문의 의미와 상관없이 자주 붙는 표현
+FILLER_WORDS = {
+    '어때요', '어때', '어떤가요', '어떨까요', '어떻게', '알려주세요', '궁금해요',
+    '봐주세요', '할까요', '뭔가요', '무엇인가요',
+}
+# 한쪽 질문에만 있으면 뜻이 달라지는 부정 표현
+NEGATION_WORDS = {'안', '못', 'not', 'no', 'never', 'dont', 'doesnt', 'isnt', 'cant', 'wont'}
+NEGATION_PREFIXES = ('않', '없', '못')
+
+
+def normalize_question(text: str) -> str:
+    """질문 정규화 (유니코드 정규화, 소문자, 문장부호 제거, 공백 정리)"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    text = NON_WORD_PATTERN.sub(' ', text)
+    return SPACE_PATTERN.sub(' ', text).strip()
+
+
+def tokenize_question(normalized: str) -> List[str]:
+    """정규화된 질문을 어절 단위로 나누고 조사와 상투적 표현을 제거"""
+    tokens = []
+    for word in normalized.split():
+        if word in FILLER_WORDS:
+            continue
+        if len(word) >= 2:
+            word = PARTICLE_PATTERN.sub('', word)
+        tokens.append(word)
+    return tokens
+
+
+def _same_word(a: str, b: str) -> bool:
+    """조사/어미만 다른 같은 단어인지 (한쪽이 다른 쪽의 앞부분, 2글자 이상)"""
+    shorter, longer = sorted((a, b), key=len)
+    return len(shorter) >= 2 and longer.startswith(shorter)
+
+
+def _is_sensitive(token: str) -> bool:
+    """숫자나 부정 표현처럼 한 단어만 달라도 답이 달라지는 토큰"""
+    return any(ch.isdigit() for ch in token) or token in NEGATION_WORDS or token.startswith(NEGATION_PREFIXES)
+
+
+def tokens_conflict(a: List[str], b: List[str]) -> bool:
+    """임베딩이 가까워도 다른 질문으로 봐야 하는지 검사
+
+    - 양쪽에 서로 다른 핵심 단어가 있으면 (France / Spain, 연애운 / 금전운) 다른 질문입니다.
+    - 숫자나 부정 표현이 한쪽에만 있어도 다른 질문입니다.
+    - 한쪽에만 있는 일반 단어("오늘 운세" / "오늘 하루 운세")는 허용합니다.
+    """
+    only_a, only_b = set(a) - set(b), set(b) - set(a)
+    unmatched_a = {t for t in only_a if not any(_same_word(t, u) for u in only_b)}
+    unmatched_b = {t for t in only_b if not any(_same_word(t, u) for u in only_a)}
+    if any(_is_sensitive(token) for token in unmatched_a | unmatched_b):
+        return True
+    return bool(unmatched_a and unmatched_b)
+
+
+def _stable_hash(value: str) -> int:
+    """프로세스마다 달라지지 않는 해시 (hash()는 PYTHONHASHSEED에 따라 바뀜)"""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+class HashedNgramEmbedder:
+    """어절과 어절 내부의 문자 n-gram을 해시하여 만드는 로컬 CPU 임베딩 (희소 벡터, L2 정규화)
+
+    "오늘 운세 어때요?" / "오늘 하루 운세는?"처럼 조사나 어미만 다른 질문은 가깝게,
+    "연애운" / "금전운"처럼 핵심 단어가 다른 질문은 멀게 만드는 것이 목표입니다.
+    """
+
+    def __init__(self, dim: int = 4096, word_weight: float = 2.0,
+                 ngram_weights: Tuple[float, ...] = (0.5, 1.0)):
+        self.dim = dim
+        self.word_weight = word_weight
+        # ngram_weights[n - 1]이 문자 n-gram의 가중치입니다.
+        self.ngram_weights = ngram_weights
+
+    def _add(self, vector: Dict[int, float], feature: str, weight: float):
+        h = _stable_hash(feature)
+        index = h % self.dim
+        # 부호 해싱으로 충돌에 의한 편향을 줄입니다.
+        sign = 1.0 if (h >> 63) & 1 else -1.0
+        vector[index] = vector.get(index, 0.0) + sign * weight
+
+    def embed(self, normalized: str) -> Dict[int, float]:
+        """정규화된 질문을 {차원: 가중치} 희소 벡터로 변환"""
+        vector = {}
+        for token in tokenize_question(normalized):
+            self._add(vector, 'w:' + token, self.word_weight)
+            for n, weight in enumerate(self.ngram_weights, 1):
+                for i in range(len(token) - n + 1):
+                    self._add(vector, f'{n}:{token[i:i + n]}', weight)
+
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        if norm == 0:
+            return {}
+        return {index: w / norm for index, w in vector.items()}
+
+
+def cosine_similarity(a: Dict[int, float], b: Dict[int, float]) -> float:
+    """정규화된 희소 벡터의 코사인 유사도"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(index, 0.0) for index, w in a.items())
+
+
+class LSHIndex:
+    """랜덤 초평면 LSH 기반 근사 최근접 이웃 인덱스
+
+    초평면은 저장하지 않고 (차원, 테이블, 비트)에서 해시로 부호를 만들어 사용하므로
+    차원 수와 상관없이 메모리를 거의 쓰지 않습니다. 차원별 부호 캐시는 설정이 같은 인덱스끼리
+    (plane_signs로) 공유할 수 있습니다.
+    """
+
+    def __init__(self, num_tables: int = 16, bits_per_table: int = 8, plane_signs: Optional[dict] = None):
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.total_bits = num_tables * bits_per_table
+        self.tables = [dict() for _ in range(num_tables)]
+        self._plane_signs = {} if plane_signs is None else plane_signs
+
+    def _signs(self, index: int) -> Tuple[float, ...]:
+        """차원 index에 대한 모든 초평면의 성분 (+1/-1, 캐시)"""
+        signs = self._plane_signs.get(index)
+        if signs is None:
+            digest = hashlib.blake2b(str(index).encode('ascii'),
+                                     digest_size=(self.total_bits + 7) // 8).digest()
+            bits = int.from_bytes(digest, 'little')
+            signs = tuple(1.0 if (bits >> bit) & 1 else -1.0 for bit in range(self.total_bits))
+            self._plane_signs[index] = signs
+        return signs
+
+    def signature(self, vector: Dict[int, float]) -> List[int]:
+        """테이블별 버킷 키 계산"""
+        projections = [0.0] * self.total_bits
+        for index, w in vector.items():
+            projections = [p + w * sign for p, sign in zip(projections, self._signs(index))]
+
+        keys = []
+        for table in range(self.num_tables):
+            key = 0
+            offset = table * self.bits_per_table
+            for bit in range(self.bits_per_table):
+                if projections[offset + bit] > 0:
+                    key |= 1 << bit
+            keys.append(key)
+        return keys
+
+    def add(self, item_id: int, keys: List[int]):
+        for table, key in zip(self.tables, keys):
+            table.setdefault(key, set()).add(item_id)
+
+    def remove(self, item_id: int, keys: List[int]):
+        for table, key in zip(self.tables, keys):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del table[key]
+
+    def candidates(self, keys: List[int]) -> set:
+        result = set()
+        for table, key in zip(self.tables, keys):
+            result.update(table.get(key, ()))
+        return result
+
+
+class _Namespace:
+    """네임스페이스별 캐시 항목과 인덱스"""
+
+    def __init__(self, num_tables: int, bits_per_table: int, plane_signs: dict):
+        self.entries = OrderedDict()  # item_id -> (vector, keys, value, created_at, normalized), LRU 순서
+        self.exact = {}               # 정규화된 질문 -> item_id
+        self.index = LSHIndex(num_tables, bits_per_table, plane_signs)
+
+
+class SemanticCache:
+    """의미적으로 비슷한 질문(패러프레이즈)에 대해 이전 답변을 재사용하는 캐시
+
+    - 네임스페이스(예: 'chat', 'tarot:3')마다 완전히 분리된 인덱스를 사용합니다.
+    - 유사도가 threshold 이상인 가장 가까운 항목을 반환합니다. 단, 서로 다른 핵심 단어, 숫자, 부정 표현이
+      있는 항목(tokens_conflict)은 유사도가 높아도 건너뛰고, 만료된 항목은 지우고 다음 후보를 봅니다.
+    - max_entries를 넘으면 가장 오래 사용하지 않은 항목부터 제거하고, ttl_seconds가 지나면 만료됩니다.
+    """
+
+    def __init__(self, threshold: float = 0.8, max_entries: int = 10000,
+                 ttl_seconds: Optional[float] = None, num_tables: int = 16,
+                 bits_per_table: int = 8, embedder: HashedNgramEmbedder = None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.num_tables = num_tables
+        self.bits_per_table = bits_per_table
+        self.embedder = embedder or HashedNgramEmbedder()
+
+        self._namespaces = {}
+        # 초평면 부호는 (차원, 비트)로만 정해지므로 모든 네임스페이스가 같은 캐시를 씁니다.
+        # (네임스페이스마다 따로 두면 최대 dim x total_bits개의 값이 네임스페이스 수만큼 늘어남)
+        self._plane_signs = {}
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._conflicts = 0
+        self._lookup_ms = deque(maxlen=1000)
+
+    def _namespace(self, name: str) -> _Namespace:
+        namespace = self._namespaces.get(name)
+        if namespace is None:
+            namespace = self._namespaces[name] = _Namespace(self.num_tables, self.bits_per_table, self._plane_signs)
+        return namespace
+
+    def _remove(self, namespace: _Namespace, item_id: int):
+        vector, keys, value, created_at, normalized = namespace.entries.pop(item_id)
+        namespace.index.remove(item_id, keys)
+        if namespace.exact.get(normalized) == item_id:
+            del namespace.exact[normalized]
+
+    def _is_expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, namespace_name: str, question: str) -> Optional[Any]:
+        """비슷한 질문의 캐시된 답변 조회 (없으면 None)"""
+        start = time.perf_counter()
+        normalized = normalize_question(question)
+        vector = self.embedder.embed(normalized)
+
+        with self._lock:
+            namespace = self._namespaces.get(namespace_name)
+            best_id = None
+
+            if namespace is not None and vector:
+                now = time.time()
+                # 정확히 같은 질문은 인덱스를 거치지 않고 바로 찾습니다.
+                exact_id = namespace.exact.get(normalized)
+                if exact_id is not None:
+                    if self._is_expired(namespace.entries[exact_id][3], now):
+                        self._remove(namespace, exact_id)
+                    else:
+                        best_id = exact_id
+
+                if best_id is None:
+                    keys = namespace.index.signature(vector)
+                    scored = sorted(
+                        ((cosine_similarity(vector, namespace.entries[item_id][0]), item_id)
+                         for item_id in namespace.index.candidates(keys)),
+                        reverse=True
+                    )
+                    tokens = tokenize_question(normalized)
+                    # 가까운 순서로 보면서 만료되었거나 핵심 단어가 다른 후보는 건너뜁니다.
+                    for score, item_id in scored:
+                        if score < self.threshold:
+                            break
+                        entry = namespace.entries[item_id]
+                        if self._is_expired(entry[3], now):
+                            self._remove(namespace, item_id)
+                            continue
+                        if tokens_conflict(tokens, tokenize_question(entry[4])):
+                            self._conflicts += 1
+                            continue
+                        best_id = item_id
+                        break
+
+            if best_id is not None:
+                namespace.entries.move_to_end(best_id)
+                value = namespace.entries[best_id][2]
+                self._hits += 1
+            else:
+                value = None
+                self._misses += 1
+            self._lookup_ms.append((time.perf_counter() - start) * 1000)
+
+        return value
+
+    def put(self, namespace_name: str, question: str, value: Any):
+        """답변을 캐시에 저장"""
+        normalized = normalize_question(question)
+        vector = self.embedder.embed(normalized)
+        if not vector:
+            return
+
+        with self._lock:
+            namespace = self._namespace(namespace_name)
+            keys = namespace.index.signature(vector)
+
+            old_id = namespace.exact.get(normalized)
+            if old_id is not None:
+                self._remove(namespace, old_id)
+
+            item_id = self._next_id
+            self._next_id += 1
+            namespace.entries[item_id] = (vector, keys, value, time.time(), normalized)
+            namespace.exact[normalized] = item_id
+            namespace.index.add(item_id, keys)
+
+            while len(namespace.entries) > self.max_entries:
+                oldest_id = next(iter(namespace.entries))
+                self._remove(namespace, oldest_id)
+                self._evictions += 1
+
+    def prime(self):
+        """모든 차원의 초평면 부호를 미리 계산
+
+        부호 캐시는 최대 dim개까지 새 단어가 나올 때마다 조금씩 차므로, 장시간 실행 검사처럼
+        처음부터 가득 찬 상태가 필요할 때 부릅니다.
+        """
+        with self._lock:
+            index = LSHIndex(self.num_tables, self.bits_per_table, self._plane_signs)
+            for dim in range(self.embedder.dim):
+                index._signs(dim)
+
+    def clear(self, namespace_name: Optional[str] = None):
+        """캐시 비우기 (네임스페이스를 지정하지 않으면 전체)"""
+        with self._lock:
+            if namespace_name is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(namespace_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """적중률과 조회 지연 시간 통계 (임계값 튜닝용)"""
+        with self._lock:
+            total = self._hits + self._misses
+            latencies = sorted(self._lookup_ms)
+            return {
+                'threshold': self.threshold,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / total, 4) if total else 0.0,
+                'evictions': self._evictions,
+                'conflicts': self._conflicts,
+                'entries': {name: len(ns.entries) for name, ns in self._namespaces.items()},
+                'lookup_ms_avg': round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+                'lookup_ms_p50': round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+                'lookup_ms_p99': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3) if latencies else 0.0,
+            }
+
+
+def create_semantic_cache(config: Dict[str, Any]) -> SemanticCache:
+    """설정(semantic_cache 섹션)으로 캐시 생성"""
+    return SemanticCache(
+        threshold=config.get('similarity_threshold', 0.8),
+        max_entries=config.get('max_entries', 10000),
+        ttl_seconds=config.get('ttl_seconds'),
+    )
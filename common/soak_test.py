@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""장시간 실행 메모리 증가(누수) 검사
+
+앱 하나를 로컬 모델(LLM_BACKEND=fake)로 띄워 Flask 테스트 클라이언트로 요청을 계속 보내면서
+주기적으로 tracemalloc 스냅샷과 RSS를 기록합니다.
+
+- tracemalloc은 워밍업 전에 켭니다. 기준 시점 뒤에 켜면 워밍업 때 만든 캐시 항목이 교체되며 해제되는
+  양은 보이지 않고 새 항목만 잡혀서, 크기 제한이 있는 캐시도 계속 자라는 것처럼 보입니다.
+- 워밍업은 --warmup회 이후에도 --warmup-block회마다 증가량을 재서, 요청당 증가가 허용치 아래로
+  내려올 때까지(캐시가 가득 찰 때까지, 최대 --max-warmup회) 계속합니다. 실제 누수는 내려오지 않으므로
+  워밍업이 최대치까지 간 뒤 측정 구간에서도 그대로 실패합니다.
+- 워밍업 뒤의 스냅샷을 기준으로 할당 위치별 증가량 상위 항목을 출력합니다.
+- 후반부 표본(기본: 마지막 절반)으로 요청당 유지 메모리(바이트/요청)를 선형 회귀로 구하고,
+  허용치(기본 512B/요청)를 넘으면 종료 코드 1로 실패합니다. 로컬 모델로 잰 후반부 기울기는
+  tarot, loan, chatbot 모두 수십 B/요청 안팎이므로 허용치는 이보다 넉넉하게 잡았습니다.
+
+사용법 (저장소 루트에서 실행):
+    python -m common.soak_test --app tarot --duration 7200 --interval 60
+    python -m common.soak_test --app loan --requests 50000 --max-bytes-per-request 256
+    python -m common.soak_test --app chatbot --duration 600 --report soak_chatbot.json
+    python -m common.soak_test --app tarot-cli --requests 20000   (TarotChatbot 대화 기록)
+
+tarot/chatbot/tarot-cli는 --config를 주지 않으면 임시 디렉터리에 로컬 모델용 설정을 만들어 사용합니다.
+(의미 기반 캐시는 워밍업 안에 가득 차도록 max_entries를 작게 잡습니다. 설정 파일을 직접 주면
+ 캐시가 클수록 워밍업이 길어지므로 --max-warmup을 늘리세요)
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from common.semantic_cache import SemanticCache
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+APP_DIRS = {
+    'tarot': os.path.join(ROOT, 'tarot'),
+    'loan': os.path.join(ROOT, 'LOAN', 'loan_chatbot'),
+    'chatbot': os.path.join(ROOT, 'CHATBOT', 'backend'),
+    'tarot-cli': os.path.join(ROOT, 'tarot'),
+}
+APP_FILES = {'tarot-cli': 'tarot_chatbot.py'}
+
+QUESTIONS = [
+    "오늘 하루 운세는 어떤가요?", "이번 달 연애운이 궁금해요", "이직을 해도 될까요?",
+    "투자를 시작해도 괜찮을까요?", "건강 관리를 어떻게 해야 할까요?", "새로운 공부를 시작하려고 해요",
+]
+
+
+# --- 메모리 측정 ---
+
+def rss_bytes() -> Optional[int]:
+    """현재 RSS (리눅스는 /proc, 그 외에는 최대 RSS로 대신함)"""
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    except ImportError:
+        return None
+
+
+def take_snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    ])
+
+
+def slope(points: List[tuple]) -> float:
+    """(요청 수, 바이트) 표본의 최소제곱 기울기 (바이트/요청)"""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in points)
+    if var_x == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var_x
+
+
+def top_growth(snapshot, baseline, key_type: str, limit: int) -> List[Dict[str, Any]]:
+    stats = snapshot.compare_to(baseline, key_type)
+    return [
+        {
+            'site': str(stat.traceback.format()[-1].strip() if key_type == 'traceback' else stat.traceback),
+            'size_diff': stat.size_diff,
+            'count_diff': stat.count_diff,
+            'size': stat.size,
+        }
+        for stat in stats[:limit] if stat.size_diff > 0
+    ]
+
+
+# --- 앱 불러오기 ---
+
+def write_config(app_name: str, workdir: str) -> str:
+    """로컬 모델용 최소 설정 파일 (tarot, chatbot, tarot-cli는 작업 디렉터리의 config.yaml을 읽음)"""
+    import yaml
+
+    config: Dict[str, Any] = {
+        'llm': {'backend': 'fake'},
+        'semantic_cache': {'max_entries': 50},
+        'profiling': {'sample_rate': 0.0},
+    }
+    if app_name in ('tarot', 'tarot-cli'):
+        tarot_dir = APP_DIRS['tarot']
+        config.update({
+            'gemini': {'model': 'fake-tarot'},
+            'tarot': {
+                'cards_file': os.path.join(tarot_dir, 'tarot_cards.json'),
+                'interpretations_file': os.path.join(tarot_dir, 'interpretations.bin'),
+                'max_cards_per_reading': 3,
+            },
+            'chat': {'temperature': 0.7, 'max_history': 10,
+                     'history_db': os.path.join(workdir, 'soak_tarot_history.db')},
+        })
+    elif app_name == 'chatbot':
+        config.update({
+            'gemini': {'model': 'fake-chat'},
+            'history_db': os.path.join(workdir, 'soak_conversations.db'),
+        })
+
+    path = os.path.join(workdir, 'config.yaml')
+    with open(path, 'w', encoding='utf-8') as file:
+        yaml.safe_dump(config, file, allow_unicode=True)
+    return path
+
+
+def load_app(app_name: str, config_path: Optional[str]):
+    """앱 모듈 불러오기
+
+    tarot/chatbot/tarot-cli는 작업 디렉터리의 config.yaml을 읽으므로 설정 파일이 있는 디렉터리로 이동합니다.
+    """
+    os.environ['LLM_BACKEND'] = 'fake'
+    app_dir = APP_DIRS[app_name]
+    sys.path.insert(0, app_dir)
+
+    if app_name != 'loan':
+        if config_path is None:
+            workdir = tempfile.mkdtemp(prefix=f'soak-{app_name}-')
+            config_path = write_config(app_name, workdir)
+        os.chdir(os.path.dirname(os.path.abspath(config_path)))
+
+    module_name = 'soak_' + app_name.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(app_dir, APP_FILES.get(app_name, 'app.py')))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# --- 요청 생성 ---
+
+def question(rng: random.Random) -> str:
+    # 일부는 반복 질문(캐시 적중), 일부는 매번 다른 질문(캐시 채우기/교체)
+    base = rng.choice(QUESTIONS)
+    return base if rng.random() < 0.5 else f"{base} ({rng.randrange(1_000_000)})"
+
+
+def tarot_driver(module, rng: random.Random) -> Callable[[], int]:
+    client = module.app.test_client()
+
+    def send() -> int:
+        response = client.post('/api/tarot', json={
+            'question': question(rng),
+            'num_cards': rng.choice([1, 2, 3]),
+            'mode': rng.choice(['fast', 'full']),
+            'view': rng.choice(['summary', None]),
+        }, headers={'Accept-Encoding': rng.choice(['gzip', 'identity'])})
+        return response.status_code
+    return send
+
+
+def loan_driver(module, rng: random.Random) -> Callable[[], int]:
+    client = module.app.test_client()
+    purposes = ['생활자금', '주택구입', '전세자금', '사업자금', '학자금', '부채정리']
+
+    def applicant() -> Dict[str, Any]:
+        return {
+            'age': rng.randint(17, 70),
+            'annual_income': rng.randrange(10_000_000, 150_000_000, 1_000_000),
+            'credit_score': rng.randint(450, 950),
+            'desired_amount': rng.randrange(3_000_000, 120_000_000, 1_000_000),
+            'monthly_debt': rng.randrange(0, 3_000_000, 50_000),
+            'loan_purpose': rng.choice(purposes),
+        }
+
+    def send() -> int:
+        if rng.random() < 0.1:
+            # 비동기 작업 경로 (멱등성 키 재사용 포함)
+            key = f"soak-{rng.randrange(1000)}"
+            response = client.post('/api/loan-check/jobs', json=applicant(), headers={'Idempotency-Key': key})
+            if response.status_code in (200, 202):
+                job = response.get_json()
+                client.get(f"{job['status_url']}?wait=5&view=summary")
+            return 200 if response.status_code == 409 else response.status_code
+        response = client.post('/api/loan-check', json={**applicant(), 'view': rng.choice(['summary', None])})
+        return response.status_code
+    return send
+
+
+def chatbot_driver(module, rng: random.Random) -> Callable[[], int]:
+    client = module.app.test_client()
+
+    def send() -> int:
+        # 세션은 일정 범위 안에서 재사용 (대화 기록이 메모리가 아닌 저장소에 쌓이는지 확인)
+        payload = {'message': question(rng), 'session_id': f"soak-{rng.randrange(200)}"}
+        if rng.random() < 0.3:
+            response = client.post('/api/chat/stream', json=payload)
+            response.get_data()
+        else:
+            response = client.post('/api/chat', json=payload)
+        return response.status_code
+    return send
+
+
+def tarot_cli_driver(module, rng: random.Random) -> Callable[[], int]:
+    # 터미널 챗봇은 한 세션이 계속 대화하므로 chat_history가 max_history에서 멈추는지 확인합니다.
+    bot = module.TarotChatbot(session_id='soak')
+
+    def send() -> int:
+        user_input = question(rng)
+        reading = bot.get_tarot_reading(user_input, rng.choice([1, 2, 3]))
+        bot.add_to_history(user_input, reading)
+        return 500 if reading.startswith("죄송합니다") else 200
+    return send
+
+
+DRIVERS = {'tarot': tarot_driver, 'loan': loan_driver, 'chatbot': chatbot_driver, 'tarot-cli': tarot_cli_driver}
+
+
+# --- 실행 ---
+
+def main():
+    parser = argparse.ArgumentParser(description="장시간 실행 메모리 증가 검사")
+    parser.add_argument('--app', choices=sorted(APP_DIRS), required=True, help="검사할 앱")
+    parser.add_argument('--duration', type=float, default=600, help="실행 시간 (초)")
+    parser.add_argument('--requests', type=int, default=None, help="요청 수 (지정하면 실행 시간 대신 사용)")
+    parser.add_argument('--warmup', type=int, default=1000, help="기준 스냅샷 전 최소 워밍업 요청 수")
+    parser.add_argument('--warmup-block', type=int, default=500,
+                        help="워밍업 증가량을 재는 단위 (요청 수, 이 구간의 증가가 허용치 아래면 워밍업 종료)")
+    parser.add_argument('--max-warmup', type=int, default=20000,
+                        help="최대 워밍업 요청 수 (캐시가 큰 설정 파일을 쓸 때 늘림)")
+    parser.add_argument('--interval', type=float, default=30, help="표본 간격 (초)")
+    parser.add_argument('--samples', type=int, default=20, help="--requests를 지정했을 때 표본 수")
+    parser.add_argument('--max-bytes-per-request', type=float, default=512,
+                        help="후반부 요청당 유지 메모리 허용치 (바이트, 넘으면 실패)")
+    parser.add_argument('--steady-fraction', type=float, default=0.5,
+                        help="기울기 계산에 쓰는 마지막 표본 비율")
+    parser.add_argument('--frames', type=int, default=1, help="tracemalloc 저장 프레임 수")
+    parser.add_argument('--top', type=int, default=10, help="출력할 증가 위치 수")
+    parser.add_argument('--config', default=None, help="앱 설정 파일 (tarot, chatbot, tarot-cli)")
+    parser.add_argument('--report', default=None, help="표본과 결과를 저장할 JSON 경로")
+    parser.add_argument('--seed', type=int, default=42, help="요청 생성 시드")
+    parser.add_argument('--app-output', action='store_true', help="앱의 요청별 출력(print)을 그대로 표시")
+    args = parser.parse_args()
+
+    key_type = 'traceback' if args.frames > 1 else 'lineno'
+    module = load_app(args.app, args.config)
+    # 의미 기반 캐시의 초평면 부호 캐시는 수만 개의 새 질문에 걸쳐 천천히 차므로 미리 채웁니다.
+    for value in list(vars(module).values()):
+        if isinstance(value, SemanticCache):
+            value.prime()
+    driver = DRIVERS[args.app](module, random.Random(args.seed))
+    devnull = open(os.devnull, 'w')
+
+    def send() -> int:
+        if args.app_output:
+            return driver()
+        with contextlib.redirect_stdout(devnull):
+            return driver()
+
+    tracemalloc.start(args.frames)
+    errors = 0
+    for _ in range(args.warmup):
+        errors += send() >= 500
+    warmup_sent = args.warmup
+    # 크기 제한이 있는 캐시/버퍼가 다 찰 때까지 구간 단위로 워밍업을 이어갑니다.
+    block = max(1, args.warmup_block)
+    while warmup_sent < args.max_warmup:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(block):
+            errors += send() >= 500
+        warmup_sent += block
+        if (tracemalloc.get_traced_memory()[0] - before) / block <= args.max_bytes_per_request:
+            break
+
+    baseline = take_snapshot()
+    baseline_traced = tracemalloc.get_traced_memory()[0]
+    baseline_rss = rss_bytes()
+    print(f"🧪 {args.app}: 워밍업 {warmup_sent}회 후 기준 traced {baseline_traced / 1024:.0f}KB, "
+          f"RSS {(baseline_rss or 0) / 1048576:.1f}MB")
+
+    samples = []
+    requests_sent = 0
+    started = time.monotonic()
+    next_sample = started + args.interval
+    sample_every = max(1, args.requests // args.samples) if args.requests is not None else None
+
+    def finished() -> bool:
+        if args.requests is not None:
+            return requests_sent >= args.requests
+        return time.monotonic() - started >= args.duration
+
+    while not finished():
+        errors += send() >= 500
+        requests_sent += 1
+        due = requests_sent % sample_every == 0 if sample_every else time.monotonic() >= next_sample
+        if due or finished():
+            next_sample = time.monotonic() + args.interval
+            traced = tracemalloc.get_traced_memory()[0]
+            rss = rss_bytes()
+            samples.append({'requests': requests_sent, 'elapsed_seconds': round(time.monotonic() - started, 1),
+                            'traced_bytes': traced, 'rss_bytes': rss})
+            print(f"  {requests_sent:>8}회  traced {(traced - baseline_traced) / 1024:+9.1f}KB  "
+                  f"RSS {((rss or 0) - (baseline_rss or 0)) / 1048576:+7.1f}MB  오류 {errors}")
+
+    snapshot = take_snapshot()
+    if len(samples) < 3:
+        print("⚠️ 표본이 3개 미만이라 기울기를 믿기 어렵습니다. --duration을 늘리거나 --interval을 줄이세요.")
+    steady = samples[int(len(samples) * (1 - args.steady_fraction)):] if len(samples) > 2 else samples
+    traced_slope = slope([(s['requests'], s['traced_bytes']) for s in steady])
+    rss_slope = slope([(s['requests'], s['rss_bytes']) for s in steady if s['rss_bytes'] is not None])
+    growth = top_growth(snapshot, baseline, key_type, args.top)
+    failed = traced_slope > args.max_bytes_per_request
+
+    print(f"\n📈 기준 이후 증가가 큰 할당 위치 (상위 {args.top})")
+    for item in growth:
+        print(f"  {item['size_diff'] / 1024:+9.1f}KB ({item['count_diff']:+d}개)  {item['site']}")
+    print(f"\n요청 {requests_sent}회, 서버 오류 {errors}회")
+    print(f"후반부 요청당 유지 메모리: traced {traced_slope:.1f}B/요청, RSS {rss_slope:.1f}B/요청 "
+          f"(허용치 {args.max_bytes_per_request:.0f}B/요청)")
+    print("❌ 메모리 증가가 허용치를 넘었습니다." if failed else "✅ 메모리 증가가 허용치 안에 있습니다.")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as file:
+            json.dump({
+                'app': args.app,
+                'requests': requests_sent,
+                'warmup_requests': warmup_sent,
+                'errors': errors,
+                'baseline_traced_bytes': baseline_traced,
+                'baseline_rss_bytes': baseline_rss,
+                'traced_bytes_per_request': traced_slope,
+                'rss_bytes_per_request': rss_slope,
+                'max_bytes_per_request': args.max_bytes_per_request,
+                'failed': failed,
+                'samples': samples,
+                'top_growth': growth,
+            }, file, ensure_ascii=False, indent=2)
+
+    stop_workers = getattr(getattr(module, 'worker_pool', None), 'stop', None)
+    if stop_workers is not None:
+        stop_workers(1)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
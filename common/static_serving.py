@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from flask import abort, current_app, request, send_file
+
+from .compression import find_precompressed
+
+# "style.3f9a1c2b7d.css"처럼 파일명에 끼워 넣은 콘텐츠 해시
+HASHED_NAME_PATTERN = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{10})(?P<ext>\.[^.]+)$')
+HASH_LENGTH = 10
+
+# 해시가 들어간 URL은 내용이 바뀌면 URL도 바뀌므로 1년 동안 재검증 없이 캐시해도 됩니다.
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class StaticFileServer:
+    """콘텐츠 해시 URL, 강한 ETag, 304/Range 응답을 지원하는 정적 파일 제공 계층
+
+    - 자주 요청되는 작은 파일은 메모리(LRU, 전체 용량 제한)에 올려 두고 바로 응답합니다.
+    - 나머지 파일은 send_file로 보내므로 WSGI 서버가 지원하면 sendfile(zero-copy)로 전송됩니다.
+    - 파일 해시는 (수정 시각, 크기)가 바뀔 때만 다시 계산합니다.
+    """
+
+    def __init__(self, max_memory_bytes: int = 32 * 1024 * 1024,
+                 max_file_bytes: int = 2 * 1024 * 1024, admit_after_hits: int = 2):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_file_bytes = max_file_bytes
+        self.admit_after_hits = admit_after_hits
+
+        self._lock = threading.Lock()
+        self._info = {}                 # path -> (stat_key, sha256 hexdigest)
+        self._memory = OrderedDict()    # path -> (stat_key, bytes)
+        self._memory_bytes = 0
+        self._hit_counts = {}
+
+        self.stats = {'memory_hits': 0, 'file_sends': 0, 'not_modified': 0, 'precompressed': 0}
+
+    @staticmethod
+    def _stat_key(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def content_hash(self, path: str) -> Optional[str]:
+        """파일 내용의 SHA-256 (변경되지 않았으면 캐시된 값)"""
+        stat_key = self._stat_key(path)
+        if stat_key is None:
+            return None
+
+        with self._lock:
+            cached = self._info.get(path)
+            if cached is not None and cached[0] == stat_key:
+                return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1024 * 1024), b''):
+                digest.update(block)
+        content_hash = digest.hexdigest()
+
+        with self._lock:
+            self._info[path] = (stat_key, content_hash)
+        return content_hash
+
+    def hashed_filename(self, directory: str, filename: str) -> str:
+        """filename에 콘텐츠 해시를 붙인 이름 (파일이 없으면 그대로 반환)"""
+        content_hash = self.content_hash(os.path.join(directory, filename))
+        if content_hash is None:
+            return filename
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}.{content_hash[:HASH_LENGTH]}{ext}"
+
+    @staticmethod
+    def split_hashed_filename(filename: str) -> Tuple[str, Optional[str]]:
+        """"style.3f9a1c2b7d.css" -> ("style.css", "3f9a1c2b7d")"""
+        match = HASHED_NAME_PATTERN.match(filename)
+        if match is None:
+            return filename, None
+        return match.group('stem') + match.group('ext'), match.group('hash')
+
+    def _from_memory(self, path: str, stat_key: Tuple[int, int]) -> Optional[bytes]:
+        """메모리 캐시 조회, 충분히 자주 요청된 작은 파일은 캐시에 적재"""
+        with self._lock:
+            cached = self._memory.get(path)
+            if cached is not None:
+                if cached[0] == stat_key:
+                    self._memory.move_to_end(path)
+                    return cached[1]
+                self._memory_bytes -= len(cached[1])
+                del self._memory[path]
+
+            size = stat_key[1]
+            if size > self.max_file_bytes:
+                return None
+            hits = self._hit_counts.get(path, 0) + 1
+            self._hit_counts[path] = hits
+            if hits < self.admit_after_hits:
+                return None
+
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        with self._lock:
+            if path not in self._memory:
+                self._memory[path] = (stat_key, data)
+                self._memory_bytes += len(data)
+                while self._memory_bytes > self.max_memory_bytes and self._memory:
+                    _, (_, evicted) = self._memory.popitem(last=False)
+                    self._memory_bytes -= len(evicted)
+        return data
+
+    def send(self, path: str, immutable: bool = False, mimetype: Optional[str] = None):
+        """파일 응답 생성 (ETag, 304, Range, Cache-Control 처리 포함)"""
+        stat_key = self._stat_key(path)
+        if stat_key is None or not os.path.isfile(path):
+            abort(404)
+
+        mimetype = mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        # 빌드 단계에서 만든 .br/.gz 파일이 있으면 압축된 파일을 그대로 보냅니다.
+        encoding, send_path = find_precompressed(path, request.headers.get('Accept-Encoding'))
+        # 압축본이 있는 파일은 Accept-Encoding에 따라 응답이 달라집니다.
+        has_variants = encoding is not None or find_precompressed(path, '*')[0] is not None
+        if encoding is not None:
+            path, stat_key = send_path, self._stat_key(send_path)
+
+        etag = self.content_hash(path)
+        data = self._from_memory(path, stat_key)
+
+        if data is not None:
+            self.stats['memory_hits'] += 1
+            response = current_app.response_class(data, mimetype=mimetype)
+            response.set_etag(etag)
+            response.last_modified = stat_key[0] / 1e9
+            response = response.make_conditional(request, accept_ranges=True, complete_length=len(data))
+        else:
+            self.stats['file_sends'] += 1
+            response = send_file(path, mimetype=mimetype, etag=etag, conditional=True,
+                                 last_modified=stat_key[0] / 1e9)
+
+        if response.status_code == 304:
+            self.stats['not_modified'] += 1
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+            self.stats['precompressed'] += 1
+        if has_variants:
+            response.vary.add('Accept-Encoding')
+
+        if immutable:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        else:
+            # 해시가 없는 URL은 매번 재검증하되, 바뀌지 않았으면 304로 본문 없이 응답합니다.
+            response.cache_control.no_cache = True
+        return response
+
+    def send_from(self, directory: str, filename: str, mimetype: Optional[str] = None):
+        """directory 안의 filename 제공. 해시가 붙은 이름이면 검증 후 immutable로 응답"""
+        original, requested_hash = self.split_hashed_filename(filename)
+        path = _safe_join(directory, original)
+        if path is None:
+            abort(404)
+
+        if requested_hash is None:
+            # 해시가 없는 URL은 재검증이 필요한 일반 캐시 정책으로 응답합니다.
+            return self.send(path, mimetype=mimetype)
+
+        current_hash = self.content_hash(path)
+        if current_hash is None:
+            abort(404)
+        # 이전 버전의 해시로 요청하면 현재 내용을 주되 오래 캐시하지 않도록 합니다.
+        return self.send(path, immutable=current_hash.startswith(requested_hash), mimetype=mimetype)
+
+    def memory_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self.stats,
+                'memory_files': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+            }
+
+
+def _safe_join(directory: str, filename: str) -> Optional[str]:
+    """디렉터리 밖을 가리키는 경로(../ 등)를 막는 경로 결합"""
+    directory = os.path.abspath(directory)
+    path = os.path.abspath(os.path.join(directory, filename))
+    if os.path.commonpath([directory, path]) != directory:
+        return None
+    return path
+
+
+def init_static_serving(app, server: StaticFileServer):
+    """Flask 앱의 /static을 해시 URL 지원 버전으로 교체
+
+    템플릿의 url_for('static', filename='style.css')는 자동으로
+    /static/style.<hash>.css 형태의 immutable URL이 됩니다.
+    """
+    static_folder = app.static_folder
+
+    def static_view(filename):
+        return server.send_from(static_folder, filename)
+
+    app.view_functions['static'] = static_view
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            filename = values['filename']
+            if server.split_hashed_filename(filename)[1] is None:
+                values['filename'] = server.hashed_filename(static_folder, filename)
+
+    return server
@@ -1,59 +1,86 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask import Flask, render_template, request, jsonify
 import json
-import random
-import yaml
-import google.generativeai as genai
-from typing import List, Dict, Any
+from typing import Dict, Any, Optional, Tuple
 import os
+import sys
+
+# 저장소 루트의 공용 모듈(common)을 불러오기 위해 경로를 추가합니다.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from common.compression import init_compression
+from common.fast_json import init_fast_json, project_response
+from common.llm_client import LLMConfigError, read_config
+from common.model_router import create_router
+from common.profiling import init_profiling
+from common.semantic_cache import create_semantic_cache
+from common.static_serving import StaticFileServer, init_static_serving
+from image_variants import CARD_IMAGE_DIR, card_image_urls, choose_format, choose_width, ensure_variant, FORMATS
+from interpretation_store import CATEGORY_LABELS, POSITIONS_BY_COUNT, InterpretationStore, classify_question
+from response_views import RESPONSE_VIEWS
+from tarot_deck import Draw, TarotDeck
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key'
+# 정적 파일과 카드 이미지는 콘텐츠 해시 URL + ETag로 제공합니다.
+static_server = init_static_serving(app, StaticFileServer())
 
 class TarotChatbotAPI:
     def __init__(self, config_path: str = "config.yaml"):
         self.config = self.load_config(config_path)
         self.tarot_cards = self.load_tarot_cards()
-
-        genai.configure(api_key=self.config['gemini']['api_key'])
-        self.model = genai.GenerativeModel(self.config['gemini']['model'])
+        # 카드 정보는 한 번만 읽기 전용 덱으로 만들고, 요청마다 (인덱스, 방향)만 뽑습니다.
+        self.deck = TarotDeck.from_json(self.tarot_cards)
+        # 미리 생성한 해석 조각 저장소 (interpretation_store.py로 생성, 없으면 빠른 모드 비활성)
+        self.interpretations = InterpretationStore.open_if_exists(
+            self.config['tarot'].get('interpretations_file', 'interpretations.bin'))
+
+        # 요청마다 프롬프트 크기와 지연 시간에 따라 모델 등급을 고르는 라우터
+        # (1장 리딩이나 빠른 모드의 종합 조언처럼 짧은 요청은 가벼운 모델로 처리)
+        # API 키가 없어도 서버는 시작하고, 리딩 요청마다 설정 오류를 알려줍니다.
+        self.model = None
+        self.model_error = None
+        try:
+            self.model = create_router(self.config)
+        except LLMConfigError as e:
+            self.model_error = str(e)
+            print(f"Gemini AI 설정 오류: {e} (API 키 없이 실행하려면 llm.backend를 fake로 설정하세요.)")
 
     def load_config(self, config_path: str) -> Dict[str, Any]:
-        with open(config_path, 'r', encoding='utf-8') as file:
-            return yaml.safe_load(file)
+        return read_config(config_path)
 
     def load_tarot_cards(self) -> Dict[str, Any]:
         cards_file = self.config['tarot']['cards_file']
         with open(cards_file, 'r', encoding='utf-8') as file:
-            return json.load(file)
+            tarot_cards = json.load(file)
 
-    def draw_cards(self, num_cards: int = 3) -> List[Dict[str, Any]]:
+        # 리딩 응답에서는 원본 대신 작은 변형본 이미지를 해시 URL로 참조합니다.
+        for card in tarot_cards['major_arcana']:
+            filename = os.path.basename(card['local_image'])
+            card.update(card_image_urls(static_server.hashed_filename(CARD_IMAGE_DIR, filename)))
+        return tarot_cards
+
+    def draw_cards(self, num_cards: int = 3, seed: Optional[int] = None) -> Tuple[Draw, ...]:
         max_cards = self.config['tarot']['max_cards_per_reading']
         num_cards = min(num_cards, max_cards)
 
-        major_arcana = self.tarot_cards['major_arcana']
-        drawn_cards = random.sample(major_arcana, num_cards)
-
-        for card in drawn_cards:
-            card['is_reversed'] = random.choice([True, False])
+        return self.deck.draw(num_cards, seed=seed)
 
-        return drawn_cards
-
-    def format_card_info(self, card: Dict[str, Any]) -> str:
-        orientation = "역방향" if card['is_reversed'] else "정방향"
-        meaning = card['reversed_meaning'] if card['is_reversed'] else card['upright_meaning']
+    def format_card_info(self, draw: Draw) -> str:
+        card = self.deck.card(draw)
+        orientation = "역방향" if draw.is_reversed else "정방향"
+        meaning = card.meaning(draw.is_reversed)
 
         card_info = f"""
-🃏 **{card['name']} ({card['name_korean']})** - {orientation}
-📝 설명: {card['description']}
+🃏 **{card.name} ({card.name_korean})** - {orientation}
+📝 설명: {card.description}
 🔍 의미: {meaning}
 """
         return card_info
 
-    def create_reading_prompt(self, user_question: str, drawn_cards: List[Dict[str, Any]]) -> str:
-        cards_info = "\n".join([self.format_card_info(card) for card in drawn_cards])
+    def create_reading_prompt(self, user_question: str, drawn_cards: Tuple[Draw, ...]) -> str:
+        cards_info = "\n".join([self.format_card_info(draw) for draw in drawn_cards])
 
         prompt = f"""
 당신은 전문적이고 통찰력 있는 타로 카드 리더입니다. 다음 질문에 대해 뽑힌 카드들을 바탕으로 심도 있는 타로 리딩을 제공해주세요.
@@ -74,24 +101,29 @@ class TarotChatbotAPI:
 """
         return prompt
 
-    def get_tarot_reading(self, user_question: str, num_cards: int = 3) -> Dict[str, Any]:
+    def get_tarot_reading(self, user_question: str, num_cards: int = 3,
+                          seed: Optional[int] = None) -> Dict[str, Any]:
         try:
-            drawn_cards = self.draw_cards(num_cards)
+            if self.model is None:
+                raise LLMConfigError(self.model_error)
+            drawn_cards = self.draw_cards(num_cards, seed=seed)
             prompt = self.create_reading_prompt(user_question, drawn_cards)
 
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.config['chat']['temperature']
-                )
+                temperature=self.config['chat']['temperature']
             )
 
-            return {
+            result = {
                 'success': True,
-                'cards': drawn_cards,
+                'cards': self.deck.to_dicts(drawn_cards),
                 'reading': response.text,
-                'question': user_question
+                'question': user_question,
+                'model_tier': self.model.last_route
             }
+            if seed is not None:
+                result['seed'] = seed
+            return result
 
         except Exception as e:
             return {
@@ -99,7 +131,89 @@ class TarotChatbotAPI:
                 'error': f"타로 리딩 중 오류가 발생했습니다: {str(e)}"
             }
 
+    def create_synthesis_prompt(self, user_question: str, drawn_cards: Tuple[Draw, ...],
+                                positions: Tuple[str, ...]) -> str:
+        cards_info = "\n".join(
+            f"- {position}: {self.deck.card(draw).name_korean} ({'역방향' if draw.is_reversed else '정방향'})"
+            for position, draw in zip(positions, drawn_cards)
+        )
+
+        return f"""
+당신은 전문적이고 통찰력 있는 타로 카드 리더입니다. 각 카드의 해석은 이미 제공되었으니,
+아래 카드 조합을 질문에 맞춰 종합한 조언 한 문단(3~4문장)만 한국어로 작성해주세요.
+
+**질문**: {user_question}
+
+**뽑힌 카드들**:
+{cards_info}
+
+따뜻하고 격려적인 톤으로 작성해주세요.
+"""
+
+    def get_fast_reading(self, user_question: str, num_cards: int = 3,
+                         seed: Optional[int] = None) -> Dict[str, Any]:
+        """저장소의 해석 조각으로 리딩을 조립하고, 모델은 종합 조언 한 문단에만 사용
+
+        저장소가 없거나 해당 카드 수의 스프레드가 정의되지 않았으면 전체 리딩으로 대체합니다.
+        """
+        drawn_cards = self.draw_cards(num_cards, seed=seed)
+        positions = POSITIONS_BY_COUNT.get(len(drawn_cards))
+        if self.interpretations is None or positions is None:
+            return self.get_tarot_reading(user_question, num_cards, seed=seed)
+
+        category = classify_question(user_question)
+        sections = []
+        for position, draw in zip(positions, drawn_cards):
+            card = self.deck.card(draw)
+            fragment = self.interpretations.get(card.number, draw.is_reversed, position, category)
+            if fragment is None:
+                return self.get_tarot_reading(user_question, num_cards, seed=seed)
+            orientation = "역방향" if draw.is_reversed else "정방향"
+            sections.append(f"**{position}** · {card.name} ({card.name_korean}) - {orientation}\n{fragment}")
+
+        try:
+            if self.model is None:
+                raise LLMConfigError(self.model_error)
+            response = self.model.generate_content(
+                self.create_synthesis_prompt(user_question, drawn_cards, positions),
+                temperature=self.config['chat']['temperature']
+            )
+            synthesis = response.text.strip()
+        except Exception as e:
+            # 종합 조언을 만들지 못해도 카드별 해석은 그대로 제공합니다.
+            print(f"종합 조언 생성 실패: {e}")
+            synthesis = f"{CATEGORY_LABELS[category]}에 관한 카드들의 흐름을 차분히 돌아보며 스스로의 선택을 믿어보세요."
+
+        reading = "\n\n".join([
+            "**각 카드 해석**",
+            *sections,
+            "**종합적인 조언**",
+            synthesis,
+            "타로는 미래를 확정하는 것이 아니라 현재 상황을 돌아보고 가능성을 살펴보는 도구입니다. 🌟",
+        ])
+
+        result = {
+            'success': True,
+            'cards': self.deck.to_dicts(drawn_cards),
+            'reading': reading,
+            'question': user_question,
+            'mode': 'fast',
+            'category': category,
+            'model_tier': self.model.last_route if self.model is not None else None,
+        }
+        if seed is not None:
+            result['seed'] = seed
+        return result
+
 tarot_bot = TarotChatbotAPI()
+# 관리자 전용 프로파일링 (실행 중에 켜고 끌 수 있음)
+profiler = init_profiling(app, tarot_bot.config.get('profiling', {}))
+# 리딩 JSON 응답 압축
+compressor = init_compression(app, tarot_bot.config.get('compression', {}))
+# orjson 직렬화 (없으면 표준 json), view=summary면 화면에 쓰는 카드 필드만 응답 (response_views.py)
+init_fast_json(app)
+# 비슷한 질문(패러프레이즈)에 대한 리딩 재사용 캐시 (카드 수별로 분리)
+reading_cache = create_semantic_cache(tarot_bot.config.get('semantic_cache', {}))
 
 @app.route('/')
 def index():
@@ -107,7 +221,24 @@ def index():
 
 @app.route('/card_image/<filename>')
 def serve_card_image(filename):
-    return send_from_directory('card_image', filename)
+    # w(폭) 또는 fmt(포맷) 파라미터가 없으면 원본을 그대로 제공합니다.
+    if 'w' not in request.args and 'fmt' not in request.args:
+        return static_server.send_from(CARD_IMAGE_DIR, filename)
+
+    original, requested_hash = static_server.split_hashed_filename(filename)
+    width = choose_width(request.args.get('w'))
+    fmt = choose_format(request.args.get('fmt'), request.headers.get('Accept', ''))
+    variant_path = ensure_variant(original, width, fmt)
+    if variant_path is None:
+        return jsonify({'error': '이미지를 찾을 수 없습니다.'}), 404
+
+    # 변형본은 원본에서 만들어지므로 원본 해시가 맞으면 immutable로 캐시할 수 있습니다.
+    original_hash = static_server.content_hash(os.path.join(CARD_IMAGE_DIR, original)) or ''
+    immutable = requested_hash is not None and original_hash.startswith(requested_hash)
+    response = static_server.send(variant_path, immutable=immutable, mimetype=FORMATS[fmt]['mimetype'])
+    # 같은 URL이라도 Accept 헤더에 따라 포맷이 달라지므로 캐시가 구분하도록 합니다.
+    response.vary.add('Accept')
+    return response
 
 @app.route('/api/tarot', methods=['POST'])
 def get_tarot_reading():
@@ -115,6 +246,28 @@ def get_tarot_reading():
         data = request.get_json()
         question = data.get('question', '')
         num_cards = data.get('num_cards', 3)
+        # seed를 지정하면 같은 카드 조합이 다시 뽑혀 리딩을 재현할 수 있습니다.
+        seed = data.get('seed')
+        # mode가 'fast'면 미리 생성한 해석 조각으로 리딩을 조립합니다.
+        mode = data.get('mode', tarot_bot.config['tarot'].get('default_mode', 'full'))
+        if seed is not None:
+            try:
+                seed = int(seed)
+            except (TypeError, ValueError):
+                return jsonify({
+                    'success': False,
+                    'error': 'seed는 정수여야 합니다.'
+                })
+        try:
+            num_cards = int(num_cards)
+        except (TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'num_cards는 정수여야 합니다.'
+            })
+        # 캐시 네임스페이스에도 쓰이므로 허용 범위(1 ~ max_cards_per_reading)로 맞춥니다.
+        num_cards = min(max(num_cards, 1), tarot_bot.config['tarot']['max_cards_per_reading'])
+        mode = 'fast' if mode == 'fast' else 'full'
 
         if not question.strip():
             return jsonify({
@@ -144,11 +297,26 @@ def get_tarot_reading():
                 'cards': []
             })
 
+        # seed를 지정한 리딩은 캐시하지 않습니다. (seed마다 네임스페이스가 생기면 캐시가 끝없이 커짐)
+        cache_namespace = f"tarot:{num_cards}" + (":fast" if mode == 'fast' else '')
+        cached = reading_cache.get(cache_namespace, question) if seed is None else None
+        if cached is not None:
+            print(f"캐시 적중: {question}")
+            return jsonify(project_response({**cached, 'question': question, 'cached': True}, RESPONSE_VIEWS))
+
         print(f"질문 받음: {question}, 카드 수: {num_cards}")
-        result = tarot_bot.get_tarot_reading(question, num_cards)
+        if mode == 'fast':
+            result = tarot_bot.get_fast_reading(question, num_cards, seed=seed)
+        else:
+            result = tarot_bot.get_tarot_reading(question, num_cards, seed=seed)
         print(f"결과: {result['success']}")
 
-        return jsonify(result)
+        if result['success'] and seed is None:
+            reading_cache.put(cache_namespace, question, {
+                key: value for key, value in result.items() if key != 'question'
+            })
+
+        return jsonify(project_response(result, RESPONSE_VIEWS))
 
     except Exception as e:
         print(f"오류 발생: {e}")
@@ -157,6 +325,18 @@ def get_tarot_reading():
             'error': f'서버 오류가 발생했습니다: {str(e)}'
         })
 
+@app.route('/api/cache/stats', methods=['GET'])
+def cache_stats():
+    """의미 기반 캐시의 적중률/조회 지연 시간 (임계값 튜닝용)"""
+    return jsonify(reading_cache.stats())
+
+@app.route('/api/llm/stats', methods=['GET'])
+def llm_stats():
+    """모델 등급별 호출 수, 대체 처리 수, 지연 시간, 토큰 수, 예상 비용"""
+    if tarot_bot.model is None:
+        return jsonify({'error': f'모델이 초기화되지 않았습니다: {tarot_bot.model_error}'}), 500
+    return jsonify(tarot_bot.model.metrics())
+
 if __name__ == '__main__':
     print("🔮 타로 챗봇 서버를 시작합니다...")
     app.run(debug=True, host='127.0.0.1', port=5000)
\ No newline at end of file
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""카드 뽑기 처리량 벤치마크
+
+기존 방식(공유 카드 딕셔너리에 is_reversed를 기록)과 TarotDeck 방식을
+여러 스레드에서 동시에 실행해 처리량과 결과 오염 여부를 비교합니다.
+
+사용법:
+    python bench_deck.py --draws 200000 --threads 1 4 16
+"""
+
+import argparse
+import copy
+import json
+import random
+import threading
+import time
+
+from tarot_deck import TarotDeck
+
+
+def legacy_draw(major_arcana, num_cards):
+    """기존 draw_cards: 공유 딕셔너리를 직접 수정"""
+    drawn_cards = random.sample(major_arcana, num_cards)
+    for card in drawn_cards:
+        card['is_reversed'] = random.choice([True, False])
+    return drawn_cards
+
+
+def legacy_locked_deepcopy_draw(major_arcana, num_cards, lock):
+    """기존 방식을 안전하게 고치는 흔한 방법: 잠금 + deepcopy"""
+    with lock:
+        drawn_cards = copy.deepcopy(random.sample(major_arcana, num_cards))
+    for card in drawn_cards:
+        card['is_reversed'] = random.choice([True, False])
+    return drawn_cards
+
+
+def run_threads(num_threads, draws_per_thread, work):
+    """work(결과 기록용 리스트)를 스레드마다 실행하고 (초, 오염 건수) 반환"""
+    corrupted = [0] * num_threads
+    barrier = threading.Barrier(num_threads + 1)
+
+    def worker(slot):
+        barrier.wait()
+        corrupted[slot] = work(draws_per_thread)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(num_threads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, sum(corrupted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="카드 뽑기 벤치마크")
+    parser.add_argument('--cards-file', default='tarot_cards.json')
+    parser.add_argument('--draws', type=int, default=200000, help="스레드 수와 상관없는 전체 뽑기 횟수")
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--num-cards', type=int, default=3)
+    args = parser.parse_args()
+
+    with open(args.cards_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    deck = TarotDeck.from_json(data)
+    lock = threading.Lock()
+    num_cards = args.num_cards
+
+    def legacy_work(n):
+        # 뽑은 직후의 방향과 응답을 만들 시점의 방향이 다르면 다른 요청에 의해 오염된 것입니다.
+        corrupted = 0
+        for _ in range(n):
+            cards = legacy_draw(data['major_arcana'], num_cards)
+            expected = [card['is_reversed'] for card in cards]
+            response = [dict(card) for card in cards]
+            corrupted += any(card['is_reversed'] != e for card, e in zip(response, expected))
+        return corrupted
+
+    def locked_work(n):
+        for _ in range(n):
+            cards = legacy_locked_deepcopy_draw(data['major_arcana'], num_cards, lock)
+            [dict(card) for card in cards]
+        return 0
+
+    def deck_work(n):
+        for _ in range(n):
+            deck.to_dicts(deck.draw(num_cards))
+        return 0
+
+    def deck_seeded_work(n):
+        corrupted = 0
+        for seed in range(n):
+            draws = deck.draw(num_cards, seed=seed)
+            corrupted += draws != deck.draw(num_cards, seed=seed)
+            deck.to_dicts(draws)
+        return corrupted
+
+    variants = [
+        ('기존 (공유 dict 수정)', legacy_work),
+        ('기존 + 잠금 + deepcopy', locked_work),
+        ('TarotDeck', deck_work),
+        ('TarotDeck (seed 지정, 재현 검증 포함)', deck_seeded_work),
+    ]
+
+    print(f"🃏 {args.draws:,}회 뽑기, {num_cards}장씩 (응답 딕셔너리 생성 포함)\n")
+    for label, work in variants:
+        for num_threads in args.threads:
+            elapsed, corrupted = run_threads(num_threads, args.draws // num_threads, work)
+            print(f"{label:<36} 스레드 {num_threads:>3}: {args.draws / elapsed:>12,.0f} draws/s"
+                  f"  오염/불일치 {corrupted:,}건")
+        print()
+
+
+if __name__ == '__main__':
+    main()
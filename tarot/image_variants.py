@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""카드 이미지의 크기별/포맷별 변형본(WebP, AVIF, JPEG) 생성
+
+빌드 단계에서 미리 만들 수도 있고:
+    python image_variants.py
+
+요청 시점에 없으면 만들어 디스크 캐시(card_image/_variants)에 저장합니다.
+"""
+
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, features
+
+CARD_IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'card_image')
+VARIANT_DIR = os.path.join(CARD_IMAGE_DIR, '_variants')
+
+# 카드 이미지는 화면에서 최대 200px로 표시되므로 1x/2x/4x 밀도에 맞춘 폭을 준비합니다.
+VARIANT_WIDTHS = (200, 400, 800)
+DEFAULT_WIDTH = 200
+
+# 선호 순서 (용량이 작은 포맷 우선)
+FORMATS = {
+    'avif': {'mimetype': 'image/avif', 'pil_format': 'AVIF', 'options': {'quality': 55}},
+    'webp': {'mimetype': 'image/webp', 'pil_format': 'WEBP', 'options': {'quality': 78, 'method': 6}},
+    'jpeg': {'mimetype': 'image/jpeg', 'pil_format': 'JPEG',
+             'options': {'quality': 82, 'optimize': True, 'progressive': True}},
+}
+EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def supported_formats() -> Tuple[str, ...]:
+    """현재 Pillow 빌드에서 저장할 수 있는 포맷 (선호 순서)"""
+    available = []
+    for fmt in FORMATS:
+        if fmt == 'jpeg' or features.check(fmt):
+            available.append(fmt)
+    return tuple(available)
+
+
+SUPPORTED_FORMATS = supported_formats()
+
+
+def choose_format(requested: Optional[str], accept_header: str) -> str:
+    """쿼리 파라미터(fmt) 또는 Accept 헤더로 응답 포맷 결정"""
+    if requested:
+        requested = 'jpeg' if requested.lower() in ('jpg', 'jpeg') else requested.lower()
+        if requested in SUPPORTED_FORMATS:
+            return requested
+
+    accept_header = accept_header or ''
+    for fmt in SUPPORTED_FORMATS:
+        if FORMATS[fmt]['mimetype'] in accept_header:
+            return fmt
+    return 'jpeg'
+
+
+def choose_width(requested: Optional[str]) -> int:
+    """요청한 폭 이상인 가장 작은 변형 폭 선택 (임의 크기 생성을 막기 위해 정해진 폭만 사용)"""
+    try:
+        width = int(requested)
+    except (TypeError, ValueError):
+        return DEFAULT_WIDTH
+
+    for candidate in VARIANT_WIDTHS:
+        if width <= candidate:
+            return candidate
+    return VARIANT_WIDTHS[-1]
+
+
+def variant_filename(filename: str, width: int, fmt: str) -> str:
+    stem = os.path.splitext(filename)[0]
+    return f"{stem}_{width}.{EXTENSIONS[fmt]}"
+
+
+def _lock_for(key: str) -> threading.Lock:
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.Lock()
+        return lock
+
+
+def generate_variant(source_path: str, output_path: str, width: int, fmt: str):
+    """원본을 지정한 폭으로 줄여 저장 (임시 파일에 쓴 뒤 교체하므로 중간 상태가 노출되지 않음)"""
+    with Image.open(source_path) as image:
+        image = image.convert('RGB')
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        spec = FORMATS[fmt]
+        image.save(tmp_path, spec['pil_format'], **spec['options'])
+        os.replace(tmp_path, output_path)
+
+
+def ensure_variant(filename: str, width: int, fmt: str) -> Optional[str]:
+    """변형본 경로를 반환 (없으면 생성). 원본이 없으면 None"""
+    source_path = os.path.join(CARD_IMAGE_DIR, os.path.basename(filename))
+    if not os.path.isfile(source_path):
+        return None
+
+    output_path = os.path.join(VARIANT_DIR, variant_filename(os.path.basename(filename), width, fmt))
+    if _is_fresh(output_path, source_path):
+        return output_path
+
+    # 같은 변형본을 여러 요청이 동시에 만들지 않도록 합니다.
+    with _lock_for(output_path):
+        if not _is_fresh(output_path, source_path):
+            generate_variant(source_path, output_path, width, fmt)
+    return output_path
+
+
+def _is_fresh(output_path: str, source_path: str) -> bool:
+    try:
+        return os.path.getmtime(output_path) >= os.path.getmtime(source_path)
+    except OSError:
+        return False
+
+
+def card_image_urls(local_image: str) -> Dict[str, str]:
+    """리딩 응답에 넣을 카드 이미지 URL (기본은 작은 변형본)"""
+    filename = os.path.basename(local_image)
+    return {
+        'image_src': f"/card_image/{filename}?w={DEFAULT_WIDTH}",
+        'image_srcset': ", ".join(f"/card_image/{filename}?w={width} {width}w" for width in VARIANT_WIDTHS),
+    }
+
+
+def build_all():
+    """모든 카드에 대해 모든 폭/포맷의 변형본 생성 (빌드 단계)"""
+    total_before = 0
+    total_after = {fmt: 0 for fmt in SUPPORTED_FORMATS}
+
+    for filename in sorted(os.listdir(CARD_IMAGE_DIR)):
+        if not filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+            continue
+        total_before += os.path.getsize(os.path.join(CARD_IMAGE_DIR, filename))
+        for width in VARIANT_WIDTHS:
+            for fmt in SUPPORTED_FORMATS:
+                path = ensure_variant(filename, width, fmt)
+                if width == DEFAULT_WIDTH:
+                    total_after[fmt] += os.path.getsize(path)
+        print(f"✅ {filename}")
+
+    print(f"\n📦 원본 합계: {total_before / 1024 / 1024:.1f}MB")
+    for fmt, size in total_after.items():
+        print(f"📦 {DEFAULT_WIDTH}px {fmt} 합계: {size / 1024:.0f}KB")
+
+
+if __name__ == '__main__':
+    build_all()
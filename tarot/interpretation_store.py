@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""미리 생성한 카드 해석 조각을 담는 메모리 맵 키-값 파일
+
+키 공간이 작고 조밀하므로(카드 22 × 방향 2 × 위치 × 질문 유형) 해시 테이블 대신
+고정 슬롯 인덱스를 사용합니다. 조회는 오프셋 테이블에서 8바이트를 읽고 해당 구간을
+디코딩하는 것이 전부라서 수 마이크로초 안에 끝납니다.
+
+파일 구조:
+    헤더      <8s H H H H I>  매직, 카드 수, 방향 수, 위치 수, 유형 수, 메타데이터 길이
+    메타데이터 JSON (위치/유형 이름 목록)
+    오프셋표   슬롯마다 <I I> (데이터 시작 위치, 길이), 길이 0이면 비어 있음
+    데이터     UTF-8 문자열들
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from typing import Dict, Optional, Tuple
+
+MAGIC = b'TAROTKV1'
+HEADER = struct.Struct('<8sHHHHI')
+SLOT = struct.Struct('<II')
+
+NUM_CARDS = 22
+ORIENTATIONS = ('upright', 'reversed')
+
+# 카드 수별 위치(스프레드)
+POSITIONS_BY_COUNT = {
+    1: ('현재',),
+    2: ('현재', '조언'),
+    3: ('과거', '현재', '미래'),
+}
+POSITIONS = ('과거', '현재', '미래', '조언')
+
+# 질문 유형과 분류 키워드 (어절의 앞부분과 비교, 한 글자 키워드는 뒤에 조사만 붙은 경우에만 인정)
+CATEGORIES = ('general', 'love', 'career', 'money', 'health')
+CATEGORY_LABELS = {
+    'general': '전반적인 운세',
+    'love': '연애/인간관계',
+    'career': '일/학업',
+    'money': '금전',
+    'health': '건강',
+}
+CATEGORY_KEYWORDS = {
+    'love': ('연애', '사랑', '애인', '남자친구', '여자친구', '결혼', '짝사랑', '이별', '재회', '썸', '관계'),
+    'career': ('직장', '회사', '이직', '취업', '일', '일자리', '일하', '일해', '일할', '업무', '사업', '시험',
+               '공부', '학업', '합격', '면접', '승진'),
+    'money': ('돈', '금전', '재물', '투자', '주식', '재정', '월급', '대출', '부동산'),
+    'health': ('건강', '병', '병원', '몸', '몸살', '다이어트', '운동', '수술'),
+}
+# 한 글자 키워드 뒤에 붙어도 되는 조사 ('일' + '이' = 일이, '내일'/'일요일'/'병아리'는 제외)
+PARTICLES = ('', '이', '가', '은', '는', '을', '를', '에', '에서', '도', '만', '과', '와', '로', '으로', '의',
+             '이랑', '랑', '이나', '이요', '요')
+WORD_PATTERN = re.compile(r'\w+')
+
+Key = Tuple[int, bool, str, str]
+
+
+def _matches(word: str, keyword: str) -> bool:
+    if len(keyword) == 1:
+        return word.startswith(keyword) and word[1:] in PARTICLES
+    return word.startswith(keyword)
+
+
+def classify_question(question: str) -> str:
+    """질문을 키워드로 유형 분류 (해당 없으면 general)
+
+    >>> classify_question('이직해도 될까요?'), classify_question('요즘 일이 너무 많아요')
+    ('career', 'career')
+    >>> classify_question('내일 하루 운세는?'), classify_question('매일 운동을 해야 할까요')
+    ('general', 'health')
+    >>> [classify_question(q) for q in ('일요일 운세', '동일한 선택', '오늘 일진은?', '병아리를 키워도 될까요')]
+    ['general', 'general', 'general', 'general']
+    >>> classify_question('병이 나을까요'), classify_question('돈이 들어올까요')
+    ('health', 'money')
+    """
+    words = WORD_PATTERN.findall(question)
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(_matches(word, keyword) for word in words for keyword in keywords):
+            return category
+    return 'general'
+
+
+def key_to_id(key: Key) -> str:
+    """배치 작업/체크포인트에서 쓰는 문자열 키 ("카드:방향:위치:유형")"""
+    card_number, is_reversed, position, category = key
+    return f"{card_number}:{int(is_reversed)}:{position}:{category}"
+
+
+def id_to_key(key_id: str) -> Key:
+    card_number, reversed_flag, position, category = key_id.split(':')
+    return int(card_number), reversed_flag == '1', position, category
+
+
+def all_keys():
+    """생성해야 하는 모든 키"""
+    for card_number in range(NUM_CARDS):
+        for is_reversed in (False, True):
+            for position in POSITIONS:
+                for category in CATEGORIES:
+                    yield card_number, is_reversed, position, category
+
+
+def _slot_index(key: Key, positions: Dict[str, int], categories: Dict[str, int]) -> Optional[int]:
+    card_number, is_reversed, position, category = key
+    if not 0 <= card_number < NUM_CARDS or position not in positions or category not in categories:
+        return None
+    return ((card_number * len(ORIENTATIONS) + int(is_reversed)) * len(positions)
+            + positions[position]) * len(categories) + categories[category]
+
+
+def write_store(path: str, fragments: Dict[Key, str]):
+    """해석 조각들을 파일로 기록 (임시 파일에 쓴 뒤 교체)"""
+    positions = {name: i for i, name in enumerate(POSITIONS)}
+    categories = {name: i for i, name in enumerate(CATEGORIES)}
+    num_slots = NUM_CARDS * len(ORIENTATIONS) * len(POSITIONS) * len(CATEGORIES)
+
+    metadata = json.dumps({'positions': POSITIONS, 'categories': CATEGORIES},
+                          ensure_ascii=False).encode('utf-8')
+    data_start = HEADER.size + len(metadata) + SLOT.size * num_slots
+
+    slots = [(0, 0)] * num_slots
+    blobs = []
+    offset = data_start
+    for key, text in fragments.items():
+        index = _slot_index(key, positions, categories)
+        if index is None:
+            continue
+        encoded = text.encode('utf-8')
+        slots[index] = (offset, len(encoded))
+        blobs.append(encoded)
+        offset += len(encoded)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, NUM_CARDS, len(ORIENTATIONS), len(POSITIONS),
+                               len(CATEGORIES), len(metadata)))
+        file.write(metadata)
+        for slot in slots:
+            file.write(SLOT.pack(*slot))
+        for blob in blobs:
+            file.write(blob)
+    os.replace(tmp_path, path)
+
+
+class InterpretationStore:
+    """메모리 맵으로 연 해석 저장소 (읽기 전용, 스레드 안전)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, num_cards, num_orientations, num_positions, num_categories, metadata_length = \
+            HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"해석 저장소 파일 형식이 아닙니다: {path}")
+
+        metadata = json.loads(self._mmap[HEADER.size:HEADER.size + metadata_length].decode('utf-8'))
+        self._positions = {name: i for i, name in enumerate(metadata['positions'])}
+        self._categories = {name: i for i, name in enumerate(metadata['categories'])}
+        self._slots_start = HEADER.size + metadata_length
+
+    @classmethod
+    def open_if_exists(cls, path: str) -> Optional['InterpretationStore']:
+        return cls(path) if os.path.exists(path) else None
+
+    def get(self, card_number: int, is_reversed: bool, position: str, category: str) -> Optional[str]:
+        """해석 조각 조회 (없으면 None)"""
+        index = _slot_index((card_number, is_reversed, position, category),
+                            self._positions, self._categories)
+        if index is None:
+            return None
+
+        offset, length = SLOT.unpack_from(self._mmap, self._slots_start + index * SLOT.size)
+        if length == 0:
+            # 해당 유형이 없으면 일반 해석으로 대체합니다.
+            if category != 'general':
+                return self.get(card_number, is_reversed, position, 'general')
+            return None
+        return self._mmap[offset:offset + length].decode('utf-8')
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+
+# ---------------------------------------------------------------------------
+# 오프라인 사전 생성
+#
+#     python interpretation_store.py --local                # 모델 없이 카드 의미로 생성
+#     python interpretation_store.py --workers 4 --rate-limit 2
+#
+# 생성 결과는 먼저 JSONL 체크포인트에 기록되므로 중단 후 다시 실행하면 이어서 진행합니다.
+# ---------------------------------------------------------------------------
+
+POSITION_HINTS = {
+    '과거': '지금의 상황을 만든 배경으로 돌아볼 만합니다.',
+    '현재': '지금 가장 크게 작용하고 있는 흐름입니다.',
+    '미래': '지금의 흐름이 이어질 때 다가올 가능성입니다.',
+    '조언': '앞으로의 선택에서 참고할 태도입니다.',
+}
+
+
+def fragment_prompt(card, is_reversed: bool, position: str, category: str) -> str:
+    """해석 조각 하나를 만들기 위한 모델 프롬프트"""
+    orientation = "역방향" if is_reversed else "정방향"
+    return f"""
+당신은 전문적인 타로 카드 리더입니다. 아래 카드가 스프레드의 '{position}' 자리에 나왔을 때,
+'{CATEGORY_LABELS[category]}'에 관한 질문에 대한 해석을 한국어 2~3문장으로 작성해주세요.
+질문 내용은 알 수 없으므로 특정 상황을 가정하지 말고, 따뜻하고 격려적인 톤을 유지해주세요.
+
+카드: {card.name} ({card.name_korean}) - {orientation}
+설명: {card.description}
+의미: {card.meaning(is_reversed)}
+"""
+
+
+def local_fragment(card, is_reversed: bool, position: str, category: str) -> str:
+    """모델 없이 카드 의미로 만드는 해석 조각 (개발/테스트용 대체 생성기)"""
+    orientation = "역방향" if is_reversed else "정방향"
+    keywords = ", ".join(part.strip() for part in card.meaning(is_reversed).split(',')[:2])
+    return (f"{position} 자리의 {card.name_korean}({card.name}) {orientation} 카드는 "
+            f"{CATEGORY_LABELS[category]} 측면에서 '{keywords}'을(를) 가리킵니다. "
+            f"{POSITION_HINTS[position]}")
+
+
+def load_fragments(checkpoint_path: str) -> Dict[Key, str]:
+    """체크포인트 JSONL에서 성공한 해석 조각 읽기"""
+    fragments = {}
+    with open(checkpoint_path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if result.get('response'):
+                fragments[id_to_key(result['id'])] = result['response'].strip()
+    return fragments
+
+
+def build(deck, output_path: str, checkpoint_path: str, model=None, workers: int = 4,
+          rate_limit: Optional[float] = None) -> Dict[str, int]:
+    """모든 (카드, 방향, 위치, 유형)의 해석을 생성해 저장소 파일로 기록
+
+    model이 None이면 local_fragment로 생성합니다.
+    """
+    from common.batch_runner import BatchRunner
+
+    cards = {card.number: card for card in deck.cards}
+
+    def handle(record):
+        key = id_to_key(record['id'])
+        card = cards[key[0]]
+        if model is None:
+            return local_fragment(card, *key[1:])
+        return model.generate_content(record['prompt']).text
+
+    records = ({'id': key_to_id(key), 'prompt': fragment_prompt(cards[key[0]], *key[1:])}
+               for key in all_keys() if key[0] in cards)
+
+    runner = BatchRunner(handle, workers=workers, rate_limit=rate_limit)
+    stats = runner.run(records, output_path=checkpoint_path)
+
+    fragments = load_fragments(checkpoint_path)
+    write_store(output_path, fragments)
+    stats['stored'] = len(fragments)
+    return stats
+
+
+def main():
+    import argparse
+    import sys
+
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from common.llm_client import get_client, read_config
+    from tarot_deck import TarotDeck
+
+    parser = argparse.ArgumentParser(description="타로 해석 조각 사전 생성")
+    parser.add_argument('--config', default="config.yaml", help="설정 파일 경로")
+    parser.add_argument('--output', default=None, help="저장소 파일 (기본: tarot.interpretations_file)")
+    parser.add_argument('--checkpoint', default='interpretations.jsonl', help="생성 결과 체크포인트 JSONL")
+    parser.add_argument('--local', action='store_true', help="모델 대신 카드 의미로 생성")
+    parser.add_argument('--workers', type=int, default=4, help="동시 실행 워커 수")
+    parser.add_argument('--rate-limit', type=float, default=None, help="초당 최대 요청 수")
+    args = parser.parse_args()
+
+    config = read_config(args.config)
+    output_path = args.output or config['tarot'].get('interpretations_file', 'interpretations.bin')
+    deck = TarotDeck.load(config['tarot']['cards_file'])
+
+    # 공용 클라이언트가 일시적 오류를 재시도하므로 긴 배치 작업도 중간에 잘 끊기지 않습니다.
+    model = None if args.local else get_client(config)
+
+    stats = build(deck, output_path, args.checkpoint, model=model,
+                  workers=args.workers, rate_limit=args.rate_limit)
+    print(f"📦 {output_path}: 해석 {stats['stored']}개 ({os.path.getsize(output_path) / 1024:.0f}KB)")
+
+
+if __name__ == '__main__':
+    main()
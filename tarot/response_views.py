@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""/api/tarot 응답의 요약 보기 (app.py와 common/bench_json.py가 함께 사용)"""
+
+from common.fast_json import compile_views
+
+# view=summary: 화면에 쓰는 카드 필드만 응답
+RESPONSE_VIEWS = compile_views({
+    'summary': [
+        'cards.number', 'cards.name', 'cards.name_korean', 'cards.image_src', 'cards.image_srcset',
+        'cards.is_reversed', 'reading', 'question', 'seed', 'mode', 'category', 'cached', 'is_help', 'message',
+        'model_tier',
+    ],
+})
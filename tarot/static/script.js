@@ -56,7 +56,9 @@ class TarotChatApp {
                 },
                 body: JSON.stringify({
                     question: message,
-                    num_cards: numCards
+                    num_cards: numCards,
+                    // 화면에 표시하는 카드 필드만 받습니다.
+                    view: 'summary'
                 })
             });
 
@@ -166,7 +168,10 @@ class TarotChatApp {
             const orientationClass = card.is_reversed ? 'reversed' : 'upright';
 
             cardDiv.innerHTML = `
-                <img src="/card_image/${card.local_image.split('/')[1]}"
+                <img src="${card.image_src || `/card_image/${card.local_image.split('/')[1]}`}"
+                     srcset="${card.image_srcset || ''}"
+                     sizes="(max-width: 768px) 150px, 200px"
+                     loading="lazy"
                      alt="${card.name}"
                      class="card-image"
                      onerror="this.src='data:image/svg+xml;base64,PHN2ZyB3aWR0aD0iMjAwIiBoZWlnaHQ9IjMwMCIgeG1sbnM9Imh0dHA6Ly93d3cudzMub3JnLzIwMDAvc3ZnIj48cmVjdCB3aWR0aD0iMjAwIiBoZWlnaHQ9IjMwMCIgZmlsbD0iIzMzMzMzMyIvPjx0ZXh0IHg9IjUwJSIgeT0iNTAlIiBmb250LWZhbWlseT0iQXJpYWwiIGZvbnQtc2l6ZT0iMTYiIGZpbGw9IndoaXRlIiB0ZXh0LWFuY2hvcj0ibWlkZGxlIiBkeT0iLjNlbSI+VGFyb3QgQ2FyZDwvdGV4dD48L3N2Zz4='">
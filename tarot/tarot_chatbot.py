@@ -1,15 +1,19 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
-import random
-import yaml
-import google.generativeai as genai
-from typing import List, Dict, Any
+import argparse
+from typing import List, Dict, Any, Optional, Tuple
 import os
 import sys
 from pathlib import Path
 
+# 저장소 루트의 공용 모듈(common)을 불러오기 위해 경로를 추가합니다.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.batch_runner import BatchRunner, add_batch_arguments, read_jsonl
+from common.conversation_store import ConversationStore
+from common.llm_client import get_client, read_config
+from tarot_deck import Draw, TarotDeck
+
 # 윈도우 환경에서 UTF-8 출력 설정
 if sys.platform.startswith('win'):
     import io
@@ -17,66 +21,58 @@ if sys.platform.startswith('win'):
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 class TarotChatbot:
-    def __init__(self, config_path: str = "config.yaml"):
+    def __init__(self, config_path: str = "config.yaml", session_id: str = "default"):
         """타로 챗봇 초기화"""
         self.config = self.load_config(config_path)
-        self.tarot_cards = self.load_tarot_cards()
-        self.chat_history = []
+        self.deck = self.load_tarot_cards()
 
-        # Gemini API 설정
-        genai.configure(api_key=self.config['gemini']['api_key'])
-        self.model = genai.GenerativeModel(self.config['gemini']['model'])
+        # 대화 기록은 SQLite에 저장하고, 최근 기록만 메모리로 불러옵니다.
+        self.session_id = session_id
+        self.store = ConversationStore(self.config['chat'].get('history_db', 'tarot_history.db'))
+        self.chat_history = self.load_history()
 
-        print("🔮 타로 챗봇이 준비되었습니다!")
-        print("궁금한 것을 물어보시면 타로로 점을 봐드리겠습니다.\n")
+        # Gemini API 설정 (재시도, 타임아웃이 적용된 공용 클라이언트)
+        self.model = get_client(self.config)
 
     def load_config(self, config_path: str) -> Dict[str, Any]:
         """설정 파일 로드"""
         try:
-            with open(config_path, 'r', encoding='utf-8') as file:
-                return yaml.safe_load(file)
+            return read_config(config_path)
         except FileNotFoundError:
             raise FileNotFoundError(f"설정 파일을 찾을 수 없습니다: {config_path}")
 
-    def load_tarot_cards(self) -> Dict[str, Any]:
-        """타로 카드 정보 로드"""
+    def load_tarot_cards(self) -> TarotDeck:
+        """타로 카드 정보 로드 (읽기 전용 덱)"""
         cards_file = self.config['tarot']['cards_file']
         try:
-            with open(cards_file, 'r', encoding='utf-8') as file:
-                return json.load(file)
+            return TarotDeck.load(cards_file)
         except FileNotFoundError:
             raise FileNotFoundError(f"타로 카드 파일을 찾을 수 없습니다: {cards_file}")
 
-    def draw_cards(self, num_cards: int = 3) -> List[Dict[str, Any]]:
-        """랜덤으로 타로 카드 뽑기"""
+    def draw_cards(self, num_cards: int = 3, seed: Optional[int] = None) -> Tuple[Draw, ...]:
+        """랜덤으로 타로 카드 뽑기 (각 카드의 정방향/역방향 포함)"""
         max_cards = self.config['tarot']['max_cards_per_reading']
         num_cards = min(num_cards, max_cards)
 
-        major_arcana = self.tarot_cards['major_arcana']
-        drawn_cards = random.sample(major_arcana, num_cards)
-
-        # 각 카드에 대해 정방향/역방향 결정
-        for card in drawn_cards:
-            card['is_reversed'] = random.choice([True, False])
+        return self.deck.draw(num_cards, seed=seed)
 
-        return drawn_cards
-
-    def format_card_info(self, card: Dict[str, Any]) -> str:
+    def format_card_info(self, draw: Draw) -> str:
         """카드 정보를 포맷팅"""
-        orientation = "역방향" if card['is_reversed'] else "정방향"
-        meaning = card['reversed_meaning'] if card['is_reversed'] else card['upright_meaning']
+        card = self.deck.card(draw)
+        orientation = "역방향" if draw.is_reversed else "정방향"
+        meaning = card.meaning(draw.is_reversed)
 
         card_info = f"""
-🃏 **{card['name']} ({card['name_korean']})** - {orientation}
-📝 설명: {card['description']}
+🃏 **{card.name} ({card.name_korean})** - {orientation}
+📝 설명: {card.description}
 🔍 의미: {meaning}
-🖼️ 이미지: {card['local_image']}
+🖼️ 이미지: {card.local_image}
 """
         return card_info
 
-    def create_reading_prompt(self, user_question: str, drawn_cards: List[Dict[str, Any]]) -> str:
+    def create_reading_prompt(self, user_question: str, drawn_cards: Tuple[Draw, ...]) -> str:
         """타로 리딩을 위한 프롬프트 생성"""
-        cards_info = "\n".join([self.format_card_info(card) for card in drawn_cards])
+        cards_info = "\n".join([self.format_card_info(draw) for draw in drawn_cards])
 
         prompt = f"""
 당신은 전문적이고 통찰력 있는 타로 카드 리더입니다. 다음 질문에 대해 뽑힌 카드들을 바탕으로 심도 있는 타로 리딩을 제공해주세요.
@@ -97,11 +93,12 @@ class TarotChatbot:
 """
         return prompt
 
-    def get_tarot_reading(self, user_question: str, num_cards: int = 3) -> str:
-        """타로 리딩 수행"""
+    def get_tarot_reading(self, user_question: str, num_cards: int = 3, seed: Optional[int] = None,
+                          raise_errors: bool = False) -> str:
+        """타로 리딩 수행 (raise_errors이면 오류 안내 문구 대신 예외를 그대로 전달)"""
         try:
             # 카드 뽑기
-            drawn_cards = self.draw_cards(num_cards)
+            drawn_cards = self.draw_cards(num_cards, seed=seed)
 
             # 프롬프트 생성
             prompt = self.create_reading_prompt(user_question, drawn_cards)
@@ -109,28 +106,43 @@ class TarotChatbot:
             # Gemini API 호출
             response = self.model.generate_content(
                 prompt,
-                generation_config=genai.types.GenerationConfig(
-                    temperature=self.config['chat']['temperature']
-                )
+                temperature=self.config['chat']['temperature']
             )
 
             # 뽑힌 카드 정보 추가
             cards_summary = f"\n🎴 **뽑힌 카드들**:\n"
-            for i, card in enumerate(drawn_cards, 1):
-                orientation = "역방향" if card['is_reversed'] else "정방향"
-                cards_summary += f"{i}. {card['name']} ({card['name_korean']}) - {orientation}\n"
+            for i, draw in enumerate(drawn_cards, 1):
+                card = self.deck.card(draw)
+                orientation = "역방향" if draw.is_reversed else "정방향"
+                cards_summary += f"{i}. {card.name} ({card.name_korean}) - {orientation}\n"
 
             return cards_summary + "\n" + response.text
 
         except Exception as e:
+            if raise_errors:
+                raise
             return f"죄송합니다. 타로 리딩 중 오류가 발생했습니다: {str(e)}"
 
+    def load_history(self) -> List[Dict[str, str]]:
+        """저장소에서 최근 채팅 히스토리만 불러오기"""
+        max_history = self.config['chat']['max_history']
+        messages = self.store.load_recent(self.session_id, limit=max_history * 2)
+
+        history = []
+        for message in messages:
+            if message['role'] == 'user':
+                history.append({'user': message['content'], 'bot': ''})
+            elif history:
+                history[-1]['bot'] = message['content']
+        return history[-max_history:]
+
     def add_to_history(self, user_input: str, bot_response: str):
         """채팅 히스토리에 추가"""
         self.chat_history.append({
             'user': user_input,
             'bot': bot_response
         })
+        self.store.append_many(self.session_id, [('user', user_input), ('model', bot_response)])
 
         # 최대 히스토리 개수 제한
         max_history = self.config['chat']['max_history']
@@ -160,6 +172,8 @@ class TarotChatbot:
 
     def run(self):
         """챗봇 실행"""
+        print("🔮 타로 챗봇이 준비되었습니다!")
+        print("궁금한 것을 물어보시면 타로로 점을 봐드리겠습니다.\n")
         self.show_help()
 
         while True:
@@ -206,10 +220,36 @@ class TarotChatbot:
                 print(f"\n❌ 오류가 발생했습니다: {str(e)}")
                 print("다시 시도해주세요.")
 
+    def run_batch(self, input_path: str, output_path: str = '-', workers: int = 4,
+                  rate_limit: float = None):
+        """JSONL 질문 목록으로 타로 리딩을 동시에 수행 (오프라인 평가용)
+
+        각 줄은 {"id": ..., "prompt": "질문", "num_cards": 3, "seed": 42} 형식입니다. (seed는 선택)
+        """
+        def handle(record):
+            # 실패는 오류로 기록되어야 다음 실행에서 다시 시도되므로 예외를 BatchRunner로 전달합니다.
+            seed = record.get('seed')
+            return self.get_tarot_reading(record['prompt'], int(record.get('num_cards', 3)),
+                                          seed=int(seed) if seed is not None else None, raise_errors=True)
+
+        runner = BatchRunner(handle, workers=workers, rate_limit=rate_limit)
+        return runner.run(read_jsonl(input_path), output_path=output_path)
+
 def main():
     """메인 함수"""
+    parser = argparse.ArgumentParser(description="타로 챗봇")
+    parser.add_argument('--config', default="config.yaml", help="설정 파일 경로")
+    parser.add_argument('--session', default="default", help="이어서 진행할 대화 세션 ID")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
+
     try:
-        chatbot = TarotChatbot()
+        chatbot = TarotChatbot(args.config, session_id=args.session)
+        if args.batch:
+            chatbot.run_batch(args.batch, args.output, args.workers, args.rate_limit)
+            return
+        if chatbot.chat_history:
+            print(f"📜 이전 대화 {len(chatbot.chat_history)}개를 불러왔습니다. (세션: {args.session})")
         chatbot.run()
     except FileNotFoundError as e:
         print(f"❌ 파일 오류: {e}")
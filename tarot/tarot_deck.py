@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import random
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+CARD_FIELDS = (
+    'number', 'name', 'name_korean', 'description', 'upright_meaning', 'reversed_meaning',
+    'image_url', 'local_image', 'image_src', 'image_srcset',
+)
+
+
+class TarotCard:
+    """변경할 수 없는 타로 카드 정보 (덱을 불러올 때 한 번만 생성)"""
+
+    __slots__ = CARD_FIELDS + ('_dict',)
+
+    def __init__(self, **fields):
+        for field in CARD_FIELDS:
+            object.__setattr__(self, field, fields.get(field))
+        object.__setattr__(self, '_dict', {
+            field: getattr(self, field) for field in CARD_FIELDS if getattr(self, field) is not None
+        })
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TarotCard는 변경할 수 없습니다.")
+
+    def meaning(self, is_reversed: bool) -> str:
+        return self.reversed_meaning if is_reversed else self.upright_meaning
+
+    def to_dict(self, is_reversed: bool) -> Dict[str, Any]:
+        """응답용 딕셔너리 (매번 새로 만들므로 공유 데이터가 바뀌지 않음)"""
+        return {**self._dict, 'is_reversed': is_reversed}
+
+    def __repr__(self):
+        return f"TarotCard({self.number}, {self.name!r})"
+
+
+class Draw(NamedTuple):
+    """리딩 한 번에서 뽑힌 카드 (덱 내 인덱스, 역방향 여부)"""
+    index: int
+    is_reversed: bool
+
+
+class TarotDeck:
+    """메이저 아르카나 덱
+
+    카드 정보는 읽기 전용이고, 뽑기 결과는 (인덱스, 방향)만 담은 Draw로 반환하므로
+    여러 스레드가 잠금이나 복사 없이 동시에 뽑아도 서로의 결과에 영향을 주지 않습니다.
+    """
+
+    def __init__(self, cards: List[TarotCard]):
+        self.cards = tuple(cards)
+        self._indices = range(len(self.cards))
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'TarotDeck':
+        return cls([TarotCard(**card) for card in data['major_arcana']])
+
+    @classmethod
+    def load(cls, cards_file: str) -> 'TarotDeck':
+        with open(cards_file, 'r', encoding='utf-8') as file:
+            return cls.from_json(json.load(file))
+
+    def __len__(self):
+        return len(self.cards)
+
+    def draw(self, num_cards: int, seed: Optional[int] = None) -> Tuple[Draw, ...]:
+        """카드 뽑기. seed를 주면 같은 seed에 대해 항상 같은 결과를 반환"""
+        rng = random.Random(seed) if seed is not None else random
+        indices = rng.sample(self._indices, num_cards)
+        orientations = rng.getrandbits(num_cards) if num_cards else 0
+        return tuple(Draw(index, bool((orientations >> i) & 1)) for i, index in enumerate(indices))
+
+    def card(self, draw: Draw) -> TarotCard:
+        return self.cards[draw.index]
+
+    def to_dicts(self, draws: Tuple[Draw, ...]) -> List[Dict[str, Any]]:
+        """뽑힌 카드들을 응답용 딕셔너리 목록으로 변환"""
+        return [self.cards[draw.index].to_dict(draw.is_reversed) for draw in draws]